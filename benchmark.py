@@ -0,0 +1,889 @@
+"""
+Đo hiệu năng hệ thống quản lý nhân viên với dữ liệu tổng hợp.
+
+Cách dùng:
+    python benchmark.py index --rows 100000 1000000
+    python benchmark.py load --rows 2000000
+    python benchmark.py storage --rows 200000
+    python benchmark.py sqlite --rows 200000
+    python benchmark.py name --rows 200000
+    python benchmark.py ranking --rows 1000000
+    python benchmark.py payroll --rows 1000000
+    python benchmark.py memory --rows 1000000
+    python benchmark.py table --rows 1000000
+    python benchmark.py parallel --rows 1000000 --workers 2 4 8
+    python benchmark.py import --rows 100000 --existing 100000
+    python benchmark.py team --team-size 1000 10000 50000
+    python benchmark.py org --rows 200000
+    python benchmark.py suite --rows 10000 100000 --modes object table sqlite --output results.json
+    python benchmark.py concurrency --rows 100000 --threads 1 2 4 8
+"""
+from contextlib import ExitStack, contextmanager, redirect_stdout
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import generate_data
+import updated_employee_management_system as ems
+
+
+def write_synthetic_file(path, rows, seed=42):
+    """Ghi file dữ liệu tổng hợp gồm `rows` nhân viên (khoảng 5% là quản lý)"""
+    rng = random.Random(seed)
+    n_managers = max(1, rows // 20)
+    n_staff = rows - n_managers
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(n_staff):
+            if i % 2 == 0:
+                f.write(f"FullTime|FT{i:08d}|Nhân Viên {i}|09{i:08d}|nv{i}@company.com|"
+                        f"{rng.randint(8, 30) * 1000000}.0|{rng.randint(0, 20)}\n")
+            else:
+                f.write(f"PartTime|PT{i:08d}|Nhân Viên {i}|09{i:08d}|nv{i}@company.com|"
+                        f"{rng.randint(50, 150) * 1000}.0|{rng.randint(20, 160)}.0\n")
+        for j in range(n_managers):
+            team = ';'.join(
+                f"FT{k:08d}" if k % 2 == 0 else f"PT{k:08d}"
+                for k in range(j * 19, min(n_staff, j * 19 + 19))
+            )
+            f.write(f"Manager|MN{j:08d}|Quản Lý {j}|08{j:08d}|ql{j}@company.com|"
+                    f"{rng.randint(20, 60) * 1000000}.0|{rng.randint(3, 25)}|{team}\n")
+    return [f"FT{i:08d}" if i % 2 == 0 else f"PT{i:08d}" for i in range(n_staff)]
+
+
+def timed(func, *args, **kwargs):
+    """Chạy hàm và trả về (kết quả, số giây)"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def quiet_system(path, cls=None):
+    """Khởi tạo hệ thống (mặc định EmployeeManagementSystem) mà không in thông báo ra màn hình"""
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        return (cls or ems.EmployeeManagementSystem)(path)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+
+def bench_index(args):
+    """Thời gian load_data và tra cứu theo ID với chỉ mục khóa chính"""
+    rng = random.Random(7)
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "employees_data.txt")
+            ids = write_synthetic_file(path, rows)
+
+            system, load_s = timed(quiet_system, path)
+
+            probes = [rng.choice(ids) for _ in range(args.lookups)]
+            _, lookup_s = timed(lambda: [system.find_employee_by_id(i) for i in probes])
+
+            # Tra cứu tuyến tính như trước khi có chỉ mục (chỉ lấy mẫu nhỏ)
+            sample = probes[:args.linear_lookups]
+            employees = list(system.employees)
+            _, linear_s = timed(lambda: [
+                next((e for e in employees if e.employee_id == i), None) for i in sample
+            ])
+
+            print(f"{rows:>10,} bản ghi | load_data: {load_s:8.3f}s | "
+                  f"tra cứu ID: {lookup_s / len(probes) * 1e6:8.3f} µs/lần | "
+                  f"quét tuyến tính: {linear_s / max(1, len(sample)) * 1e6:12.1f} µs/lần")
+
+
+def legacy_load(path):
+    """Cách đọc cũ: readlines() rồi tách mỗi dòng hai lần (dùng để so sánh)"""
+    classes = {"FullTime": ems.FullTimeEmployee, "PartTime": ems.PartTimeEmployee,
+               "Manager": ems.ManagerEmployee}
+    employees = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    for line in lines:
+        line = line.strip()
+        parts = line.split('|')
+        cls = classes.get(parts[0])
+        emp = cls.from_txt_format(line) if cls else None
+        if emp and emp.employee_id not in employees:
+            employees[emp.employee_id] = emp
+    return employees
+
+
+def streaming_load(path):
+    """Cách đọc mới của hệ thống: generator từng dòng, tách một lần"""
+    return quiet_system(path)
+
+
+def measure_memory(func, path):
+    """Trả về (bộ nhớ đỉnh, bộ nhớ còn giữ sau khi đọc) theo tracemalloc, đơn vị byte"""
+    tracemalloc.start()
+    result = func(path)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak, current
+
+
+def bench_load(args):
+    """Thời gian và bộ nhớ đỉnh khi đọc file lớn: cách đọc cũ so với đọc theo luồng"""
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "employees_data.txt")
+            write_synthetic_file(path, rows)
+            size_mb = os.path.getsize(path) / 2**20
+            print(f"{rows:,} dòng ({size_mb:.1f} MB)")
+            for label, func in (("readlines + tách 2 lần", legacy_load),
+                                ("generator + tách 1 lần", streaming_load)):
+                result, wall = timed(func, path)
+                del result
+                peak, retained = measure_memory(func, path)
+                print(f"  {label:<24} | {wall:7.2f}s | đỉnh {peak / 2**20:8.1f} MB | "
+                      f"giữ lại {retained / 2**20:8.1f} MB | tạm thời {(peak - retained) / 2**20:7.1f} MB")
+
+
+def bench_storage(args):
+    """So sánh kích thước file và thời gian đọc/ghi giữa định dạng text và nhị phân"""
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            text_path = os.path.join(tmp, "employees_data.txt")
+            write_synthetic_file(text_path, rows)
+            print(f"{rows:,} nhân viên")
+            for path in (text_path, os.path.join(tmp, "employees_data.bin")):
+                if path != text_path:
+                    ems.convert_data_file(text_path, path)
+                system, load_s = timed(quiet_system, path)
+                _, save_s = timed(system.save_data)
+                size_mb = os.path.getsize(path) / 2**20
+                print(f"  {os.path.basename(path):<20} | {size_mb:7.1f} MB | "
+                      f"load_data {load_s:6.2f}s | save_data {save_s:6.2f}s")
+
+
+def bench_sqlite(args):
+    """Thời gian mở, tra cứu, thống kê và ghi một thay đổi: bộ nhớ (text) so với SQLite"""
+    rng = random.Random(11)
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            text_path = os.path.join(tmp, "employees_data.txt")
+            db_path = os.path.join(tmp, "employees_data.db")
+            ids = write_synthetic_file(text_path, rows)
+            ems.convert_data_file(text_path, db_path)
+            probes = [rng.choice(ids) for _ in range(1000)]
+            print(f"{rows:,} nhân viên")
+
+            stdout = sys.stdout
+            sys.stdout = open(os.devnull, 'w')
+            try:
+                systems = (("bộ nhớ + text", ems.EmployeeManagementSystem, text_path),
+                           ("SQLite", ems.SQLiteEmployeeManagementSystem, db_path))
+                results = []
+                for label, cls, path in systems:
+                    system, open_s = timed(cls, path)
+                    _, id_s = timed(lambda: [system.find_employee_by_id(i) for i in probes])
+                    _, phone_s = timed(system.find_employee_by_phone, "0900000123")
+                    _, total_s = timed(system.calculate_total_salary_by_type, "PartTime")
+                    _, top_s = timed(system.get_top_salary_employees, 3)
+                    _, delete_s = timed(system.delete_employee, probes[0])
+                    results.append((label, open_s, id_s / len(probes), phone_s, total_s, top_s, delete_s))
+            finally:
+                sys.stdout.close()
+                sys.stdout = stdout
+
+            for label, open_s, id_s, phone_s, total_s, top_s, delete_s in results:
+                print(f"  {label:<14} | mở {open_s:6.2f}s | ID {id_s * 1e6:7.1f} µs | "
+                      f"SĐT {phone_s * 1e3:7.2f} ms | tổng theo loại {total_s * 1e3:7.2f} ms | "
+                      f"top 3 {top_s * 1e3:7.2f} ms | xóa {delete_s * 1e3:8.2f} ms")
+
+
+def bench_name(args):
+    """Tìm kiếm theo tên: chỉ mục trigram so với quét và lowercase toàn bộ danh sách"""
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "employees_data.txt")
+            write_synthetic_file(path, rows)
+            system = quiet_system(path)
+            employees = list(system.employees)
+            print(f"{rows:,} nhân viên")
+            for query in ("Nhân Viên 12345", "nhan vien 9999", "Quản Lý 77", "vien"):
+                result, index_s = timed(system.find_employee_by_name, query)
+                _, scan_s = timed(lambda: [e for e in employees if query.lower() in e.name.lower()])
+                print(f"  {query!r:<20} | {len(result):>7} kết quả | chỉ mục {index_s * 1e3:8.2f} ms | "
+                      f"quét {scan_s * 1e3:8.2f} ms")
+
+
+def bench_ranking(args):
+    """Top-N và hạng lương: bảng xếp hạng duy trì sẵn so với sắp xếp toàn bộ mỗi lần"""
+    rng = random.Random(5)
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "employees_data.txt")
+            ids = write_synthetic_file(path, rows)
+            system = quiet_system(path)
+            employees = list(system.employees)
+            _, build_s = timed(system.get_top_salary_employees, 3)
+            _, top_s = timed(system.get_top_salary_employees, 3)
+            _, sort_s = timed(lambda: sorted(((e, e.calculate_salary()) for e in employees),
+                                             key=lambda x: x[1], reverse=True)[:3])
+            probes = [rng.choice(ids) for _ in range(1000)]
+            _, rank_s = timed(lambda: [system.get_salary_rank(i) for i in probes])
+            # Cập nhật lương làm thay đổi bảng xếp hạng
+            system.save_data = lambda: True
+            updates = [(i, ems.FullTimeEmployee("tmp", "Tạm", "0900000000", "t@t", rng.randint(8, 30) * 1e6, 1))
+                       if i.startswith("FT") else
+                       (i, ems.PartTimeEmployee("tmp", "Tạm", "0900000000", "t@t", rng.randint(50, 150) * 1e3, 80.0))
+                       for i in probes]
+            _, update_s = timed(lambda: [system.update_employee(i, info) for i, info in updates])
+            print(f"{rows:>10,} | dựng lần đầu {build_s:6.2f}s | top 3 {top_s * 1e6:7.1f} µs | "
+                  f"sắp xếp toàn bộ {sort_s * 1e3:8.1f} ms | hạng {rank_s / len(probes) * 1e6:6.1f} µs | "
+                  f"cập nhật {update_s / len(updates) * 1e6:6.1f} µs")
+
+
+def bench_payroll(args):
+    """Tính lương toàn bộ: vòng lặp calculate_salary() so với PayrollEngine (NumPy / array)"""
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "employees_data.txt")
+            write_synthetic_file(path, rows)
+            system = quiet_system(path)
+            employees = list(system.employees)
+            expected, loop_s = timed(lambda: [emp.calculate_salary() for emp in employees])
+            print(f"{rows:,} nhân viên | vòng lặp calculate_salary(): {loop_s * 1e3:8.1f} ms")
+            variants = [("array", False)] + ([("NumPy", True)] if ems.np is not None else [])
+            for label, use_numpy in variants:
+                engine, gather_s = timed(ems.PayrollEngine.from_employees, employees, use_numpy)
+                salaries, compute_s = timed(engine.salaries)
+                identical = list(salaries) == expected
+                print(f"  PayrollEngine ({label:<5}) | gom cột {gather_s * 1e3:8.1f} ms | "
+                      f"tính {compute_s * 1e3:8.1f} ms | trùng khớp từng giá trị: {identical}")
+            # Nạp cột trực tiếp từ snapshot nhị phân, không qua đối tượng
+            bin_path = os.path.join(tmp, "employees_data.bin")
+            system.storage = ems.BinaryFileStorage(bin_path)
+            system.save_data()
+            engine, read_s = timed(ems.PayrollEngine.from_binary_file, bin_path)
+            salaries, compute_s = timed(engine.salaries)
+            print(f"  PayrollEngine (file .bin, {'NumPy' if engine.use_numpy else 'array'}) | "
+                  f"đọc cột {read_s * 1e3:8.1f} ms | tính {compute_s * 1e3:8.1f} ms | "
+                  f"trùng khớp từng giá trị: {list(salaries) == expected}")
+
+
+class DictRecord:
+    """Đối tượng lưu thuộc tính trong __dict__, như các lớp nhân viên trước khi dùng __slots__"""
+
+
+def slot_names(cls):
+    """Tên tất cả các slot của một lớp, kể cả các lớp cha"""
+    return [name for klass in reversed(cls.__mro__) for name in getattr(klass, '__slots__', ())]
+
+
+def dict_backed(emp):
+    """Chép một nhân viên sang đối tượng có __dict__ với cùng các thuộc tính"""
+    record = DictRecord()
+    for name in slot_names(type(emp)):
+        setattr(record, name, getattr(emp, name))
+    return record
+
+
+def build_objects(lines, convert=None):
+    """Phân tích các dòng thành danh sách đối tượng (có thể chuyển sang dạng khác)"""
+    employees = []
+    for line in lines:
+        emp = ems.parse_record(line)
+        employees.append(convert(emp) if convert else emp)
+    return employees
+
+
+def bench_memory(args):
+    """Số byte trên mỗi nhân viên theo tracemalloc: đối tượng có __dict__ so với __slots__"""
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "employees_data.txt")
+            write_synthetic_file(path, rows)
+            with open(path, encoding='utf-8') as f:
+                lines = f.read().splitlines()
+            print(f"{rows:,} nhân viên")
+            results = {}
+            for label, convert in (("__dict__", dict_backed), ("__slots__", None)):
+                tracemalloc.start()
+                employees = build_objects(lines, convert)
+                retained, _ = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                sample = employees[0]
+                instance = sys.getsizeof(sample) + (
+                    sys.getsizeof(sample.__dict__) if hasattr(sample, '__dict__') else 0)
+                results[label] = retained / rows
+                print(f"  {label:<9} | {retained / rows:7.1f} byte/nhân viên | "
+                      f"tổng {retained / 2**20:8.1f} MB | riêng đối tượng (FullTime) {instance} byte")
+                del employees, sample
+            saved = 1 - results["__slots__"] / results["__dict__"]
+            print(f"  Tiết kiệm {saved:.1%} bộ nhớ")
+
+
+def bench_table(args):
+    """Lưu theo đối tượng (dict) so với theo cột (EmployeeTable): bộ nhớ, lọc theo loại, tính lương"""
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "employees_data.txt")
+            write_synthetic_file(path, rows)
+            print(f"{rows:,} nhân viên")
+            for label, cls in (("dict đối tượng", ems.EmployeeManagementSystem),
+                               ("EmployeeTable", ems.TableEmployeeManagementSystem)):
+                tracemalloc.start()
+                system = quiet_system(path, cls)
+                retained, _ = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                system, load_s = timed(quiet_system, path, cls)
+                _, filter_s = timed(system.list_employees, "Manager")
+                _, payroll_s = timed(lambda: system.run_payroll().totals())
+                print(f"  {label:<15} | load_data {load_s:6.2f}s | bộ nhớ {retained / 2**20:7.1f} MB | "
+                      f"lọc Manager {filter_s * 1e3:7.1f} ms | tính lương toàn bộ {payroll_s * 1e3:7.1f} ms")
+                del system
+
+
+def bench_parallel(args):
+    """Đọc file text tuần tự so với song song nhiều tiến trình (phân tích + kiểm tra dữ liệu)"""
+    print(f"CPU: {os.cpu_count()}")
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "employees_data.txt")
+            write_synthetic_file(path, rows)
+            expected, serial_s = timed(lambda: [e.to_txt_format() for e in ems.TextFileStorage(path).load()])
+            print(f"{rows:,} dòng | tuần tự {serial_s:6.2f}s")
+            for workers in args.workers:
+                storage = ems.TextFileStorage(path, workers)
+                result, parallel_s = timed(lambda: [e.to_txt_format() for e in storage.load()])
+                print(f"  {workers:>2} tiến trình | {parallel_s:6.2f}s | x{serial_s / parallel_s:4.2f} | "
+                      f"giống hệt tuần tự: {result == expected}")
+
+
+def write_import_csv(path, rows, seed=3):
+    """Ghi file CSV gồm `rows` nhân viên thời vụ mới, khoảng 1% dòng có số điện thoại sai"""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(','.join(ems.IMPORT_FIELDS) + '\n')
+        for i in range(rows):
+            phone = "12345" if rng.random() < 0.01 else f"07{i:08d}"
+            f.write(f"PartTime,SV{i:08d},Thời Vụ {i},{phone},tv{i}@company.com,,,"
+                    f"{rng.randint(20, 60) * 1000},{rng.randint(10, 120)},\n")
+
+
+def bench_import(args):
+    """Nhập hàng loạt từ CSV (một batch, lưu một lần) so với thêm từng người và lưu lại mỗi lần"""
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "employees_data.txt")
+            csv_path = os.path.join(tmp, "new_staff.csv")
+            write_synthetic_file(path, args.existing)
+            write_import_csv(csv_path, rows)
+            system = quiet_system(path)
+            report = system.import_employees(csv_path, args.chunk_size)
+            print(f"{rows:,} dòng CSV, {args.existing:,} nhân viên có sẵn | {report.seconds:6.2f}s | "
+                  f"{report.rows_per_second:9,.0f} dòng/giây | đã nhập {report.imported:,} | "
+                  f"lỗi {len(report.errors):,}")
+            # Cách cũ: mỗi nhân viên một lần add_employee, mỗi lần ghi lại toàn bộ file
+            sample = [ems.PartTimeEmployee(f"X{i:08d}", f"Từng Người {i}", f"06{i:08d}", "x@company.com",
+                                           30000.0, 40.0) for i in range(args.single)]
+            _, single_s = timed(lambda: [system.add_employee(e) for e in sample])
+            print(f"  thêm từng người + save_data: {len(sample) / single_s:9,.1f} dòng/giây "
+                  f"(đo trên {len(sample)} dòng)")
+
+
+def bench_team(args):
+    """Đội nhóm: thêm/xóa thành viên và xóa nhân viên kéo theo gỡ khỏi đội (dict + chỉ mục ngược)"""
+    for size in args.team_size:
+        with tempfile.TemporaryDirectory() as tmp:
+            system = quiet_system(os.path.join(tmp, "employees_data.txt"))
+            system.save_data = lambda: True
+            with system.batch():
+                for j in range(args.managers):
+                    system.add_employee(ems.ManagerEmployee(f"MN{j:04d}", f"Quản Lý {j}", f"08{j:08d}",
+                                                            "ql@company.com", 30e6, 5))
+                for i in range(size):
+                    system.add_employee(ems.PartTimeEmployee(f"PT{i:08d}", f"Nhân Viên {i}", f"09{i:08d}",
+                                                             "nv@company.com", 50e3, 40.0))
+            ids = [f"PT{i:08d}" for i in range(size)]
+            _, add_s = timed(lambda: [system.add_team_member(f"MN{j:04d}", i)
+                                      for j in range(args.managers) for i in ids])
+            _, member_s = timed(lambda: [system.find_employee_by_id("MN0000").has_member(i) for i in ids[:1000]])
+            _, remove_s = timed(lambda: [system.remove_team_member("MN0000", i) for i in ids[::2]])
+            victims = ids[1::2][:1000]
+            _, delete_s = timed(lambda: [system.delete_employee(i) for i in victims])
+            links = args.managers * size
+            # Cách cũ: kiểm tra trùng bằng cách dựng lại danh sách ID của cả đội mỗi lần thêm
+            team = list(system.find_employee_by_id("MN0001").team)
+            _, old_s = timed(lambda: [i in [e.employee_id for e in team] for i in ids[:20]])
+            print(f"đội {size:>7,} x {args.managers} quản lý | thêm {add_s / links * 1e6:6.2f} µs/liên kết | "
+                  f"kiểm tra {member_s / 1000 * 1e6:5.2f} µs | xóa {remove_s / len(ids[::2]) * 1e6:6.2f} µs | "
+                  f"xóa NV (gỡ khỏi {args.managers} đội) {delete_s / len(victims) * 1e6:7.1f} µs | "
+                  f"kiểm tra kiểu cũ {old_s / 20 * 1e6:9.1f} µs")
+
+
+def org_walk(manager):
+    """Cách tính không lưu sẵn: duyệt cả tổ chức dưới quản lý (người thuộc nhiều đội chỉ tính một lần)"""
+    seen = {manager.employee_id: manager}
+    stack = [manager]
+    while stack:
+        for emp in stack.pop().team:
+            if emp.employee_id not in seen:
+                seen[emp.employee_id] = emp
+                if isinstance(emp, ems.ManagerEmployee):
+                    stack.append(emp)
+    return len(seen), sum(emp.calculate_salary() for emp in seen.values())
+
+
+def bench_org(args):
+    """Tổng nhân sự/quỹ lương của tổ chức: số liệu lưu sẵn (O(1)) so với duyệt đệ quy mỗi lần"""
+    rng = random.Random(17)
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "employees_data.txt")
+            staff = write_synthetic_file(path, rows)
+            system = quiet_system(path)
+            system.save_data = lambda: True
+            # Xếp các quản lý thành cây: mỗi quản lý (trừ gốc) báo cáo cho một quản lý trước đó
+            managers = [emp.employee_id for emp in system.list_employees("Manager")]
+            _, link_s = timed(lambda: [system.add_team_member(managers[(i - 1) // args.fanout], managers[i])
+                                       for i in range(1, len(managers))])
+            root = system.find_employee_by_id(managers[0])
+            (headcount, payroll), cached_s = timed(system.get_org_stats, root.employee_id)
+            (walk_count, walk_total), walk_s = timed(org_walk, root)
+            updates = [(i, ems.FullTimeEmployee("tmp", "Tạm", "0900000000", "t@t", rng.randint(8, 30) * 1e6, 1))
+                       if i.startswith("FT") else
+                       (i, ems.PartTimeEmployee("tmp", "Tạm", "0900000000", "t@t", rng.randint(50, 150) * 1e3, 80.0))
+                       for i in rng.sample(staff, 1000)]
+            _, update_s = timed(lambda: [system.update_employee(i, info) for i, info in updates])
+            depth = len(system.get_reporting_chain(managers[-1]))
+            print(f"{rows:,} nhân viên, {len(managers):,} quản lý, sâu {depth} cấp | "
+                  f"gốc: {headcount:,} người, khớp duyệt đệ quy: "
+                  f"{headcount == walk_count and abs(payroll - walk_total) <= 1e-6 * payroll}")
+            print(f"  lưu sẵn {cached_s * 1e6:7.1f} µs | duyệt đệ quy {walk_s * 1e3:8.1f} ms | "
+                  f"nối cây {link_s / max(1, len(managers) - 1) * 1e6:6.1f} µs/quản lý | "
+                  f"cập nhật lương {update_s / len(updates) * 1e6:6.1f} µs")
+
+
+SUITE_MODES = {
+    "object": ems.EmployeeManagementSystem,
+    "table": ems.TableEmployeeManagementSystem,
+    "sqlite": ems.SQLiteEmployeeManagementSystem,
+}
+SUITE_SCHEMA = 1
+
+
+@contextmanager
+def silenced():
+    """Tạm thời bỏ các thông báo mà hệ thống in ra màn hình"""
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        yield
+
+
+def latencies(func, probes):
+    """Gọi func(probe) với từng probe, trả về thời gian của từng lần gọi (ns)"""
+    clock = time.perf_counter_ns
+    samples = []
+    for probe in probes:
+        start = clock()
+        func(probe)
+        samples.append(clock() - start)
+    return samples
+
+
+def summarize(operation, samples):
+    """Số lần gọi, tổng thời gian, trung bình và các phân vị của một thao tác"""
+    samples = sorted(samples)
+    n = len(samples)
+    if not n:
+        return {"operation": operation, "calls": 0}
+
+    def percentile(q):
+        return samples[min(n - 1, int(q * n))] / 1e3
+
+    return {"operation": operation, "calls": n, "total_ms": sum(samples) / 1e6,
+            "mean_us": sum(samples) / n / 1e3, "p50_us": percentile(0.50),
+            "p95_us": percentile(0.95), "p99_us": percentile(0.99), "max_us": samples[-1] / 1e3}
+
+
+def source_version():
+    """Commit git của mã nguồn đang đo (None nếu không phải git checkout)"""
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def suite_probes(counts, rows, n, rng):
+    """Chọn n ID nhân viên khác nhau (theo cách đánh số của generate_data) và tối đa n ID quản lý"""
+    full_time, part_time = counts["FullTime"], counts["PartTime"]
+    ids = []
+    for k in rng.sample(range(rows), min(n, rows)):
+        if k < full_time:
+            ids.append(f"FT{k:08d}")
+        elif k < full_time + part_time:
+            ids.append(f"PT{k - full_time:08d}")
+        else:
+            ids.append(f"MN{k - full_time - part_time:08d}")
+    managers = [f"MN{k:08d}" for k in rng.sample(range(counts["Manager"]), min(n, counts["Manager"]))]
+    return ids, managers
+
+
+def run_suite(system, counts, rows, args, rng):
+    """Đo lần lượt các thao tác công khai của hệ thống; trả về danh sách kết quả (mỗi thao tác một dict)"""
+    results = []
+
+    def record(operation, samples):
+        result = summarize(operation, samples)
+        results.append(result)
+        if result["calls"]:
+            print(f"  {operation:<36} | {result['calls']:>6} lần | trung bình {result['mean_us']:12.1f} µs | "
+                  f"p95 {result['p95_us']:12.1f} µs")
+
+    def measure(operation, func, probes):
+        record(operation, latencies(func, probes))
+
+    def quiet(func):
+        def call(_):
+            with silenced():
+                func()
+        return call
+
+    ids, managers = suite_probes(counts, rows, args.probes, rng)
+    employees = [system.find_employee_by_id(i) for i in ids]
+    staff = [e for e in employees if not isinstance(e, ems.ManagerEmployee)]
+    scans = range(args.repeat)
+    few = employees[:args.repeat]
+
+    # Đọc/ghi toàn bộ dữ liệu
+    measure("load_data", quiet(system.load_data), scans)
+    measure("save_data", quiet(system.save_data), scans)
+
+    # Tìm kiếm: tra cứu điểm với mọi probe, các phép có thể quét toàn bộ chỉ với --repeat probe
+    measure("find_employee_by_id", system.find_employee_by_id, ids)
+    measure("find_employee_by_id[miss]", system.find_employee_by_id, [f"XX{i}" for i in ids])
+    measure("find_employee_by_name[full]", system.find_employee_by_name, [e.name for e in employees])
+    measure("find_employee_by_name[unaccented]", system.find_employee_by_name,
+            [ems.fold_text(e.name) for e in employees])
+    measure("find_employee_by_name[family]", system.find_employee_by_name, [e.name.split()[0] for e in few])
+    measure("find_employee_by_phone[exact]", lambda p: system.find_employee_by_phone(p, "exact"),
+            [e.phone for e in employees])
+    measure("find_employee_by_phone[prefix]", lambda p: system.find_employee_by_phone(p, "prefix"),
+            [e.phone[:7] for e in employees])
+    measure("find_employee_by_phone[substring]", lambda p: system.find_employee_by_phone(p, "substring"),
+            [e.phone[3:9] for e in few])
+
+    # Thống kê
+    measure("calculate_total_salary", lambda _: system.calculate_total_salary(), scans)
+    measure("calculate_total_salary_by_type", system.calculate_total_salary_by_type,
+            [kind for _ in scans for kind in ems.TYPE_NAMES])
+    measure("list_employees[Manager]", lambda _: system.list_employees("Manager"), scans)
+    measure("run_payroll", lambda _: system.run_payroll().totals(), scans)
+    measure("get_top_salary_employees[first]", lambda _: system.get_top_salary_employees(10), range(1))
+    measure("get_top_salary_employees", lambda _: system.get_top_salary_employees(10), ids)
+    measure("get_bottom_salary_employees", lambda _: system.get_bottom_salary_employees(10), ids)
+    measure("get_salary_rank", system.get_salary_rank, [e.employee_id for e in few])
+    measure("get_salary_rank[by_type]", lambda i: system.get_salary_rank(i, True), [e.employee_id for e in few])
+
+    # Đội nhóm (chỉ đọc)
+    measure("get_managers_of", system.get_managers_of, [e.employee_id for e in staff])
+    measure("get_org_stats", system.get_org_stats, managers)
+    measure("get_org_stats[root]", system.get_org_stats, ["MN00000000"] * args.repeat if managers else [])
+    measure("get_reporting_chain", system.get_reporting_chain, managers)
+
+    # Thay đổi dữ liệu: đo trong một batch (chỉ phần bộ nhớ/chỉ mục), thời gian lưu xuống đĩa đo riêng
+    pairs = [(managers[k % len(managers)], e.employee_id) for k, e in enumerate(staff)] if managers else []
+    hires = [ems.PartTimeEmployee(f"BM{k:08d}", e.name, e.phone, e.email, 50000.0, 40.0)
+             for k, e in enumerate(employees)]
+    updates = [(e.employee_id, ems.FullTimeEmployee(e.employee_id, e.name, e.phone, e.email,
+                                                    rng.randrange(80, 400) * 1e5, 5))
+               if isinstance(e, ems.FullTimeEmployee) else
+               (e.employee_id, ems.PartTimeEmployee(e.employee_id, e.name, e.phone, e.email,
+                                                    rng.randrange(25, 151) * 1e3, 80.0))
+               for e in staff]
+    with ExitStack() as stack:
+        # Lỗi giữa chừng vẫn thoát batch qua ExitStack (hủy batch); batch_commit đo lần đóng bình thường
+        with silenced():
+            stack.enter_context(system.batch())
+        measure("add_team_member", lambda pair: system.add_team_member(*pair), pairs)
+        measure("remove_team_member", lambda pair: system.remove_team_member(*pair), pairs)
+        measure("add_employee", system.add_employee, hires)
+        measure("update_employee", lambda update: system.update_employee(*update), updates)
+        measure("delete_employee", system.delete_employee, [e.employee_id for e in hires])
+        measure("batch_commit", quiet(stack.close), range(1))
+    return results
+
+
+def bench_suite(args):
+    """Bộ đo chuẩn trên dữ liệu của generate_data: đọc/ghi, tìm kiếm, thống kê, đội nhóm; ghi kết quả JSON"""
+    report = {
+        "schema": SUITE_SCHEMA,
+        "version": source_version(),
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": {"python": platform.python_version(), "implementation": platform.python_implementation(),
+                        "platform": platform.platform(), "cpu_count": os.cpu_count(),
+                        "numpy": getattr(ems.np, "__version__", None)},
+        "params": {"mix": args.mix, "seed": args.seed, "fanout": args.fanout,
+                   "probes": args.probes, "repeat": args.repeat},
+        "runs": [],
+    }
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            text_path = os.path.join(tmp, "employees_data.txt")
+            counts, generate_s = timed(generate_data.write_dataset, text_path, rows,
+                                       tuple(args.mix), args.seed, args.fanout)
+            print(f"{rows:,} nhân viên ({os.path.getsize(text_path) / 2**20:.1f} MB, sinh trong {generate_s:.1f}s)")
+            for mode in args.modes:
+                path = text_path
+                if mode == "sqlite":
+                    path = os.path.join(tmp, "employees_data.db")
+                    ems.convert_data_file(text_path, path)
+                print(f" [{mode}]")
+                with silenced():
+                    system, open_s = timed(SUITE_MODES[mode], path)
+                results = [summarize("open", [int(open_s * 1e9)])]
+                results += run_suite(system, counts, rows, args, random.Random(args.seed))
+                report["runs"].append({"mode": mode, "rows": rows, "dataset": counts,
+                                       "file_bytes": os.path.getsize(path), "results": results})
+                if mode == "sqlite":
+                    system.storage.close()
+                del system
+                # Ghi sau mỗi lượt để vẫn giữ được kết quả nếu lượt lớn sau đó bị dừng giữa chừng
+                with open(args.output, 'w', encoding='utf-8') as f:
+                    json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"✅ Đã ghi kết quả vào {args.output}")
+
+
+def check_invariants(system):
+    """Kiểm tra các chỉ mục và số liệu lưu sẵn khớp với dữ liệu; trả về danh sách lỗi (rỗng nếu khớp)"""
+    problems = []
+    employees = list(system.employees)
+    salaries = {e.employee_id: e.calculate_salary() for e in employees}
+    total = math.fsum(salaries.values())
+    if abs(system.calculate_total_salary() - total) > 1e-6 * max(1.0, total):
+        problems.append(f"tổng lương {system.calculate_total_salary():,.0f} khác tổng thực {total:,.0f}")
+    for emp in employees:
+        if emp.employee_id not in system.phone_index.exact(emp.phone):
+            problems.append(f"chỉ mục SĐT thiếu {emp.employee_id}")
+            break
+    memberships = {}
+    for emp in employees:
+        if isinstance(emp, ems.ManagerEmployee):
+            for member_id in emp.members:
+                memberships.setdefault(member_id, set()).add(emp.employee_id)
+    actual = {emp_id: set(managers) for emp_id, managers in system._memberships.items()}
+    if memberships != actual:
+        problems.append("chỉ mục ngược đội nhóm không khớp với các đội")
+    for emp in employees:
+        if isinstance(emp, ems.ManagerEmployee) and not system.get_reporting_chain(emp.employee_id):
+            headcount, payroll = system.get_org_stats(emp.employee_id)
+            walk_count, walk_total = org_walk(emp)
+            if headcount != walk_count or abs(payroll - walk_total) > 1e-6 * max(1.0, walk_total):
+                problems.append(f"số liệu tổ chức của {emp.employee_id} không khớp")
+    if system.ranking.built and len(system.ranking._lists[None]) != len(employees):
+        problems.append("bảng xếp hạng lương không khớp số nhân viên")
+    return problems
+
+
+def stress_worker(system, stable, managers, args, seed, deadline, stats):
+    """Một luồng của bài kiểm tra tải: xen kẽ đọc và ghi đến hết giờ, ghi lại số thao tác và lỗi"""
+    rng = random.Random(seed)
+    reads = writes = 0
+    errors = stats["errors"]
+    tag = f"T{seed}"
+    serial = 0
+    while time.perf_counter() < deadline:
+        try:
+            if rng.random() < args.write_ratio:
+                kind = rng.randrange(3)
+                if kind == 0:
+                    emp = system.find_employee_by_id(rng.choice(stable))
+                    info = (ems.FullTimeEmployee(emp.employee_id, emp.name, emp.phone, emp.email,
+                                                 rng.randrange(80, 400) * 1e5, 5)
+                            if isinstance(emp, ems.FullTimeEmployee) else
+                            ems.PartTimeEmployee(emp.employee_id, emp.name, emp.phone, emp.email,
+                                                 rng.randrange(25, 151) * 1e3, 80.0))
+                    system.update_employee(emp.employee_id, info)
+                elif kind == 1:
+                    emp_id = f"{tag}-{serial}"
+                    serial += 1
+                    system.add_employee(ems.PartTimeEmployee(emp_id, "Nhân Viên Tạm", "0912345678",
+                                                             "tam@congty.vn", 30000.0, 10.0))
+                    if managers:
+                        system.add_team_member(rng.choice(managers), emp_id)
+                    system.delete_employee(emp_id)
+                else:
+                    pair = (rng.choice(managers), rng.choice(stable)) if managers else None
+                    if pair and system.add_team_member(*pair):
+                        system.remove_team_member(*pair)
+                writes += 1
+            else:
+                kind = rng.randrange(6)
+                emp_id = rng.choice(stable)
+                emp = system.find_employee_by_id(emp_id)
+                if emp is None:
+                    errors.append(f"không tìm thấy {emp_id} (không bao giờ bị xóa)")
+                elif kind == 1:
+                    if emp not in system.find_employee_by_name(emp.name):
+                        errors.append(f"tìm theo tên không thấy {emp_id}")
+                elif kind == 2:
+                    if emp not in system.find_employee_by_phone(emp.phone[:6], "prefix"):
+                        errors.append(f"tìm theo tiền tố SĐT không thấy {emp_id}")
+                elif kind == 3:
+                    system.get_top_salary_employees(10)
+                elif kind == 4:
+                    system.get_salary_rank(emp_id)
+                else:
+                    if managers:
+                        system.get_org_stats(rng.choice(managers))
+                reads += 1
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+    with stats["lock"]:
+        stats["reads"] += reads
+        stats["writes"] += writes
+
+
+def bench_concurrency(args):
+    """Chế độ đồng thời (khóa đọc/ghi): đọc/ghi xen kẽ nhiều luồng, kiểm tra bất biến, thông lượng theo số luồng"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source.txt")
+        counts = generate_data.write_dataset(source, args.rows, seed=args.seed)
+        print(f"{args.rows:,} nhân viên | tỉ lệ ghi {args.write_ratio:.0%} | {args.seconds}s mỗi lượt | "
+              f"CPU: {os.cpu_count()}")
+        baseline = None
+        for threads in args.threads:
+            path = os.path.join(tmp, f"employees_{threads}.txt")
+            with open(source, 'rb') as src, open(path, 'wb') as dst:
+                dst.write(src.read())
+            with silenced():
+                system = ems.EmployeeManagementSystem(path, concurrent=True, write_delay=args.write_delay)
+            stable, _ = suite_probes(counts, args.rows, min(args.rows, 10000), random.Random(args.seed))
+            stable = [i for i in stable if not i.startswith("MN")]
+            managers = [e.employee_id for e in system.list_employees("Manager")]
+            stats = {"reads": 0, "writes": 0, "errors": [], "lock": threading.Lock()}
+            deadline = time.perf_counter() + args.seconds
+            workers = [threading.Thread(target=stress_worker,
+                                        args=(system, stable, managers, args, k, deadline, stats))
+                       for k in range(threads)]
+            start = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - start
+            writer = system.writer
+            with silenced():
+                flushed = system.close()
+                reloaded = ems.EmployeeManagementSystem(path)
+            problems = stats["errors"] + check_invariants(system)
+            if sorted(e.to_txt_format() for e in reloaded.employees) != \
+                    sorted(e.to_txt_format() for e in system.employees):
+                problems.append("file sau khi ghi khác dữ liệu trong bộ nhớ")
+            ops = (stats["reads"] + stats["writes"]) / elapsed
+            baseline = baseline or ops
+            print(f"  {threads:>2} luồng | {ops:10,.0f} thao tác/giây (x{ops / baseline:4.2f}) | "
+                  f"đọc {stats['reads'] / elapsed:10,.0f}/s | ghi {stats['writes'] / elapsed:8,.0f}/s | "
+                  f"ghi file {writer.writes if writer else '-'} lần | flush {flushed} | "
+                  f"vi phạm bất biến: {len(problems)}")
+            for problem in problems[:5]:
+                print(f"     ❌ {problem}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("index", help=bench_index.__doc__)
+    p.add_argument("--rows", type=int, nargs="+", default=[100000, 1000000])
+    p.add_argument("--lookups", type=int, default=100000)
+    p.add_argument("--linear-lookups", type=int, default=20)
+    p.set_defaults(func=bench_index)
+
+    p = sub.add_parser("load", help=bench_load.__doc__)
+    p.add_argument("--rows", type=int, nargs="+", default=[2000000])
+    p.set_defaults(func=bench_load)
+
+    p = sub.add_parser("storage", help=bench_storage.__doc__)
+    p.add_argument("--rows", type=int, nargs="+", default=[200000])
+    p.set_defaults(func=bench_storage)
+
+    p = sub.add_parser("sqlite", help=bench_sqlite.__doc__)
+    p.add_argument("--rows", type=int, nargs="+", default=[200000])
+    p.set_defaults(func=bench_sqlite)
+
+    p = sub.add_parser("name", help=bench_name.__doc__)
+    p.add_argument("--rows", type=int, nargs="+", default=[200000])
+    p.set_defaults(func=bench_name)
+
+    p = sub.add_parser("ranking", help=bench_ranking.__doc__)
+    p.add_argument("--rows", type=int, nargs="+", default=[1000000])
+    p.set_defaults(func=bench_ranking)
+
+    p = sub.add_parser("payroll", help=bench_payroll.__doc__)
+    p.add_argument("--rows", type=int, nargs="+", default=[1000000])
+    p.set_defaults(func=bench_payroll)
+
+    p = sub.add_parser("memory", help=bench_memory.__doc__)
+    p.add_argument("--rows", type=int, nargs="+", default=[1000000])
+    p.set_defaults(func=bench_memory)
+
+    p = sub.add_parser("table", help=bench_table.__doc__)
+    p.add_argument("--rows", type=int, nargs="+", default=[1000000])
+    p.set_defaults(func=bench_table)
+
+    p = sub.add_parser("parallel", help=bench_parallel.__doc__)
+    p.add_argument("--rows", type=int, nargs="+", default=[1000000])
+    p.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    p.set_defaults(func=bench_parallel)
+
+    p = sub.add_parser("import", help=bench_import.__doc__)
+    p.add_argument("--rows", type=int, nargs="+", default=[100000])
+    p.add_argument("--existing", type=int, default=100000)
+    p.add_argument("--chunk-size", type=int, default=1000)
+    p.add_argument("--single", type=int, default=20)
+    p.set_defaults(func=bench_import)
+
+    p = sub.add_parser("team", help=bench_team.__doc__)
+    p.add_argument("--team-size", type=int, nargs="+", default=[1000, 10000, 50000])
+    p.add_argument("--managers", type=int, default=5)
+    p.set_defaults(func=bench_team)
+
+    p = sub.add_parser("org", help=bench_org.__doc__)
+    p.add_argument("--rows", type=int, nargs="+", default=[200000])
+    p.add_argument("--fanout", type=int, default=4)
+    p.set_defaults(func=bench_org)
+
+    p = sub.add_parser("suite", help=bench_suite.__doc__)
+    p.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    p.add_argument("--modes", nargs="+", choices=list(SUITE_MODES), default=["object", "table", "sqlite"])
+    p.add_argument("--mix", type=float, nargs=3, default=list(generate_data.DEFAULT_MIX),
+                   metavar=("FULLTIME", "PARTTIME", "MANAGER"))
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--fanout", type=int, default=8)
+    p.add_argument("--probes", type=int, default=1000)
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--output", default="benchmark_results.json")
+    p.set_defaults(func=bench_suite)
+
+    p = sub.add_parser("concurrency", help=bench_concurrency.__doc__)
+    p.add_argument("--rows", type=int, default=100000)
+    p.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    p.add_argument("--seconds", type=float, default=3.0)
+    p.add_argument("--write-ratio", type=float, default=0.1)
+    p.add_argument("--write-delay", type=float, default=0.2)
+    p.add_argument("--seed", type=int, default=42)
+    p.set_defaults(func=bench_concurrency)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
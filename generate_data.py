@@ -0,0 +1,206 @@
+"""
+Sinh dữ liệu nhân viên tổng hợp, tất định theo seed (cùng tham số -> cùng file, từng byte).
+
+Cách dùng:
+    python generate_data.py employees_data.txt --rows 10000
+    python generate_data.py big.txt --rows 10000000 --mix 60 35 5 --seed 7 --fanout 8
+
+- Tỉ lệ FullTime/PartTime/Manager điều chỉnh bằng --mix (trọng số, không cần cộng đủ 100)
+- Họ tên tiếng Việt theo phân bố họ phổ biến, tên đệm và tên theo giới tính
+- Số điện thoại di động 10 chữ số với đầu số thật, không trùng nhau
+- Mỗi nhân viên thuộc đội của đúng một quản lý; quản lý xếp thành cây --fanout nhánh (0: không lồng)
+- Ghi theo luồng nên sinh được hàng chục triệu dòng mà không giữ dữ liệu trong bộ nhớ
+"""
+from itertools import accumulate
+import argparse
+import os
+import random
+import time
+import zlib
+
+import updated_employee_management_system as ems
+
+DEFAULT_MIX = (60, 35, 5)
+
+# Họ phổ biến và tỉ lệ xấp xỉ (%) trong dân số
+FAMILY_NAMES = (
+    ("Nguyễn", 38.0), ("Trần", 11.0), ("Lê", 9.5), ("Phạm", 7.0), ("Hoàng", 4.1), ("Huỳnh", 1.0),
+    ("Phan", 4.5), ("Vũ", 2.9), ("Võ", 1.0), ("Đặng", 2.1), ("Bùi", 2.0), ("Đỗ", 1.4),
+    ("Hồ", 1.3), ("Ngô", 1.3), ("Dương", 1.0), ("Lý", 0.5), ("Đinh", 0.6), ("Trương", 0.6),
+    ("Lâm", 0.4), ("Mai", 0.4), ("Trịnh", 0.4), ("Đào", 0.4), ("Cao", 0.3), ("Tạ", 0.2),
+)
+MALE_MIDDLE = ("Văn", "Hữu", "Đức", "Minh", "Quốc", "Thành", "Công", "Gia", "Xuân", "Quang", "Tuấn", "Duy")
+FEMALE_MIDDLE = ("Thị", "Ngọc", "Thu", "Thanh", "Mỹ", "Kim", "Hoài", "Phương", "Bảo", "Khánh", "Diệu", "Minh")
+MALE_GIVEN = ("An", "Bình", "Cường", "Dũng", "Đạt", "Hải", "Hiếu", "Hoàng", "Hùng", "Huy", "Khang", "Khoa",
+              "Kiên", "Long", "Lộc", "Minh", "Nam", "Nghĩa", "Phong", "Phúc", "Quân", "Quang", "Sơn", "Tài",
+              "Thắng", "Thành", "Thịnh", "Toàn", "Trung", "Tuấn", "Việt", "Vinh")
+FEMALE_GIVEN = ("Anh", "Chi", "Dung", "Duyên", "Giang", "Hà", "Hạnh", "Hằng", "Hoa", "Hương", "Huyền", "Lan",
+                "Linh", "Ly", "Mai", "My", "Nga", "Ngân", "Nhung", "Oanh", "Phương", "Quỳnh", "Tâm", "Thảo",
+                "Thủy", "Trang", "Trâm", "Tuyết", "Uyên", "Vân", "Vy", "Yến")
+
+# Đầu số di động 10 chữ số (Viettel, MobiFone, VinaPhone, Vietnamobile, Gmobile)
+PHONE_PREFIXES = ("032", "033", "034", "035", "036", "037", "038", "039", "086", "096", "097", "098",
+                  "070", "076", "077", "078", "079", "089", "090", "093",
+                  "081", "082", "083", "084", "085", "088", "091", "094",
+                  "052", "056", "058", "092", "059", "099")
+_PHONE_SPACE = len(PHONE_PREFIXES) * 10**7
+# Hệ số nhân nguyên tố cùng nhau với _PHONE_SPACE: i -> số điện thoại là song ánh, không bao giờ trùng
+_PHONE_STEP = 2654435761
+
+
+def phone_number(index, offset=0):
+    """Số điện thoại thứ `index`: rải đều trên các đầu số, khác nhau với mọi index < 340 triệu"""
+    n = (index * _PHONE_STEP + offset) % _PHONE_SPACE
+    return f"{PHONE_PREFIXES[n // 10**7]}{n % 10**7:07d}"
+
+
+class NameGenerator:
+    """Sinh họ tên tiếng Việt (họ theo tỉ lệ phổ biến, tên đệm và tên theo giới tính) kèm email"""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.families = [name for name, _ in FAMILY_NAMES]
+        self.cum_weights = list(accumulate(weight for _, weight in FAMILY_NAMES))
+        self._folded = {}
+
+    def fold(self, word):
+        """Bỏ dấu một từ (có bộ nhớ đệm vì số từ khác nhau rất ít)"""
+        folded = self._folded.get(word)
+        if folded is None:
+            folded = self._folded[word] = ems.fold_text(word)
+        return folded
+
+    def next(self):
+        """Trả về (họ tên, phần đầu email dạng tên + chữ cái đầu họ và tên đệm, ví dụ "annv")"""
+        rng = self.rng
+        family = rng.choices(self.families, cum_weights=self.cum_weights)[0]
+        if rng.random() < 0.5:
+            middle, given = rng.choice(MALE_MIDDLE), rng.choice(MALE_GIVEN)
+        else:
+            middle, given = rng.choice(FEMALE_MIDDLE), rng.choice(FEMALE_GIVEN)
+        login = self.fold(given) + self.fold(family)[0] + self.fold(middle)[0]
+        return f"{family} {middle} {given}", login
+
+
+def split_mix(rows, mix):
+    """Chia `rows` theo trọng số (FullTime, PartTime, Manager): trả về (số quản lý, tỉ lệ FullTime trong nhân viên)"""
+    full_time, part_time, managers = mix
+    total = full_time + part_time + managers
+    if min(mix) < 0 or total <= 0:
+        raise ValueError(f"Tỉ lệ không hợp lệ: {mix}")
+    n_managers = round(rows * managers / total)
+    if managers and rows and not n_managers:
+        n_managers = 1
+    if not full_time + part_time:
+        return rows, 0.0
+    return n_managers, full_time / (full_time + part_time)
+
+
+def iter_dataset(rows, mix=DEFAULT_MIX, seed=42, fanout=8):
+    """
+    Sinh lần lượt các dòng của file dữ liệu (định dạng text của hệ thống).
+    Nhân viên được chia thành các khối liên tiếp, mỗi khối là đội của một quản lý và được ghi
+    ngay trước dòng của quản lý đó; quản lý j (j > 0) nằm trong đội của quản lý (j - 1) // fanout.
+    """
+    rng = random.Random(seed)
+    names = NameGenerator(rng)
+    phone_offset = rng.randrange(_PHONE_SPACE)
+    n_managers, full_time_share = split_mix(rows, mix)
+    n_staff = rows - n_managers
+    counters = {"FT": 0, "PT": 0}
+    index = 0
+
+    def staff_line():
+        nonlocal index
+        name, login = names.next()
+        phone = phone_number(index, phone_offset)
+        index += 1
+        if rng.random() < full_time_share:
+            emp_id = f"FT{counters['FT']:08d}"
+            counters['FT'] += 1
+            fields = f"FullTime|{emp_id}|{name}|{phone}|{login}{index}@congty.vn|" \
+                     f"{rng.randrange(80, 400) * 100000}.0|{rng.randint(0, 30)}"
+        else:
+            emp_id = f"PT{counters['PT']:08d}"
+            counters['PT'] += 1
+            fields = f"PartTime|{emp_id}|{name}|{phone}|{login}{index}@congty.vn|" \
+                     f"{rng.randrange(25, 151) * 1000}.0|{rng.randint(10, 160)}.0"
+        return emp_id, fields + "\n"
+
+    for j in range(n_managers):
+        team = []
+        for _ in range(j * n_staff // n_managers, (j + 1) * n_staff // n_managers):
+            emp_id, line = staff_line()
+            team.append(emp_id)
+            yield line
+        if fanout:
+            team.extend(f"MN{k:08d}" for k in range(j * fanout + 1, min(n_managers, j * fanout + fanout + 1)))
+        name, login = names.next()
+        phone = phone_number(index, phone_offset)
+        index += 1
+        yield (f"Manager|MN{j:08d}|{name}|{phone}|{login}{index}@congty.vn|"
+               f"{rng.randrange(200, 800) * 100000}.0|{rng.randint(3, 30)}|{';'.join(team)}\n")
+    if not n_managers:
+        for _ in range(n_staff):
+            yield staff_line()[1]
+
+
+def write_dataset(path, rows, mix=DEFAULT_MIX, seed=42, fanout=8, chunk=10000):
+    """
+    Ghi file dữ liệu tổng hợp, có header (số bản ghi, checksum) như snapshot do hệ thống ghi;
+    trả về số bản ghi theo loại và số liên kết đội nhóm
+    """
+    counts = {"FullTime": 0, "PartTime": 0, "Manager": 0, "team_links": 0}
+    kinds = {"F": "FullTime", "P": "PartTime", "M": "Manager"}
+    checksum = 0
+    buffer = []
+    with ems.atomic_write(path, keep_previous=False) as f:
+        def write_buffer():
+            nonlocal checksum
+            data = "".join(buffer).encode('utf-8')
+            checksum = zlib.crc32(data, checksum)
+            f.write(data)
+            buffer.clear()
+        
+        f.write(ems.snapshot_header(0, 0))
+        for line in iter_dataset(rows, mix, seed, fanout):
+            counts[kinds[line[0]]] += 1
+            if line[0] == "M":
+                team = line.rstrip("\n").rsplit("|", 1)[1]
+                counts["team_links"] += team.count(";") + 1 if team else 0
+            buffer.append(line)
+            if len(buffer) >= chunk:
+                write_buffer()
+        write_buffer()
+        f.seek(0)
+        f.write(ems.snapshot_header(sum(counts[kind] for kind in kinds.values()), checksum))
+    return counts
+
+
+def parse_args(argv=None):
+    """Đọc các tùy chọn dòng lệnh"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("output", help="File dữ liệu text sẽ được ghi đè")
+    parser.add_argument("--rows", type=int, default=10000, help="Số nhân viên (mặc định: 10000)")
+    parser.add_argument("--mix", type=float, nargs=3, default=DEFAULT_MIX,
+                        metavar=("FULLTIME", "PARTTIME", "MANAGER"),
+                        help="Trọng số từng loại nhân viên (mặc định: 60 35 5)")
+    parser.add_argument("--seed", type=int, default=42, help="Seed ngẫu nhiên (mặc định: 42)")
+    parser.add_argument("--fanout", type=int, default=8,
+                        help="Số quản lý cấp dưới trực tiếp của mỗi quản lý; 0 để không lồng đội (mặc định: 8)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    start = time.perf_counter()
+    counts = write_dataset(args.output, args.rows, tuple(args.mix), args.seed, args.fanout)
+    elapsed = time.perf_counter() - start
+    size_mb = os.path.getsize(args.output) / 2**20
+    print(f"✅ Đã ghi {args.rows:,} nhân viên vào {args.output} ({size_mb:.1f} MB, {elapsed:.1f}s): "
+          f"{counts['FullTime']:,} FullTime, {counts['PartTime']:,} PartTime, {counts['Manager']:,} Manager, "
+          f"{counts['team_links']:,} liên kết đội nhóm")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Tạo tải cho dịch vụ server.py: nhiều kết nối, mỗi kết nối pipelining tối đa --depth yêu cầu chưa có
+câu trả lời; báo cáo số yêu cầu mỗi giây và độ trễ p50/p95/p99 (tổng và theo từng thao tác).
+
+Cách dùng:
+    python loadgen.py --port 8765 --connections 4 --depth 16 --seconds 10
+    python loadgen.py --unix /tmp/employees.sock --mix get=70 search_name=10 stats=5 update=15 --json out.json
+"""
+from collections import deque
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import time
+
+DEFAULT_MIX = ("get=60", "search_name=10", "search_phone=5", "stats=5", "top=5", "rank=5", "update=10")
+
+
+def request_builders(staff, managers):
+    """Hàm tạo yêu cầu cho từng thao tác, dựa trên mẫu nhân viên lấy từ dịch vụ"""
+
+    def pick(rng):
+        return rng.choice(staff)
+
+    def update(rng):
+        emp = pick(rng)
+        if emp["type"] == "PartTime":
+            fields = {"working_hours": rng.randint(10, 160)}
+        else:
+            fields = {"base_salary": rng.randrange(80, 400) * 100000}
+        return {"op": "update", "employee_id": emp["employee_id"], "employee": fields}
+
+    return {
+        "ping": lambda rng: {"op": "ping"},
+        "get": lambda rng: {"op": "get", "employee_id": pick(rng)["employee_id"]},
+        "search_name": lambda rng: {"op": "search_name", "name": pick(rng)["name"], "limit": 20},
+        "search_phone": lambda rng: {"op": "search_phone", "phone": pick(rng)["phone"][:7], "limit": 20},
+        "stats": lambda rng: {"op": "stats"},
+        "top": lambda rng: {"op": "top", "n": 10},
+        "rank": lambda rng: {"op": "rank", "employee_id": pick(rng)["employee_id"]},
+        "org_stats": lambda rng: {"op": "org_stats", "manager_id": rng.choice(managers)["employee_id"]},
+        "update": update,
+    }
+
+
+def parse_mix(items):
+    """["get=70", "stats=5"] -> {"get": 70.0, "stats": 5.0}"""
+    mix = {}
+    for item in items:
+        op, _, weight = item.partition("=")
+        mix[op] = float(weight or 1)
+    return mix
+
+
+async def open_connection(args):
+    if args.unix:
+        return await asyncio.open_unix_connection(args.unix, limit=1 << 24)
+    return await asyncio.open_connection(args.host, args.port, limit=1 << 24)
+
+
+async def call(reader, writer, request):
+    """Gửi một yêu cầu và chờ câu trả lời (dùng lúc chuẩn bị, không đo)"""
+    writer.write(json.dumps(request).encode('utf-8') + b"\n")
+    response = json.loads(await reader.readline())
+    if not response.get("ok"):
+        raise RuntimeError(f"Yêu cầu {request['op']} lỗi: {response.get('error')}")
+    return response["result"]
+
+
+async def run_connection(args, builders, mix, seed, deadline, results):
+    """Một kết nối: một tác vụ gửi (giữ tối đa depth yêu cầu đang chờ) và một tác vụ nhận"""
+    rng = random.Random(seed)
+    reader, writer = await open_connection(args)
+    ops, weights = list(mix), list(mix.values())
+    in_flight = deque()   # (thao tác, thời điểm gửi) theo đúng thứ tự gửi
+    window = asyncio.Semaphore(args.depth)
+    finished = asyncio.Event()
+
+    async def send():
+        next_id = 0
+        while time.perf_counter() < deadline:
+            await window.acquire()
+            op = rng.choices(ops, weights)[0]
+            request = builders[op](rng)
+            request["id"] = next_id
+            next_id += 1
+            in_flight.append((op, time.perf_counter()))
+            writer.write(json.dumps(request, ensure_ascii=False).encode('utf-8') + b"\n")
+            if writer.transport.get_write_buffer_size() > 1 << 16:
+                await writer.drain()
+
+    async def receive():
+        while in_flight or not finished.is_set():
+            line = await reader.readline()
+            if not line:
+                break
+            op, sent_at = in_flight.popleft()
+            latency = time.perf_counter() - sent_at
+            window.release()
+            results.setdefault(op, []).append(latency)
+            if not json.loads(line).get("ok"):
+                results["errors"] = results.get("errors", 0) + 1
+
+    receiver = asyncio.create_task(receive())
+    await send()
+    finished.set()
+    if not in_flight:
+        receiver.cancel()
+    try:
+        await receiver
+    except asyncio.CancelledError:
+        pass
+    writer.close()
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def summarize(latencies):
+    values = sorted(latencies)
+    return {"requests": len(values),
+            "p50_ms": percentile(values, 0.50) * 1e3, "p95_ms": percentile(values, 0.95) * 1e3,
+            "p99_ms": percentile(values, 0.99) * 1e3, "max_ms": (values[-1] if values else 0.0) * 1e3}
+
+
+async def run(args):
+    mix = parse_mix(args.mix)
+    reader, writer = await open_connection(args)
+    staff = await call(reader, writer, {"op": "list", "limit": args.sample})
+    managers = await call(reader, writer, {"op": "list", "type": "Manager", "limit": args.sample})
+    writer.close()
+    staff = [row for row in staff if row["type"] != "Manager"] or staff
+    if not staff:
+        raise RuntimeError("Dịch vụ không có nhân viên nào để tạo tải.")
+    builders = request_builders(staff, managers or staff)
+    unknown = set(mix) - set(builders)
+    if unknown or (not managers and "org_stats" in mix):
+        raise SystemExit(f"❌ Thao tác không hỗ trợ trong --mix: {', '.join(sorted(unknown)) or 'org_stats'}")
+
+    results = {}
+    start = time.perf_counter()
+    deadline = start + args.seconds
+    await asyncio.gather(*(run_connection(args, builders, mix, args.seed + k, deadline, results)
+                           for k in range(args.connections)))
+    elapsed = time.perf_counter() - start
+    errors = results.pop("errors", 0)
+    every = [latency for latencies in results.values() for latency in latencies]
+    return {
+        "environment": {"python": platform.python_version(), "cpu_count": os.cpu_count()},
+        "params": {"connections": args.connections, "depth": args.depth, "seconds": args.seconds, "mix": mix},
+        "seconds": elapsed,
+        "rps": len(every) / elapsed,
+        "errors": errors,
+        "overall": summarize(every),
+        "operations": {op: summarize(latencies) for op, latencies in sorted(results.items())},
+    }
+
+
+def parse_args(argv=None):
+    """Đọc các tùy chọn dòng lệnh"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", metavar="PATH", help="Kết nối qua Unix socket thay vì TCP")
+    parser.add_argument("--connections", type=int, default=4, help="Số kết nối đồng thời (mặc định: 4)")
+    parser.add_argument("--depth", type=int, default=16,
+                        help="Số yêu cầu tối đa đang chờ trả lời trên mỗi kết nối (mặc định: 16)")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Thời gian tạo tải (mặc định: 10)")
+    parser.add_argument("--mix", nargs="+", default=list(DEFAULT_MIX), metavar="THAO_TAC=TRONG_SO",
+                        help="Tỉ lệ các thao tác, ví dụ get=70 update=30")
+    parser.add_argument("--sample", type=int, default=2000, help="Số nhân viên mẫu lấy từ dịch vụ")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", metavar="FILE", help="Ghi kết quả dạng JSON ra FILE")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    overall = report["overall"]
+    print(f"{overall['requests']:,} yêu cầu trong {report['seconds']:.1f}s | {report['rps']:,.0f} yêu cầu/giây | "
+          f"lỗi {report['errors']} | p50 {overall['p50_ms']:.2f} ms | p95 {overall['p95_ms']:.2f} ms | "
+          f"p99 {overall['p99_ms']:.2f} ms | max {overall['max_ms']:.2f} ms")
+    for op, stats in report["operations"].items():
+        print(f"  {op:<14} | {stats['requests']:>8,} | p50 {stats['p50_ms']:7.2f} ms | "
+              f"p99 {stats['p99_ms']:7.2f} ms")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"✅ Đã ghi kết quả vào {args.json}")
+
+
+if __name__ == "__main__":
+    main()
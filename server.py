@@ -0,0 +1,291 @@
+"""
+Chạy hệ thống quản lý nhân viên như một dịch vụ: nạp dữ liệu một lần, trả lời yêu cầu JSON
+qua TCP cục bộ hoặc Unix socket (asyncio).
+
+Cách dùng:
+    python server.py --data-file employees_data.txt --port 8765
+    python server.py --data-file employees_data.txt --unix /tmp/employees.sock --write-delay 0.2
+
+Giao thức: mỗi dòng một object JSON, ví dụ
+    {"id": 1, "op": "get", "employee_id": "FT001"}
+    {"id": 2, "op": "search_name", "name": "nguyen van", "limit": 20}
+    {"id": 3, "op": "update", "employee_id": "PT001", "employee": {"working_hours": 120}}
+và nhận lại một dòng {"id": ..., "ok": true, "result": ...} hoặc {"id": ..., "ok": false, "error": "..."}.
+Client có thể gửi nhiều yêu cầu liên tiếp không cần chờ (pipelining); câu trả lời về đúng thứ tự gửi.
+Danh sách thao tác: EmployeeService.READS và WRITES (hoặc gửi {"op": "ops"}).
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+
+import updated_employee_management_system as ems
+
+# Số byte chờ gửi tối đa trước khi dừng đọc yêu cầu mới của kết nối (client đọc chậm)
+WRITE_BUFFER_LIMIT = 1 << 20
+# Số bản ghi tối đa trả về cho các thao tác danh sách khi client không chỉ định limit
+DEFAULT_LIMIT = 100
+
+
+class RequestError(Exception):
+    """Yêu cầu sai (thiếu tham số, dữ liệu không hợp lệ...): trả về lỗi cho client, không đóng kết nối"""
+
+
+def _param(request, name, default=None, required=False):
+    value = request.get(name, default)
+    if required and value is None:
+        raise RequestError(f"Thiếu tham số {name}.")
+    return value
+
+
+def _rows(employees, request):
+    """Chuyển một dãy nhân viên thành list dict, cắt theo offset/limit của yêu cầu"""
+    offset = int(_param(request, "offset", 0))
+    limit = int(_param(request, "limit", DEFAULT_LIMIT))
+    rows = []
+    for i, emp in enumerate(employees):
+        if i >= offset + limit:
+            break
+        if i >= offset:
+            rows.append(ems.employee_to_row(emp))
+    return rows
+
+
+def _get(system, request):
+    emp = system.find_employee_by_id(_param(request, "employee_id", required=True))
+    return ems.employee_to_row(emp) if emp is not None else None
+
+
+def _org_stats(system, request):
+    stats = system.get_org_stats(_param(request, "manager_id", required=True))
+    return None if stats is None else {"headcount": stats[0], "payroll": stats[1]}
+
+
+def _ranked(pairs):
+    return [dict(ems.employee_to_row(emp), salary=salary) for emp, salary in pairs]
+
+
+class EmployeeService:
+    """
+    Các thao tác của dịch vụ trên một EmployeeManagementSystem, chạy trong luồng của vòng lặp sự kiện.
+    Thao tác đọc chạy ngay. Thao tác thay đổi chạy trong khóa thay đổi của hệ thống (write_lock);
+    luồng ghi nền chỉ giữ khóa này trong từng nhóm chụp snapshot ngắn nên vòng lặp không bị chặn lâu.
+    Việc ghi file do luồng ghi nền (write_delay) đảm nhận nên vòng lặp không bao giờ tự ghi cả file.
+    """
+
+    READS = {
+        "ping": lambda system, request: "pong",
+        "get": lambda system, request: _get(system, request),
+        "search_name": lambda system, request: _rows(
+            system.find_employee_by_name(_param(request, "name", required=True)), request),
+        "search_phone": lambda system, request: _rows(
+            system.find_employee_by_phone(_param(request, "phone", required=True),
+                                          _param(request, "match", "auto")), request),
+        "list": lambda system, request: _rows(system.iter_employees(_param(request, "type")), request),
+        "stats": lambda system, request: {
+            "total": system.calculate_total_salary(),
+            "by_type": {kind: system.calculate_total_salary_by_type(kind) for kind in ems.TYPE_NAMES},
+        },
+        "top": lambda system, request: _ranked(
+            system.get_top_salary_employees(int(_param(request, "n", 3)), _param(request, "type"))),
+        "bottom": lambda system, request: _ranked(
+            system.get_bottom_salary_employees(int(_param(request, "n", 3)), _param(request, "type"))),
+        "rank": lambda system, request: system.get_salary_rank(
+            _param(request, "employee_id", required=True), bool(_param(request, "by_type", False))),
+        "managers_of": lambda system, request: [
+            emp.employee_id for emp in system.get_managers_of(_param(request, "employee_id", required=True))],
+        "org_stats": lambda system, request: _org_stats(system, request),
+        "chain": lambda system, request: [
+            emp.employee_id for emp in system.get_reporting_chain(_param(request, "manager_id", required=True))],
+        "metrics": lambda system, request: system.metrics.snapshot() if system.metrics is not None else None,
+    }
+    WRITES = ("add", "update", "delete", "team_add", "team_remove")
+
+    def __init__(self, system):
+        self.system = system
+        self.requests = 0
+
+    @property
+    def operations(self):
+        return sorted([*self.READS, *self.WRITES, "flush", "ops"])
+
+    def _locked(self, func, *args):
+        """
+        Chạy thao tác thay đổi trong khóa thay đổi của hệ thống (write_lock), gộp đọc-rồi-ghi thành
+        một bước. Luồng ghi nền chỉ giữ khóa lúc chụp từng nhóm bản ghi, việc ghi file chạy ngoài khóa,
+        nên vòng lặp chờ tối đa một nhóm ngắn
+        """
+        with self.system.write_lock():
+            return func(*args)
+
+    def _employee(self, request, base=None):
+        """Tạo nhân viên từ tham số "employee" (dict theo IMPORT_FIELDS), trộn với base nếu có"""
+        fields = _param(request, "employee", required=True)
+        if not isinstance(fields, dict):
+            raise RequestError("Tham số employee phải là object.")
+        row = dict(base or {}, **fields)
+        try:
+            return ems.employee_from_row(row)
+        except ValueError as e:
+            raise RequestError(str(e)) from None
+
+    def _update(self, employee_id, request):
+        """
+        Trộn các trường mới vào bản ghi hiện tại rồi cập nhật; chạy trọn trong khóa (không có await)
+        nên không yêu cầu nào khác xóa hay sửa nhân viên giữa lúc đọc và lúc ghi
+        """
+        system = self.system
+        current = system.find_employee_by_id(employee_id)
+        if current is None:
+            raise RequestError(f"Không tìm thấy nhân viên {employee_id}.")
+        base = ems.employee_to_row(current)
+        base.pop("team", None)
+        emp, _ = self._employee(request, base)
+        if emp.employee_id != employee_id:
+            raise RequestError("Không thể đổi mã nhân viên.")
+        if not system.update_employee(employee_id, emp):
+            raise RequestError(f"Không tìm thấy nhân viên {employee_id}.")
+        return ems.employee_to_row(system.find_employee_by_id(employee_id))
+    
+    def _write(self, op, request):
+        system = self.system
+        if op == "add":
+            emp, team = self._employee(request)
+            if not self._locked(system.add_employee, emp):
+                raise RequestError(f"Mã nhân viên {emp.employee_id} đã tồn tại.")
+            for member_id in team:
+                self._locked(system.add_team_member, emp.employee_id, member_id)
+            return ems.employee_to_row(emp)
+        if op == "update":
+            return self._locked(self._update, _param(request, "employee_id", required=True), request)
+        if op == "delete":
+            return self._locked(system.delete_employee, _param(request, "employee_id", required=True))
+        manager_id = _param(request, "manager_id", required=True)
+        employee_id = _param(request, "employee_id", required=True)
+        func = system.add_team_member if op == "team_add" else system.remove_team_member
+        return self._locked(func, manager_id, employee_id)
+
+    async def handle(self, request):
+        """Xử lý một yêu cầu (dict) và trả về dict câu trả lời"""
+        self.requests += 1
+        response = {"id": request.get("id")} if isinstance(request, dict) else {"id": None}
+        try:
+            if not isinstance(request, dict):
+                raise RequestError("Yêu cầu phải là object JSON.")
+            op = request.get("op")
+            if op in self.READS:
+                result = self.READS[op](self.system, request)
+            elif op in self.WRITES:
+                result = self._write(op, request)
+            elif op == "flush":
+                # Chờ luồng ghi nền trong executor để không chặn vòng lặp
+                result = await asyncio.get_running_loop().run_in_executor(None, self.system.flush)
+            elif op == "ops":
+                result = self.operations
+            else:
+                raise RequestError(f"Thao tác không hợp lệ: {op!r}")
+        except (RequestError, ValueError, TypeError) as e:
+            response.update(ok=False, error=str(e))
+        except Exception as e:
+            response.update(ok=False, error=f"Lỗi máy chủ: {type(e).__name__}: {e}")
+        else:
+            response.update(ok=True, result=result)
+        return response
+
+    async def serve_connection(self, reader, writer):
+        """Đọc từng dòng yêu cầu, trả lời theo đúng thứ tự; chỉ chờ gửi khi bộ đệm ghi quá lớn"""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except ValueError as e:
+                    response = {"id": None, "ok": False, "error": f"JSON không hợp lệ: {e}"}
+                else:
+                    response = await self.handle(request)
+                writer.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b"\n")
+                if writer.transport.get_write_buffer_size() > WRITE_BUFFER_LIMIT:
+                    await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(system, args):
+    service = EmployeeService(system)
+    limit = 1 << 24   # độ dài tối đa của một dòng yêu cầu
+    if args.unix:
+        if os.path.exists(args.unix):
+            os.remove(args.unix)
+        server = await asyncio.start_unix_server(service.serve_connection, args.unix, limit=limit)
+        address = args.unix
+    else:
+        server = await asyncio.start_server(service.serve_connection, args.host, args.port, limit=limit)
+        address = f"{args.host}:{args.port}"
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):   # Windows
+            pass
+
+    print(f"✅ Đang phục vụ tại {address} ({len(service.operations)} thao tác). Nhấn Ctrl+C để dừng.")
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        if args.unix and os.path.exists(args.unix):
+            os.remove(args.unix)
+    print(f"⚠️  Đang dừng sau {service.requests:,} yêu cầu, ghi nốt các thay đổi...")
+
+
+def parse_args(argv=None):
+    """Đọc các tùy chọn dòng lệnh"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data-file", default="employees_data.txt",
+                        help="File dữ liệu nhân viên (mặc định: employees_data.txt)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", metavar="PATH", help="Phục vụ qua Unix socket thay vì TCP")
+    parser.add_argument("--table", action="store_true", help="Lưu nhân viên theo cột (EmployeeTable)")
+    parser.add_argument("--workers", type=int, default=None, help="Số tiến trình đọc file text lúc khởi động")
+    # Không hỗ trợ --journal: nhật ký được ghi nối (và định kỳ gộp thành snapshot) ngay trong thao tác thay đổi,
+    # tức là trên vòng lặp sự kiện; dịch vụ luôn để luồng ghi nền (--write-delay) lo việc ghi file
+    parser.set_defaults(journal=False, compact_threshold=1000)
+    parser.add_argument("--write-delay", type=float, default=0.2, metavar="GIAY",
+                        help="Thời gian gom thay đổi của luồng ghi nền (mặc định: 0.2 giây)")
+    parser.add_argument("--metrics", metavar="FILE", help="Bật đo hiệu năng và ghi số liệu ra FILE khi dừng")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    system = ems.build_system(args)
+    if system.writes_blocked is not None:
+        # Không có ai để xác nhận: không phục vụ trên dữ liệu rỗng thay cho file hỏng
+        system.close()
+        sys.exit(f"❌ Không đọc được file dữ liệu {system.writes_blocked}; hãy kiểm tra file rồi chạy lại.")
+    try:
+        asyncio.run(serve(system, args))
+    finally:
+        if not system.close():
+            print("❌ Chưa ghi được một số thay đổi xuống đĩa.")
+        if args.metrics and system.metrics is not None:
+            system.metrics.dump(args.metrics)
+            print(f"✅ Đã ghi số liệu hiệu năng vào {args.metrics}.")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit(130)
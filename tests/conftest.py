@@ -0,0 +1,47 @@
+"""Cấu hình chung cho bộ kiểm thử: nạp module chính từ thư mục gốc và các hàm tạo dữ liệu mẫu"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import updated_employee_management_system as ems  # noqa: E402
+
+SYSTEMS = (ems.EmployeeManagementSystem, ems.TableEmployeeManagementSystem)
+
+
+def make_employee(rng, index, kind=None):
+    """Một nhân viên ngẫu nhiên (lương lấy từ ít giá trị để có nhiều người trùng lương)"""
+    kind = kind or rng.choice(ems.TYPE_NAMES)
+    employee_id = f"{kind[0]}{index:05d}"
+    name = rng.choice(["Nguyễn Văn", "Trần Thị", "Lê Minh", "Phạm Đức"]) + f" {index}"
+    phone = f"09{index:08d}"
+    email = f"nv{index}@example.com"
+    if kind == "PartTime":
+        return ems.PartTimeEmployee(employee_id, name, phone, email,
+                                    rng.choice([50000.0, 80000.0, 120000.0]), rng.choice([40.0, 80.0]))
+    cls = ems.ManagerEmployee if kind == "Manager" else ems.FullTimeEmployee
+    return cls(employee_id, name, phone, email, rng.choice([8e6, 12e6, 20e6]), rng.randrange(0, 6))
+
+
+def populate(system, count=60, seed=1):
+    """Thêm count nhân viên ngẫu nhiên và gắn đội cho các quản lý; trả về danh sách ID"""
+    rng = random.Random(seed)
+    employees = [make_employee(rng, i) for i in range(count)]
+    with system.batch():
+        for emp in employees:
+            system.add_employee(emp)
+        managers = [e.employee_id for e in employees if isinstance(e, ems.ManagerEmployee)]
+        for emp in employees:
+            for manager_id in rng.sample(managers, min(2, len(managers))):
+                system.add_team_member(manager_id, emp.employee_id)
+    return [e.employee_id for e in employees]
+
+
+def rows(system):
+    """
+    Trạng thái của hệ thống: employee_id -> dict của nhân viên (kèm đội của quản lý theo thứ tự thêm vào).
+    Không so thứ tự nhân viên vì file text ghi các quản lý sau cùng
+    """
+    return {emp.employee_id: ems.employee_to_row(system.find_employee_by_id(emp.employee_id))
+            for emp in system.iter_employees()}
@@ -0,0 +1,46 @@
+"""Chế độ nhật ký: mỗi thay đổi ghi nối một dòng, đọc lại = snapshot + phát lại nhật ký"""
+import os
+import random
+
+import pytest
+
+from conftest import SYSTEMS, ems, make_employee, populate, rows
+
+
+@pytest.mark.parametrize("cls", SYSTEMS)
+def test_replay_restores_state(tmp_path, cls):
+    path = str(tmp_path / "employees.txt")
+    system = cls(path, journal=True, compact_threshold=10000)
+    ids = populate(system)
+    system.compact()
+    snapshot = os.path.getsize(path)
+
+    manager_id = next(employee_id for employee_id in ids if employee_id.startswith("M"))
+    new = make_employee(random.Random(0), 700, "PartTime")
+    assert system.add_employee(new)
+    assert system.add_team_member(manager_id, new.employee_id)
+    assert system.update_employee(ids[1], make_employee(random.Random(1), 701,
+                                                        ems.employee_type(system.find_employee_by_id(ids[1]))))
+    assert system.delete_employee(ids[2])
+    assert system.remove_team_member(manager_id, new.employee_id)
+    assert system.journal.entries == 5
+    # Các thay đổi chỉ nằm trong nhật ký, snapshot chưa bị ghi lại
+    assert os.path.getsize(path) == snapshot
+
+    reloaded = cls(path, journal=True)
+    assert rows(reloaded) == rows(system)
+    assert reloaded.get_org_stats(manager_id) == pytest.approx(system.get_org_stats(manager_id))
+
+    assert reloaded.compact()
+    assert not os.path.exists(path + ".journal")
+    assert rows(cls(path)) == rows(system)
+
+
+def test_compacts_at_threshold(tmp_path):
+    path = str(tmp_path / "employees.txt")
+    system = ems.EmployeeManagementSystem(path, journal=True, compact_threshold=5)
+    ids = populate(system, count=10)
+    for employee_id in ids[:6]:
+        assert system.delete_employee(employee_id)
+    assert system.journal.entries < 5
+    assert rows(ems.EmployeeManagementSystem(path, journal=True)) == rows(system)
@@ -0,0 +1,110 @@
+"""Số người và quỹ lương của cả tổ chức dưới một quản lý so với duyệt cây trực tiếp"""
+import random
+
+import pytest
+
+from conftest import SYSTEMS, ems, make_employee
+
+ALL_SYSTEMS = (*SYSTEMS, ems.SQLiteEmployeeManagementSystem)
+
+
+def walk(system, manager_id):
+    """Duyệt các đội từ manager_id, mỗi người chỉ tính một lần"""
+    seen = {manager_id: system.find_employee_by_id(manager_id)}
+    stack = [manager_id]
+    while stack:
+        for emp in system.find_employee_by_id(stack.pop()).team:
+            if emp.employee_id not in seen:
+                seen[emp.employee_id] = emp
+                if isinstance(emp, ems.ManagerEmployee):
+                    stack.append(emp.employee_id)
+    return len(seen), sum(emp.calculate_salary() for emp in seen.values())
+
+
+def check(system, managers):
+    for manager_id in managers:
+        headcount, payroll = system.get_org_stats(manager_id)
+        expected_headcount, expected_payroll = walk(system, manager_id)
+        assert headcount == expected_headcount
+        assert payroll == pytest.approx(expected_payroll)
+
+
+def path_for(tmp_path, cls):
+    return str(tmp_path / ("employees.db" if cls is ems.SQLiteEmployeeManagementSystem else "employees.txt"))
+
+
+@pytest.mark.parametrize("cls", ALL_SYSTEMS)
+def test_member_of_two_teams_counted_once(tmp_path, cls):
+    system = cls(path_for(tmp_path, cls))
+    for employee_id in ("R", "A", "B"):
+        system.add_employee(ems.ManagerEmployee(employee_id, f"Quản Lý {employee_id}", "0900000000",
+                                                "m@example.com", 1000, 1))
+    system.add_employee(ems.FullTimeEmployee("X", "Nhân Viên X", "0900000001", "x@example.com", 1000, 1))
+    for manager_id, employee_id in (("R", "A"), ("R", "B"), ("A", "X"), ("B", "X")):
+        assert system.add_team_member(manager_id, employee_id)
+
+    assert system.get_org_stats("R") == (4, pytest.approx(3 * 1320.0 + 1100.0))
+    assert system.get_org_stats("A") == (2, pytest.approx(1320.0 + 1100.0))
+    assert system.remove_team_member("A", "X")
+    assert system.get_org_stats("R") == (4, pytest.approx(3 * 1320.0 + 1100.0))
+    assert system.get_org_stats("A") == (1, pytest.approx(1320.0))
+
+
+@pytest.mark.parametrize("cls", ALL_SYSTEMS)
+def test_manager_cannot_join_second_team_or_form_cycle(tmp_path, cls):
+    system = cls(path_for(tmp_path, cls))
+    for employee_id in ("A", "B", "C"):
+        system.add_employee(ems.ManagerEmployee(employee_id, f"Quản Lý {employee_id}", "0900000000",
+                                                "m@example.com", 1000, 1))
+    assert system.add_team_member("A", "B")
+    assert system.add_team_member("B", "C")
+    assert not system.add_team_member("C", "A")
+    assert not system.add_team_member("A", "C")
+    assert not system.add_team_member("A", "A")
+    # Quản lý mới mang sẵn đội: thành viên không hợp lệ bị bỏ qua, danh sách của người gọi giữ nguyên
+    manager = ems.ManagerEmployee("D", "Quản Lý D", "0900000000", "m@example.com", 1000, 1)
+    manager.add_employee(system.find_employee_by_id("B"))
+    manager.add_employee(system.find_employee_by_id("A"))
+    team = manager.members
+    assert system.add_employee(manager)
+    assert list(team) == ["B", "A"]
+    assert [emp.employee_id for emp in system.find_employee_by_id("D").team] == ["A"]
+
+
+@pytest.mark.parametrize("cls", ALL_SYSTEMS)
+def test_org_stats_after_updates_and_deletes(tmp_path, cls):
+    path = path_for(tmp_path, cls)
+    system = cls(path)
+    rng = random.Random(3)
+    managers, staff = [], []
+    for i in range(40):
+        emp = make_employee(rng, i, "Manager" if i < 10 else None)
+        system.add_employee(emp)
+        (managers if isinstance(emp, ems.ManagerEmployee) else staff).append(emp.employee_id)
+
+    for step in range(400):
+        action = rng.random()
+        if action < 0.4:
+            system.add_team_member(rng.choice(managers), rng.choice(managers + staff))
+        elif action < 0.55 and managers:
+            manager_id = rng.choice(managers)
+            team = list(system.find_employee_by_id(manager_id).team)
+            if team:
+                assert system.remove_team_member(manager_id, rng.choice(team).employee_id)
+        elif action < 0.85:
+            employee_id = rng.choice(managers + staff)
+            kind = ems.employee_type(system.find_employee_by_id(employee_id))
+            assert system.update_employee(employee_id, make_employee(rng, 5000 + step, kind))
+        elif action < 0.95:
+            group = managers if rng.random() < 0.3 and len(managers) > 2 else staff
+            employee_id = rng.choice(group)
+            group.remove(employee_id)
+            assert system.delete_employee(employee_id)
+        else:
+            emp = make_employee(rng, 1000 + step)
+            assert system.add_employee(emp)
+            (managers if isinstance(emp, ems.ManagerEmployee) else staff).append(emp.employee_id)
+        if step % 20 == 0:
+            check(system, managers)
+    check(system, managers)
+    check(cls(path), managers)
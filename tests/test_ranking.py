@@ -0,0 +1,53 @@
+"""Top-N, bottom-N và hạng lương so với cách tính thẳng (sắp xếp toàn bộ) sau các lần thêm/sửa/xóa"""
+import random
+
+import pytest
+
+from conftest import SYSTEMS, ems, make_employee, populate
+
+
+def oracle(system, employee_type=None):
+    """Nhân viên theo lương giảm dần; trùng lương thì ai được thêm trước đứng trước (sắp xếp ổn định)"""
+    employees = [emp for emp in system.employees
+                 if employee_type is None or ems.employee_type(emp) == employee_type]
+    return sorted(employees, key=lambda emp: -emp.calculate_salary())
+
+
+def check(system):
+    for employee_type in (None, *ems.TYPE_NAMES):
+        expected = oracle(system, employee_type)
+        for n in (1, 3, len(expected) + 2):
+            top = system.get_top_salary_employees(n, employee_type)
+            assert [(emp.employee_id, salary) for emp, salary in top] == \
+                [(emp.employee_id, emp.calculate_salary()) for emp in expected[:n]]
+            bottom = system.get_bottom_salary_employees(n, employee_type)
+            assert [salary for _, salary in bottom] == [emp.calculate_salary() for emp in expected[::-1][:n]]
+        for position, emp in enumerate(expected, 1):
+            assert system.get_salary_rank(emp.employee_id, by_type=employee_type is not None) == position
+
+
+@pytest.mark.parametrize("cls", SYSTEMS)
+def test_ranking_matches_sorting(tmp_path, cls):
+    system = cls(str(tmp_path / "employees.txt"))
+    ids = populate(system, count=80)
+    rng = random.Random(7)
+    check(system)
+    with system.batch():
+        for step in range(300):
+            action = rng.random()
+            if action < 0.5:
+                employee_id = rng.choice(ids)
+                fresh = make_employee(rng, 90000 + step, ems.employee_type(system.find_employee_by_id(employee_id)))
+                assert system.update_employee(employee_id, fresh)
+            elif action < 0.75:
+                employee_id = rng.choice(ids)
+                ids.remove(employee_id)
+                assert system.delete_employee(employee_id)
+            else:
+                emp = make_employee(rng, 1000 + step)
+                assert system.add_employee(emp)
+                ids.append(emp.employee_id)
+            if step % 25 == 0:
+                check(system)
+    check(system)
+    assert system.get_salary_rank("KHONG_CO") is None
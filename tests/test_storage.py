@@ -0,0 +1,156 @@
+"""Đọc/ghi snapshot (text, nhị phân, SQLite), khôi phục từ bản trước khi file hỏng và chặn ghi khi không đọc được"""
+import os
+import random
+
+import pytest
+
+from conftest import SYSTEMS, ems, make_employee, populate, rows
+
+SUFFIXES = (".txt", ".bin", ".db")
+
+
+def corrupt(path):
+    """Đảo một byte ở giữa phần dữ liệu của file (checksum không còn khớp)"""
+    with open(path, 'r+b') as f:
+        data = f.read()
+        position = data.index(b"example", len(data) // 2)
+        f.seek(position)
+        f.write(b"E")
+
+
+@pytest.mark.parametrize("suffix", SUFFIXES)
+@pytest.mark.parametrize("cls", SYSTEMS)
+def test_round_trip(tmp_path, cls, suffix):
+    path = str(tmp_path / f"employees{suffix}")
+    system = cls(path)
+    ids = populate(system)
+    assert system.update_employee(ids[3], ems.FullTimeEmployee(ids[3], "Tên Mới", "0911111111", "moi@example.com",
+                                                               15e6, 2))
+    assert system.delete_employee(ids[5])
+    assert system.save_data()
+    expected = rows(system)
+
+    reloaded = cls(path)
+    assert rows(reloaded) == expected
+    assert reloaded.calculate_total_salary() == pytest.approx(system.calculate_total_salary())
+
+
+def test_convert_between_formats(tmp_path):
+    text = str(tmp_path / "employees.txt")
+    system = ems.EmployeeManagementSystem(text)
+    populate(system)
+    expected = rows(system)
+
+    paths = [text, str(tmp_path / "a.bin"), str(tmp_path / "b.db"), str(tmp_path / "c.txt")]
+    for source, target in zip(paths, paths[1:]):
+        assert ems.convert_data_file(source, target) == len(expected)
+    assert rows(ems.EmployeeManagementSystem(paths[-1])) == expected
+
+
+def test_sqlite_system_reads_what_memory_system_wrote(tmp_path):
+    path = str(tmp_path / "employees.db")
+    system = ems.EmployeeManagementSystem(path)
+    populate(system)
+    database = ems.SQLiteEmployeeManagementSystem(path)
+    assert rows(database) == rows(system)
+    assert [e.employee_id for e in database.find_employee_by_name("nguyen van")] == \
+        [e.employee_id for e in system.find_employee_by_name("nguyen van")]
+
+
+@pytest.mark.parametrize("suffix", (".txt", ".bin"))
+def test_corrupt_file_falls_back_to_previous(tmp_path, suffix):
+    path = str(tmp_path / f"employees{suffix}")
+    system = ems.EmployeeManagementSystem(path)
+    ids = populate(system)
+    previous = rows(system)
+    assert system.delete_employee(ids[0])
+    assert os.path.exists(path + ems.PREVIOUS_SUFFIX)
+    corrupt(path)
+
+    reloaded = ems.EmployeeManagementSystem(path)
+    assert rows(reloaded) == previous
+    assert reloaded.writes_blocked is None
+    assert os.path.exists(path + ems.CORRUPT_SUFFIX)
+
+
+@pytest.mark.parametrize("suffix", (".txt", ".bin"))
+def test_corrupt_file_without_previous_is_quarantined(tmp_path, suffix):
+    path = str(tmp_path / f"employees{suffix}")
+    system = ems.EmployeeManagementSystem(path)
+    with system.batch():
+        for i in range(20):
+            system.add_employee(make_employee(random.Random(i), i))
+    assert not os.path.exists(path + ems.PREVIOUS_SUFFIX)
+    corrupt(path)
+
+    reloaded = ems.EmployeeManagementSystem(path)
+    assert reloaded.writes_blocked == path
+    assert list(reloaded.employees) == []
+    assert not os.path.exists(path)
+    assert os.path.exists(path + ems.CORRUPT_SUFFIX)
+    # Chưa xác nhận thì mọi thay đổi bị từ chối, không ghi đè gì
+    assert not reloaded.add_employee(ems.FullTimeEmployee("X1", "Mới", "0900000000", "x@example.com", 1e6, 1))
+    assert not os.path.exists(path)
+    reloaded.allow_writes()
+    assert reloaded.add_employee(ems.FullTimeEmployee("X1", "Mới", "0900000000", "x@example.com", 1e6, 1))
+    assert os.path.exists(path)
+
+
+def test_newer_format_aborts_without_renaming(tmp_path):
+    path = str(tmp_path / "employees.txt")
+    content = ems.SNAPSHOT_MAGIC + f"{ems.SNAPSHOT_VERSION + 1}|000000000000|00000000\n".encode('ascii')
+    with open(path, 'wb') as f:
+        f.write(content)
+
+    system = ems.EmployeeManagementSystem(path)
+    assert system.writes_blocked == path
+    assert not system.add_employee(ems.FullTimeEmployee("X1", "Mới", "0900000000", "x@example.com", 1e6, 1))
+    assert not system.save_data()
+    with open(path, 'rb') as f:
+        assert f.read() == content
+    assert not os.path.exists(path + ems.CORRUPT_SUFFIX)
+
+
+def test_io_error_aborts_without_renaming(tmp_path):
+    path = str(tmp_path / "employees.txt")
+    populate(ems.EmployeeManagementSystem(path))
+
+    class Unreadable(ems.TextFileStorage):
+        def load(self):
+            raise PermissionError(13, "Permission denied", self.path)
+
+    system = ems.EmployeeManagementSystem(path, storage=Unreadable(path))
+    assert system.writes_blocked == path
+    assert os.path.exists(path)
+    assert not os.path.exists(path + ems.CORRUPT_SUFFIX)
+    assert rows(ems.EmployeeManagementSystem(path))
+
+
+@pytest.mark.parametrize("cls", SYSTEMS)
+def test_snapshot_is_point_in_time(tmp_path, monkeypatch, cls):
+    """Thay đổi xen vào giữa các nhóm của một lần chụp snapshot không lọt vào snapshot đó"""
+    path = str(tmp_path / "employees.txt")
+    system = cls(path)
+    ids = populate(system)
+    expected = [system.storage.record(emp) for emp in system.employees]
+    monkeypatch.setattr(system, "SNAPSHOT_CHUNK", 7)
+
+    changes = iter([
+        lambda: system.update_employee(ids[-1], ems.FullTimeEmployee(ids[-1], "Đổi Tên", "0922222222",
+                                                                     "d@example.com", 30e6, 9)),
+        lambda: system.remove_team_member(*next((m.employee_id, t.employee_id) for m in system.employees
+                                                if isinstance(m, ems.ManagerEmployee) for t in m.team)),
+        lambda: system.delete_employee(ids[-2]),
+        lambda: system.add_employee(ems.FullTimeEmployee("NEW", "Người Mới", "0933333333", "n@example.com", 1e6, 1)),
+    ])
+    sleep = ems.time.sleep
+
+    def change_between_chunks(seconds):
+        change = next(changes, None)
+        if change is not None:
+            assert change()
+        sleep(seconds)
+
+    monkeypatch.setattr(ems.time, "sleep", change_between_chunks)
+    _, records = system._snapshot_records()
+    assert records == expected
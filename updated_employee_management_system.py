@@ -1,11 +1,38 @@
 from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_left, insort
+from collections.abc import MutableMapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from itertools import compress, islice, repeat
+import argparse
+import csv
+import functools
+import io
+import json
 import os
 import re
+import shutil
+import sqlite3
+import struct
 import sys
+import threading
+import time
+import unicodedata
+import zlib
+
+try:
+    import numpy as np
+except ImportError:  # NumPy là tùy chọn: không có thì tính lương hàng loạt bằng array
+    np = None
 
 class Employee(ABC):
     """Lớp cơ sở Employee - lớp trừu tượng, không thể khởi tạo trực tiếp"""
     
+    # Dùng __slots__ thay cho __dict__ để mỗi đối tượng nhỏ gọn (quan trọng khi có hàng triệu nhân viên)
+    # _salary: lương đã tính, None khi chưa tính hoặc một trường liên quan đến lương vừa thay đổi
+    __slots__ = ('employee_id', 'name', 'phone', 'email', '_salary')
+    
     def __init__(self, employee_id, name, phone, email):
         if not is_valid_name(name):
             raise ValueError("Tên nhân viên không được để trống hoặc bắt đầu bằng số.")
@@ -16,14 +43,22 @@ class Employee(ABC):
         self.name = name
         self.phone = phone
         self.email = email
+        self._salary = None
     
     def display_info(self):
         """Hiển thị thông tin chung của nhân viên"""
         return f"ID: {self.employee_id}, Tên: {self.name}, SĐT: {self.phone}, Email: {self.email}"
     
-    @abstractmethod
     def calculate_salary(self):
-        """Phương thức trừu tượng, các lớp con phải triển khai"""
+        """Lương của nhân viên: tính một lần rồi dùng lại cho đến khi các trường tính lương thay đổi"""
+        salary = self._salary
+        if salary is None:
+            salary = self._salary = self._compute_salary()
+        return salary
+    
+    @abstractmethod
+    def _compute_salary(self):
+        """Công thức tính lương, các lớp con phải triển khai"""
         pass
     
     @abstractmethod
@@ -41,34 +76,58 @@ class Employee(ABC):
 class FullTimeEmployee(Employee):
     """Lớp nhân viên chính thức, kế thừa từ lớp Employee"""
     
+    __slots__ = ('_base_salary', '_experience_years')
+    
     def __init__(self, employee_id, name, phone, email, base_salary, experience_years):
         super().__init__(employee_id, name, phone, email)
-        
-        if not isinstance(base_salary, (int, float)) or base_salary <= 0:
-            raise ValueError("Lương cơ bản phải là số dương.")
-        if not isinstance(experience_years, int) or experience_years < 0:
-            raise ValueError("Số năm kinh nghiệm phải là số nguyên không âm.")
-            
         self.base_salary = base_salary
         self.experience_years = experience_years
     
-    def calculate_salary(self):
+    @property
+    def base_salary(self):
+        return self._base_salary
+    
+    @base_salary.setter
+    def base_salary(self, value):
+        """Gán lương cơ bản (có kiểm tra) và bỏ lương đã tính"""
+        if not isinstance(value, (int, float)) or value <= 0:
+            raise ValueError("Lương cơ bản phải là số dương.")
+        self._base_salary = value
+        self._salary = None
+    
+    @property
+    def experience_years(self):
+        return self._experience_years
+    
+    @experience_years.setter
+    def experience_years(self, value):
+        """Gán số năm kinh nghiệm (có kiểm tra) và bỏ lương đã tính"""
+        if not isinstance(value, int) or value < 0:
+            raise ValueError("Số năm kinh nghiệm phải là số nguyên không âm.")
+        self._experience_years = value
+        self._salary = None
+    
+    def _compute_salary(self):
         """Tính lương cho nhân viên chính thức dựa vào lương cơ bản và năm kinh nghiệm"""
-        return self.base_salary * (1 + 0.1 * self.experience_years)
+        return self._base_salary * (1 + 0.1 * self._experience_years)
     
     def display_info(self):
         """Ghi đè phương thức display_info để hiển thị thêm thông tin"""
         basic_info = super().display_info()
-        return f"{basic_info}, Lương cơ bản: {self.base_salary}, Năm kinh nghiệm: {self.experience_years}"
+        return f"{basic_info}, Lương cơ bản: {self._base_salary}, Năm kinh nghiệm: {self._experience_years}"
     
     def to_txt_format(self):
         """Chuyển đối tượng thành chuỗi để lưu vào file text"""
-        return f"FullTime|{self.employee_id}|{self.name}|{self.phone}|{self.email}|{self.base_salary}|{self.experience_years}"
+        return f"FullTime|{self.employee_id}|{self.name}|{self.phone}|{self.email}|{self._base_salary}|{self._experience_years}"
     
     @classmethod
     def from_txt_format(cls, txt_line):
         """Tạo đối tượng từ chuỗi text"""
-        parts = txt_line.strip().split('|')
+        return cls.from_parts(txt_line.strip().split('|'))
+    
+    @classmethod
+    def from_parts(cls, parts):
+        """Tạo đối tượng từ các trường đã tách của một dòng text"""
         if len(parts) < 7 or parts[0] != "FullTime":
             return None
         
@@ -88,34 +147,58 @@ class FullTimeEmployee(Employee):
 class PartTimeEmployee(Employee):
     """Lớp nhân viên thời vụ, kế thừa từ lớp Employee"""
     
+    __slots__ = ('_hourly_rate', '_working_hours')
+    
     def __init__(self, employee_id, name, phone, email, hourly_rate, working_hours):
         super().__init__(employee_id, name, phone, email)
-        
-        if not isinstance(hourly_rate, (int, float)) or hourly_rate <= 0:
-            raise ValueError("Lương theo giờ phải là số dương.")
-        if not isinstance(working_hours, (int, float)) or working_hours <= 0:
-            raise ValueError("Số giờ làm việc phải là số dương.")
-            
         self.hourly_rate = hourly_rate
         self.working_hours = working_hours
     
-    def calculate_salary(self):
+    @property
+    def hourly_rate(self):
+        return self._hourly_rate
+    
+    @hourly_rate.setter
+    def hourly_rate(self, value):
+        """Gán lương theo giờ (có kiểm tra) và bỏ lương đã tính"""
+        if not isinstance(value, (int, float)) or value <= 0:
+            raise ValueError("Lương theo giờ phải là số dương.")
+        self._hourly_rate = value
+        self._salary = None
+    
+    @property
+    def working_hours(self):
+        return self._working_hours
+    
+    @working_hours.setter
+    def working_hours(self, value):
+        """Gán số giờ làm việc (có kiểm tra) và bỏ lương đã tính"""
+        if not isinstance(value, (int, float)) or value <= 0:
+            raise ValueError("Số giờ làm việc phải là số dương.")
+        self._working_hours = value
+        self._salary = None
+    
+    def _compute_salary(self):
         """Tính lương cho nhân viên thời vụ dựa vào giờ làm và lương theo giờ"""
-        return self.hourly_rate * self.working_hours
+        return self._hourly_rate * self._working_hours
     
     def display_info(self):
         """Ghi đè phương thức display_info để hiển thị thêm thông tin"""
         basic_info = super().display_info()
-        return f"{basic_info}, Lương theo giờ: {self.hourly_rate}, Số giờ làm việc: {self.working_hours}"
+        return f"{basic_info}, Lương theo giờ: {self._hourly_rate}, Số giờ làm việc: {self._working_hours}"
     
     def to_txt_format(self):
         """Chuyển đối tượng thành chuỗi để lưu vào file text"""
-        return f"PartTime|{self.employee_id}|{self.name}|{self.phone}|{self.email}|{self.hourly_rate}|{self.working_hours}"
+        return f"PartTime|{self.employee_id}|{self.name}|{self.phone}|{self.email}|{self._hourly_rate}|{self._working_hours}"
     
     @classmethod
     def from_txt_format(cls, txt_line):
         """Tạo đối tượng từ chuỗi text"""
-        parts = txt_line.strip().split('|')
+        return cls.from_parts(txt_line.strip().split('|'))
+    
+    @classmethod
+    def from_parts(cls, parts):
+        """Tạo đối tượng từ các trường đã tách của một dòng text"""
         if len(parts) < 7 or parts[0] != "PartTime":
             return None
         
@@ -135,53 +218,66 @@ class PartTimeEmployee(Employee):
 class ManagerEmployee(FullTimeEmployee):
     """Lớp quản lý, kế thừa từ lớp FullTimeEmployee"""
     
+    __slots__ = ('members', 'pending_team_ids')
+    
     def __init__(self, employee_id, name, phone, email, base_salary, experience_years):
         super().__init__(employee_id, name, phone, email, base_salary, experience_years)
-        self.team = []  # Danh sách nhân viên dưới quyền
+        # Nhân viên dưới quyền: employee_id -> nhân viên (dict giữ thứ tự thêm vào)
+        self.members = {}
+        # ID thành viên đọc từ file, chờ gắn vào team khi mọi nhân viên đã được nạp (None: không có gì chờ)
+        self.pending_team_ids = None
+    
+    @property
+    def team(self):
+        """Danh sách nhân viên trong đội theo thứ tự thêm vào (view chỉ đọc)"""
+        return self.members.values()
+    
+    def has_member(self, employee_id):
+        """Kiểm tra nhân viên có trong đội hay không - O(1)"""
+        return employee_id in self.members
     
     def add_employee(self, employee):
-        """Thêm một nhân viên vào đội ngũ"""
-        if employee.employee_id not in [e.employee_id for e in self.team]:
-            self.team.append(employee)
-            return True
-        return False
+        """Thêm một nhân viên vào đội ngũ (bỏ qua nếu đã có)"""
+        if employee.employee_id in self.members:
+            return False
+        self.members[employee.employee_id] = employee
+        return True
     
     def remove_employee(self, employee_id):
         """Xóa nhân viên khỏi đội ngũ"""
-        for i, employee in enumerate(self.team):
-            if employee.employee_id == employee_id:
-                self.team.pop(i)
-                return True
-        return False
+        return self.members.pop(employee_id, None) is not None
+    
+    def render_team(self, offset=0, limit=None):
+        """Generator các dòng của danh sách đội (tiêu đề rồi từng thành viên, từ vị trí offset, tối đa limit người)"""
+        yield f"Quản lý: {self.name} - Danh sách nhân viên ({len(self.members)}):"
+        stop = None if limit is None else offset + limit
+        for employee in islice(self.members.values(), offset, stop):
+            yield f"- {employee.display_info()}"
     
     def display_team(self):
         """Hiển thị danh sách nhân viên trong đội"""
-        result = f"Quản lý: {self.name} - Danh sách nhân viên ({len(self.team)}):\n"
-        for employee in self.team:
-            result += f"- {employee.display_info()}\n"
-        return result
+        return "".join(f"{line}\n" for line in self.render_team())
     
-    def calculate_salary(self):
+    def _compute_salary(self):
         """Tính lương cho quản lý (lương cơ bản + thưởng theo kinh nghiệm + thưởng quản lý)"""
-        # Quản lý được thưởng thêm 20% lương cơ bản
-        return super().calculate_salary() * 1.2
+        # Quản lý được thưởng thêm 20% (cùng thứ tự phép tính như lương FullTime * 1.2)
+        return self._base_salary * (1 + 0.1 * self._experience_years) * 1.2
     
-    def to_txt_format(self):
-        """Chuyển đối tượng thành chuỗi để lưu vào file text"""
+    def to_txt_format(self, include_team=True):
+        """Chuyển đối tượng thành chuỗi để lưu vào file text (include_team=False: bỏ danh sách đội)"""
         # Base info
-        result = f"Manager|{self.employee_id}|{self.name}|{self.phone}|{self.email}|{self.base_salary}|{self.experience_years}"
+        result = f"Manager|{self.employee_id}|{self.name}|{self.phone}|{self.email}|{self._base_salary}|{self._experience_years}"
         
         # Add team members if any
-        if self.team:
-            team_ids = ';'.join([emp.employee_id for emp in self.team])
+        if include_team and self.team:
+            team_ids = ';'.join(self.members)
             result += f"|{team_ids}"
         
         return result
     
     @classmethod
-    def from_txt_format(cls, txt_line):
-        """Tạo đối tượng từ chuỗi text"""
-        parts = txt_line.strip().split('|')
+    def from_parts(cls, parts):
+        """Tạo đối tượng từ các trường đã tách của một dòng text"""
         if len(parts) < 7 or parts[0] != "Manager":
             return None
         
@@ -197,15 +293,115 @@ class ManagerEmployee(FullTimeEmployee):
             
             # Add team member IDs if present
             if len(parts) > 7 and parts[7]:
-                manager.team_ids = parts[7].split(';')
-            else:
-                manager.team_ids = []
+                manager.pending_team_ids = parts[7].split(';')
             
             return manager
         except (ValueError, IndexError):
             return None
 
 
+# Bảng phân loại bản ghi: loại nhân viên (trường đầu tiên) -> hàm tạo đối tượng từ các trường
+RECORD_PARSERS = {
+    "FullTime": FullTimeEmployee.from_parts,
+    "PartTime": PartTimeEmployee.from_parts,
+    "Manager": ManagerEmployee.from_parts,
+}
+
+
+# Mã loại nhân viên dùng trong các cột số (định dạng nhị phân, tính lương hàng loạt)
+TYPE_CODES = {FullTimeEmployee: 0, PartTimeEmployee: 1, ManagerEmployee: 2}
+TYPE_NAMES = ("FullTime", "PartTime", "Manager")
+TYPE_CLASSES = (FullTimeEmployee, PartTimeEmployee, ManagerEmployee)
+
+
+def employee_type(emp):
+    """Tên loại của nhân viên như trong file text (FullTime, PartTime hoặc Manager)"""
+    if isinstance(emp, ManagerEmployee):
+        return "Manager"
+    if isinstance(emp, FullTimeEmployee):
+        return "FullTime"
+    return "PartTime"
+
+
+def parse_record(line):
+    """Tách một dòng text đúng một lần và tạo nhân viên tương ứng (None nếu không hợp lệ)"""
+    parts = line.strip().split('|')
+    parser = RECORD_PARSERS.get(parts[0])
+    return parser(parts) if parser else None
+
+
+def iter_employees(lines, skipped=None):
+    """
+    Generator đọc từng dòng (file hoặc iterable) và trả về lần lượt các nhân viên hợp lệ.
+    Nếu truyền list `skipped`, số thứ tự (từ 1) của các dòng không trống nhưng không hợp lệ được thêm vào đó.
+    """
+    for number, line in enumerate(lines, 1):
+        emp = parse_record(line)
+        if emp is not None:
+            yield emp
+        elif skipped is not None and line.strip():
+            skipped.append(number)
+
+
+def build_employee(code, employee_id, name, phone, email, num_a, num_b):
+    """
+    Tạo nhân viên từ mã loại và các giá trị đã được kiểm tra trước đó
+    (không chạy lại các bước kiểm tra trong hàm khởi tạo)
+    """
+    cls = TYPE_CLASSES[code]
+    emp = cls.__new__(cls)
+    emp.employee_id = employee_id
+    emp.name = name
+    emp.phone = phone
+    emp.email = email
+    emp._salary = None
+    # Ghi thẳng vào slot, bỏ qua bước kiểm tra của các property
+    if code == 1:
+        emp._hourly_rate = num_a
+        emp._working_hours = num_b
+    else:
+        emp._base_salary = num_a
+        emp._experience_years = int(num_b)
+        if code == 2:
+            emp.members = {}
+            emp.pending_team_ids = None
+    return emp
+
+
+def parse_range(path, start, end):
+    """
+    Đọc và kiểm tra các bản ghi trong đoạn byte [start, end) của file text (chạy trong tiến trình con).
+    Trả về dạng cột gọn để gửi về tiến trình cha: (số dòng của đoạn, số thứ tự các dòng bị bỏ qua,
+    mã loại, cột số a, cột số b, ID, tên, SĐT, email, đội nhóm), mỗi cột chuỗi được nối bằng '\n'.
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    skipped = array('I')
+    kinds = array('b')
+    num_a = array('d')
+    num_b = array('d')
+    ids, names, phones, emails, teams = [], [], [], [], []
+    # Đọc qua TextIOWrapper để xuống dòng được xử lý giống hệt khi đọc tuần tự
+    for emp in iter_employees(io.TextIOWrapper(io.BytesIO(data), encoding='utf-8'), skipped):
+        code = TYPE_CODES[type(emp)]
+        kinds.append(code)
+        if code == 1:
+            num_a.append(emp.hourly_rate)
+            num_b.append(emp.working_hours)
+        else:
+            num_a.append(emp.base_salary)
+            num_b.append(emp.experience_years)
+        ids.append(emp.employee_id)
+        names.append(emp.name)
+        phones.append(emp.phone)
+        emails.append(emp.email)
+        teams.append(';'.join(emp.pending_team_ids) if code == 2 and emp.pending_team_ids else '')
+    lines = data.count(b"\n") + (not data.endswith(b"\n") if data else 0)
+    return (lines, skipped, kinds, num_a, num_b,
+            *('\n'.join(column) for column in (ids, names, phones, emails, teams)))
+
+
 def is_valid_phone(phone):
     """
     Kiểm tra số điện thoại có hợp lệ hay không:
@@ -224,226 +420,3005 @@ def is_valid_name(name):
     return bool(name) and not name[0].isdigit()
 
 
+# Bảng xóa dấu: mọi ký tự dấu kết hợp (sau khi tách NFD) -> bỏ, đ -> d
+_FOLD_TABLE = {
+    code: None
+    for start, end in ((0x0300, 0x0370), (0x1AB0, 0x1B00), (0x1DC0, 0x1E00), (0x20D0, 0x2100), (0xFE20, 0xFE30))
+    for code in range(start, end)
+    if unicodedata.combining(chr(code))
+}
+_FOLD_TABLE[ord('đ')] = 'd'
+
+
+def fold_text(text):
+    """
+    Chuẩn hóa chuỗi để tìm kiếm không dấu:
+    - Chuyển về chữ thường
+    - Tách dấu (NFD) rồi bỏ các dấu kết hợp, đ -> d
+    Ví dụ: "Nguyễn Văn Đức" -> "nguyen van duc"
+    """
+    return unicodedata.normalize('NFD', text.lower()).translate(_FOLD_TABLE)
+
+
+class NameIndex:
+    """
+    Chỉ mục đảo trigram cho tìm kiếm chuỗi con trong tên (không phân biệt hoa thường và dấu).
+    - Mỗi tên được chuẩn hóa bằng fold_text; chỉ mục lưu theo tên chuẩn hóa khác nhau
+      (nhiều nhân viên trùng tên dùng chung posting)
+    - Truy vấn >= 3 ký tự: giao các posting của trigram rồi kiểm tra lại chuỗi con trên ứng viên
+    - Truy vấn ngắn hơn hoặc quá phổ biến: quét các tên chuẩn hóa khác nhau
+      (không chuẩn hóa lại tên đã lưu)
+    """
+    
+    def __init__(self):
+        self._postings = {}   # trigram -> tập tên chuẩn hóa
+        self._ids = {}        # tên chuẩn hóa -> tập employee_id
+    
+    @staticmethod
+    def _trigrams(text):
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+    
+    def _link(self, employee_id, name):
+        key = fold_text(name)
+        ids = self._ids.get(key)
+        if ids is None:
+            ids = self._ids[key] = set()
+            for gram in self._trigrams(key):
+                self._postings.setdefault(gram, set()).add(key)
+        ids.add(employee_id)
+    
+    def _unlink(self, employee_id, name):
+        key = fold_text(name)
+        ids = self._ids.get(key)
+        if ids is None:
+            return
+        ids.discard(employee_id)
+        if not ids:
+            del self._ids[key]
+            for gram in self._trigrams(key):
+                names = self._postings.get(gram)
+                if names is not None:
+                    names.discard(key)
+                    if not names:
+                        del self._postings[gram]
+    
+    def add(self, emp):
+        """Thêm tên của nhân viên vào chỉ mục"""
+        self._link(emp.employee_id, emp.name)
+    
+    def remove(self, emp):
+        """Xóa tên của nhân viên khỏi chỉ mục"""
+        self._unlink(emp.employee_id, emp.name)
+    
+    def rename(self, employee_id, old_name, new_name):
+        """Cập nhật chỉ mục khi đổi tên (giữ nguyên thứ tự của nhân viên)"""
+        if old_name != new_name:
+            self._unlink(employee_id, old_name)
+            self._link(employee_id, new_name)
+    
+    def search(self, query):
+        """Trả về danh sách employee_id (chưa sắp xếp) có tên chứa query"""
+        key = fold_text(query)
+        postings = sorted((self._postings.get(gram, frozenset()) for gram in self._trigrams(key)), key=len)
+        if not postings or len(postings[0]) * 4 > len(self._ids):
+            # Truy vấn ngắn hoặc quá phổ biến: quét các tên chuẩn hóa rẻ hơn giao posting
+            names = [name for name in self._ids if key in name]
+        else:
+            candidates = postings[0].intersection(*postings[1:])
+            names = [name for name in candidates if key in name]
+        return [employee_id for name in names for employee_id in self._ids[name]]
+
+
+class PhoneIndex:
+    """
+    Chỉ mục số điện thoại:
+    - Khớp chính xác O(1) qua dict số điện thoại -> danh sách employee_id (nhiều người có thể trùng số)
+    - Khớp tiền tố qua mảng đã sắp xếp các số khác nhau (bisect); mảng được dựng lười
+      ở lần tìm tiền tố đầu tiên và sau đó cập nhật dần bằng insort
+    - Khớp chuỗi con bằng cách quét các số khác nhau
+    """
+    
+    def __init__(self):
+        self._ids = {}         # số điện thoại -> danh sách employee_id
+        self._sorted = None    # danh sách số điện thoại đã sắp xếp (None: chưa dựng)
+    
+    def add(self, employee_id, phone):
+        """Thêm liên kết số điện thoại -> nhân viên"""
+        ids = self._ids.get(phone)
+        if ids is None:
+            self._ids[phone] = [employee_id]
+            if self._sorted is not None:
+                insort(self._sorted, phone)
+        else:
+            ids.append(employee_id)
+    
+    def remove(self, employee_id, phone):
+        """Xóa liên kết số điện thoại -> nhân viên"""
+        ids = self._ids.get(phone)
+        if ids is None or employee_id not in ids:
+            return
+        ids.remove(employee_id)
+        if not ids:
+            del self._ids[phone]
+            if self._sorted is not None:
+                del self._sorted[bisect_left(self._sorted, phone)]
+    
+    def exact(self, phone):
+        """Các employee_id có đúng số điện thoại phone"""
+        return list(self._ids.get(phone, ()))
+    
+    def prefix(self, prefix):
+        """Các employee_id có số điện thoại bắt đầu bằng prefix"""
+        if self._sorted is None:
+            self._sorted = sorted(self._ids)
+        result = []
+        phones = self._sorted
+        i = bisect_left(phones, prefix)
+        while i < len(phones) and phones[i].startswith(prefix):
+            result.extend(self._ids[phones[i]])
+            i += 1
+        return result
+    
+    def substring(self, part):
+        """Các employee_id có số điện thoại chứa part"""
+        return [employee_id for phone, ids in self._ids.items() if part in phone for employee_id in ids]
+
+def compensated_add(acc, value):
+    """Cộng value vào acc = [tổng, phần bù sai số] theo thuật toán Neumaier"""
+    total = acc[0] + value
+    if abs(acc[0]) >= abs(value):
+        acc[1] += (acc[0] - total) + value
+    else:
+        acc[1] += (value - total) + acc[0]
+    acc[0] = total
+
+
+class PayrollTotals:
+    """
+    Tổng lương được duy trì dần theo từng thay đổi: tổng chung và tổng theo loại
+    (FullTime, PartTime, Manager). Mỗi tổng là một phép cộng bù sai số (Neumaier)
+    để cộng/trừ lặp lại nhiều lần không làm trôi kết quả.
+    """
+    
+    def __init__(self):
+        # tên tổng -> [tổng, phần bù sai số]
+        self._sums = {key: [0.0, 0.0] for key in (None, *TYPE_NAMES)}
+    
+    def adjust(self, emp, delta):
+        """Cộng thêm delta vào tổng chung và tổng của loại nhân viên emp"""
+        if delta:
+            compensated_add(self._sums[None], delta)
+            compensated_add(self._sums[employee_type(emp)], delta)
+    
+    def add(self, emp):
+        self.adjust(emp, emp.calculate_salary())
+    
+    def remove(self, emp):
+        self.adjust(emp, -emp.calculate_salary())
+    
+    def total(self, employee_type=None):
+        """Tổng lương chung (employee_type=None) hoặc theo loại; loại không hợp lệ trả về 0"""
+        acc = self._sums.get(employee_type)
+        return acc[0] + acc[1] if acc else 0
+
+
+class OrgTree:
+    """
+    Cây báo cáo giữa các quản lý, kèm số người và quỹ lương của cả tổ chức dưới mỗi quản lý:
+    - Mỗi quản lý thuộc đội của tối đa một quản lý khác; liên kết tạo vòng lặp bị từ chối
+    - Nhân viên thường có thể thuộc nhiều đội nhưng chỉ được tính một lần trong tổ chức của mỗi quản lý:
+      với người thuộc nhiều đội, mỗi quản lý cấp trên nhớ số đội chứa họ trong tổ chức của mình
+      và chỉ cộng/trừ khi số đó đổi giữa 0 và khác 0
+    - Số liệu tổ chức (gồm cả bản thân quản lý) được lưu sẵn và chỉ cập nhật dọc đường đi
+      lên các quản lý cấp trên khi có thay đổi, nên mỗi truy vấn là O(1)
+    """
+    
+    def __init__(self):
+        self._parent = {}   # ID quản lý -> ID quản lý cấp trên trực tiếp
+        self._stats = {}    # ID quản lý -> [số người, [quỹ lương, phần bù sai số]]
+        self._shared = {}   # ID quản lý -> {ID nhân viên thuộc nhiều đội: số đội chứa họ trong tổ chức}
+        self._shared_salary = {}   # ID nhân viên thuộc nhiều đội -> lương
+    
+    def add_manager(self, manager_id, salary):
+        self._stats[manager_id] = [1, [salary, 0.0]]
+    
+    def remove_manager(self, manager_id):
+        """Bỏ quản lý khỏi cây (đội và cấp trên của họ phải được gỡ trước)"""
+        self._stats.pop(manager_id, None)
+        self._parent.pop(manager_id, None)
+        self._shared.pop(manager_id, None)
+    
+    def parent(self, manager_id):
+        return self._parent.get(manager_id)
+    
+    def _chain(self, manager_id):
+        """manager_id rồi lần lượt các quản lý cấp trên"""
+        node = manager_id
+        while node is not None:
+            yield node
+            node = self._parent.get(node)
+    
+    def can_link(self, manager_id, member_id):
+        """Quản lý chỉ có một cấp trên, và không được là chính manager_id hay cấp trên của nó"""
+        if member_id not in self._stats:
+            return True
+        if member_id in self._parent:
+            return False
+        return member_id not in self._chain(manager_id)
+    
+    def link(self, manager_id, member_id, salary, others=()):
+        """
+        Ghi nhận member_id vào đội của manager_id (salary: lương của thành viên;
+        others: các quản lý khác đang có member_id trong đội)
+        """
+        if manager_id not in self._stats:
+            return
+        stats = self._stats.get(member_id)
+        if stats is not None:
+            self._parent[member_id] = manager_id
+            self._propagate(manager_id, stats[0], sum(stats[1]))
+            # Người thuộc nhiều đội đã có trong tổ chức của cấp trên thì không tính thêm lần nữa
+            for employee_id, count in self._shared.get(member_id, {}).items():
+                for node in self._chain(manager_id):
+                    if self._count_shared(node, employee_id, count) != count:
+                        self._add(node, -1, -self._shared_salary[employee_id])
+        elif others:
+            if member_id not in self._shared_salary:
+                # Lần đầu thuộc đội thứ hai: ghi lại số đội chứa họ dọc đường đi của đội đang có
+                self._shared_salary[member_id] = salary
+                for other in others:
+                    for node in self._chain(other):
+                        self._count_shared(node, member_id, 1)
+            for node in self._chain(manager_id):
+                if self._count_shared(node, member_id, 1) == 1:
+                    self._add(node, 1, salary)
+        else:
+            self._propagate(manager_id, 1, salary)
+    
+    def unlink(self, manager_id, member_id, salary, others=()):
+        """Gỡ member_id khỏi đội của manager_id (others: các quản lý khác vẫn có member_id trong đội)"""
+        if manager_id not in self._stats:
+            return
+        stats = self._stats.get(member_id)
+        if stats is not None:
+            if self._parent.get(member_id) == manager_id:
+                del self._parent[member_id]
+            self._propagate(manager_id, -stats[0], -sum(stats[1]))
+            # Người vẫn còn trong tổ chức của cấp trên qua đội khác thì được tính lại
+            for employee_id, count in self._shared.get(member_id, {}).items():
+                for node in self._chain(manager_id):
+                    if self._count_shared(node, employee_id, -count):
+                        self._add(node, 1, self._shared_salary[employee_id])
+        elif member_id in self._shared_salary:
+            salary = self._shared_salary[member_id]
+            for node in self._chain(manager_id):
+                if not self._count_shared(node, member_id, -1):
+                    self._add(node, -1, -salary)
+            if len(others) <= 1:
+                # Chỉ còn tối đa một đội: không cần đếm riêng nữa
+                for other in others:
+                    for node in self._chain(other):
+                        self._count_shared(node, member_id, -1)
+                del self._shared_salary[member_id]
+        else:
+            self._propagate(manager_id, -1, -salary)
+    
+    def _count_shared(self, manager_id, employee_id, delta):
+        """Cộng delta vào số đội chứa employee_id trong tổ chức của manager_id; trả về số mới (0 thì bỏ)"""
+        counts = self._shared.setdefault(manager_id, {})
+        count = counts.get(employee_id, 0) + delta
+        if count:
+            counts[employee_id] = count
+        else:
+            counts.pop(employee_id, None)
+            if not counts:
+                del self._shared[manager_id]
+        return count
+    
+    def salary_changed(self, employee_id, delta, managers=()):
+        """Lương của employee_id thay đổi delta: cập nhật tổ chức của họ (nếu là quản lý)
+        hoặc của các đội chứa họ, rồi đi lên các cấp trên (mỗi quản lý một lần)"""
+        if employee_id in self._stats:
+            self._propagate(employee_id, 0, delta)
+            return
+        if employee_id in self._shared_salary:
+            self._shared_salary[employee_id] += delta
+        seen = set()
+        for manager_id in managers:
+            for node in self._chain(manager_id):
+                if node in seen:
+                    break
+                seen.add(node)
+                self._add(node, 0, delta)
+    
+    def _add(self, manager_id, count, amount):
+        stats = self._stats[manager_id]
+        stats[0] += count
+        if amount:
+            compensated_add(stats[1], amount)
+    
+    def _propagate(self, manager_id, count, amount):
+        for node in self._chain(manager_id):
+            self._add(node, count, amount)
+    
+    def stats(self, manager_id):
+        """(số người, quỹ lương) của tổ chức dưới quản lý, hoặc None nếu không phải quản lý"""
+        stats = self._stats.get(manager_id)
+        return None if stats is None else (stats[0], sum(stats[1]))
+
+
+class PayrollEngine:
+    """
+    Tính lương hàng loạt trên các cột số liên tục thay vì gọi calculate_salary() từng đối tượng:
+    - kinds: mã loại (0 FullTime, 1 PartTime, 2 Manager)
+    - num_a: lương cơ bản / lương theo giờ; num_b: năm kinh nghiệm / số giờ làm
+    Dùng NumPy nếu có, nếu không thì duyệt các array. Công thức và thứ tự phép tính giống hệt
+    các phương thức calculate_salary nên kết quả trùng khớp từng bit.
+    """
+    
+    def __init__(self, ids, kinds, num_a, num_b, use_numpy=True):
+        self.ids = ids
+        self.kinds = kinds
+        self.num_a = num_a
+        self.num_b = num_b
+        self.use_numpy = use_numpy and np is not None
+        self._salaries = None
+    
+    @classmethod
+    def from_employees(cls, employees, use_numpy=True):
+        """Gom các trường số của danh sách nhân viên vào các cột array"""
+        ids = []
+        kinds = array('b')
+        num_a = array('d')
+        num_b = array('d')
+        for emp in employees:
+            ids.append(emp.employee_id)
+            code = TYPE_CODES[type(emp)]
+            kinds.append(code)
+            if code == 1:
+                num_a.append(emp.hourly_rate)
+                num_b.append(emp.working_hours)
+            else:
+                num_a.append(emp.base_salary)
+                num_b.append(emp.experience_years)
+        return cls(ids, kinds, num_a, num_b, use_numpy)
+    
+    @classmethod
+    def from_binary_file(cls, path, use_numpy=True):
+        """Nạp thẳng các cột từ snapshot nhị phân (.bin), không cần tạo đối tượng nhân viên"""
+        columns = BinaryFileStorage(path).read_columns(strings=('ids',))
+        return cls(columns['ids'], columns['types'], columns['num_a'], columns['num_b'], use_numpy)
+    
+    def salaries(self):
+        """Cột lương của tất cả nhân viên (numpy.ndarray hoặc array('d')), tính một lần rồi dùng lại"""
+        if self._salaries is None:
+            if self.use_numpy:
+                kinds = np.frombuffer(self.kinds, dtype=np.int8)
+                num_a = np.frombuffer(self.num_a, dtype=np.float64)
+                num_b = np.frombuffer(self.num_b, dtype=np.float64)
+                fulltime = num_a * (1 + 0.1 * num_b)
+                salaries = np.where(kinds == 1, num_a * num_b, fulltime)
+                self._salaries = np.where(kinds == 2, fulltime * 1.2, salaries)
+            else:
+                self._salaries = array('d', (
+                    a * b if k == 1 else (a * (1 + 0.1 * b) * 1.2 if k == 2 else a * (1 + 0.1 * b))
+                    for k, a, b in zip(self.kinds, self.num_a, self.num_b)
+                ))
+        return self._salaries
+    
+    def items(self):
+        """Các cặp (employee_id, lương) theo thứ tự đầu vào"""
+        salaries = self.salaries()
+        return zip(self.ids, salaries.tolist() if self.use_numpy else salaries)
+    
+    def totals(self):
+        """Tổng lương theo loại và tổng chung (khóa None)"""
+        salaries = self.salaries()
+        if self.use_numpy:
+            sums = np.bincount(np.frombuffer(self.kinds, dtype=np.int8), weights=salaries,
+                               minlength=len(TYPE_NAMES)).tolist()
+        else:
+            sums = [0.0] * len(TYPE_NAMES)
+            for k, salary in zip(self.kinds, salaries):
+                sums[k] += salary
+        result = dict(zip(TYPE_NAMES, sums))
+        result[None] = sum(sums)
+        return result
+
+
+class SortedKeyList:
+    """
+    Danh sách khóa luôn được sắp xếp, chia thành các khối nhỏ (tối đa 2 * LOAD phần tử):
+    - Thêm/xóa: bisect trên phần tử lớn nhất của các khối, rồi insort/del trong một khối nhỏ
+    - Vị trí (rank) của một khóa: tổng kích thước các khối đứng trước (cây Fenwick trên kích thước
+      các khối, O(log số khối)) + bisect. Thêm/xóa trong một khối chỉ cập nhật cây O(log số khối);
+      chỉ khi tách hoặc bỏ khối (khoảng mỗi LOAD lần thay đổi) cây mới được dựng lại, O(số khối)
+    - Duyệt từ đầu hoặc từ cuối để lấy n phần tử đầu/cuối
+    """
+    
+    LOAD = 1000
+    
+    def __init__(self, keys=()):
+        keys = sorted(keys)
+        self._lists = [keys[i:i + self.LOAD] for i in range(0, len(keys), self.LOAD)]
+        self._maxes = [lst[-1] for lst in self._lists]
+        self._len = len(keys)
+        self._tree = None   # cây Fenwick trên kích thước các khối (None: cần dựng lại)
+    
+    def __len__(self):
+        return self._len
+    
+    def add(self, key):
+        """Thêm một khóa, giữ thứ tự"""
+        self._len += 1
+        if not self._maxes:
+            self._lists.append([key])
+            self._maxes.append(key)
+            self._tree = None
+            return
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            i -= 1
+            self._lists[i].append(key)
+            self._maxes[i] = key
+        else:
+            insort(self._lists[i], key)
+        lst = self._lists[i]
+        self._tree_add(i, 1)
+        if len(lst) > 2 * self.LOAD:
+            # Tách khối quá lớn làm đôi
+            self._tree = None
+            half = lst[self.LOAD:]
+            del lst[self.LOAD:]
+            self._maxes[i] = lst[-1]
+            self._lists.insert(i + 1, half)
+            self._maxes.insert(i + 1, half[-1])
+    
+    def remove(self, key):
+        """Xóa một khóa; trả về False nếu khóa không có trong danh sách"""
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            return False
+        lst = self._lists[i]
+        j = bisect_left(lst, key)
+        if lst[j] != key:
+            return False
+        del lst[j]
+        self._len -= 1
+        self._tree_add(i, -1)
+        if not lst:
+            del self._lists[i]
+            del self._maxes[i]
+            self._tree = None
+        elif j == len(lst):
+            self._maxes[i] = lst[-1]
+        return True
+    
+    def index(self, key):
+        """Vị trí (tính từ 0) của khóa, hoặc None nếu không có"""
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            return None
+        lst = self._lists[i]
+        j = bisect_left(lst, key)
+        if lst[j] != key:
+            return None
+        return self._count_before(i) + j
+    
+    def _tree_add(self, i, delta):
+        """Cộng delta vào kích thước khối i trong cây Fenwick (nếu cây đang được dùng)"""
+        tree = self._tree
+        if tree is None:
+            return
+        i += 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+    
+    def _count_before(self, i):
+        """Tổng kích thước các khối đứng trước khối i"""
+        tree = self._tree
+        if tree is None:
+            # Dựng cây trong O(số khối): mỗi nút cộng dồn vào nút cha trực tiếp
+            tree = self._tree = [0, *map(len, self._lists)]
+            for k in range(1, len(tree)):
+                parent = k + (k & -k)
+                if parent < len(tree):
+                    tree[parent] += tree[k]
+        total = 0
+        while i:
+            total += tree[i]
+            i -= i & -i
+        return total
+    
+    def head(self, n):
+        """n khóa nhỏ nhất theo thứ tự tăng dần"""
+        return list(islice((key for lst in self._lists for key in lst), n))
+    
+    def tail(self, n):
+        """n khóa lớn nhất theo thứ tự giảm dần"""
+        return list(islice((key for lst in reversed(self._lists) for key in reversed(lst)), n))
+
+
+class SalaryRanking:
+    """
+    Bảng xếp hạng lương cho toàn bộ nhân viên và theo từng loại.
+    Khóa là (-lương, thứ tự thêm vào, employee_id): đầu danh sách là lương cao nhất,
+    trùng lương thì ai được thêm trước đứng trước (giống sắp xếp ổn định trước đây).
+    Bảng được dựng lười ở truy vấn đầu tiên để việc đọc file không phải sắp xếp.
+    """
+    
+    def __init__(self):
+        self._lists = None   # None (tổng) / loại nhân viên -> SortedKeyList
+    
+    @property
+    def built(self):
+        return self._lists is not None
+    
+    def build(self, engine, order):
+        """Dựng bảng từ lương tính hàng loạt (PayrollEngine) và bảng thứ tự thêm vào"""
+        keys = {key: [] for key in (None, *TYPE_NAMES)}
+        for (employee_id, salary), code in zip(engine.items(), engine.kinds):
+            key = (-salary, order[employee_id], employee_id)
+            keys[None].append(key)
+            keys[TYPE_NAMES[code]].append(key)
+        self._lists = {group: SortedKeyList(group_keys) for group, group_keys in keys.items()}
+    
+    def add(self, emp, seq, salary):
+        if self._lists is not None:
+            key = (-salary, seq, emp.employee_id)
+            self._lists[None].add(key)
+            self._lists[employee_type(emp)].add(key)
+    
+    def remove(self, emp, seq, salary):
+        if self._lists is not None:
+            key = (-salary, seq, emp.employee_id)
+            self._lists[None].remove(key)
+            self._lists[employee_type(emp)].remove(key)
+    
+    def top(self, n, employee_type=None):
+        """n cặp (employee_id, lương) cao nhất"""
+        return [(key[2], -key[0]) for key in self._lists[employee_type].head(n)]
+    
+    def bottom(self, n, employee_type=None):
+        """n cặp (employee_id, lương) thấp nhất, lương tăng dần"""
+        return [(key[2], -key[0]) for key in self._lists[employee_type].tail(n)]
+    
+    def rank(self, emp, seq, employee_type=None):
+        """Hạng (tính từ 1, lương cao nhất là hạng 1) của nhân viên, hoặc None"""
+        position = self._lists[employee_type].index((-emp.calculate_salary(), seq, emp.employee_id))
+        return None if position is None else position + 1
+
+
+class EmployeeTable(MutableMapping):
+    """
+    Kho nhân viên theo cột (struct-of-arrays), dùng như dict employee_id -> nhân viên:
+    - kinds: mã loại (array('b'), -1 là hàng đã xóa); ids, names, phones, emails: các cột chuỗi
+    - num_a, num_b: các cột số giống PayrollEngine; teams: ID quản lý -> dict ID thành viên (giữ thứ tự)
+    Đối tượng nhân viên chỉ được tạo khi cần đọc một hàng; đó là bản sao của hàng,
+    muốn sửa phải gán lại vào bảng (table[employee_id] = emp).
+    Xóa chỉ đánh dấu hàng để giữ thứ tự thêm vào; bảng được dồn lại khi quá nửa số hàng đã xóa.
+    """
+    
+    DELETED = -1
+    
+    def __init__(self):
+        self.kinds = array('b')
+        self.ids = []
+        self.names = []
+        self.phones = []
+        self.emails = []
+        self.num_a = array('d')
+        self.num_b = array('d')
+        self.teams = {}
+        self._rows = {}       # employee_id -> số hàng
+        self._deleted = 0
+    
+    def __len__(self):
+        return len(self._rows)
+    
+    def __iter__(self):
+        return iter(self._rows)
+    
+    def __contains__(self, employee_id):
+        return employee_id in self._rows
+    
+    def __getitem__(self, employee_id):
+        return self.view(self._rows[employee_id])
+    
+    def get(self, employee_id, default=None):
+        row = self._rows.get(employee_id)
+        return default if row is None else self.view(row)
+    
+    def __setitem__(self, employee_id, emp):
+        """Thêm hàng mới, hoặc ghi đè các cột của hàng đã có bằng giá trị của emp"""
+        code = TYPE_CODES[type(emp)]
+        if code == 1:
+            a, b = emp.hourly_rate, emp.working_hours
+        else:
+            a, b = emp.base_salary, emp.experience_years
+        row = self._rows.get(employee_id)
+        if row is None:
+            self._rows[employee_id] = len(self.kinds)
+            self.kinds.append(code)
+            self.ids.append(employee_id)
+            self.names.append(emp.name)
+            self.phones.append(emp.phone)
+            self.emails.append(emp.email)
+            self.num_a.append(a)
+            self.num_b.append(b)
+            if code == 2:
+                self.teams[employee_id] = dict.fromkeys(emp.members)
+        else:
+            self.kinds[row] = code
+            self.names[row] = emp.name
+            self.phones[row] = emp.phone
+            self.emails[row] = emp.email
+            self.num_a[row] = a
+            self.num_b[row] = b
+    
+    def __delitem__(self, employee_id):
+        row = self._rows.pop(employee_id)
+        self.kinds[row] = self.DELETED
+        self.names[row] = self.phones[row] = self.emails[row] = ''
+        self.teams.pop(employee_id, None)
+        self._deleted += 1
+        if self._deleted * 2 > len(self.kinds):
+            self.compact()
+    
+    def copy(self):
+        """Bản sao độc lập của bảng: các cột được chép nguyên khối, đội nhóm chép theo từng quản lý"""
+        table = EmployeeTable()
+        table.kinds, table.num_a, table.num_b = array('b', self.kinds), array('d', self.num_a), array('d', self.num_b)
+        table.ids, table.names, table.phones, table.emails = (
+            list(self.ids), list(self.names), list(self.phones), list(self.emails))
+        table.teams = {manager_id: dict(team) for manager_id, team in self.teams.items()}
+        table._rows = dict(self._rows)
+        table._deleted = self._deleted
+        return table
+    
+    def compact(self):
+        """Dồn bảng, bỏ các hàng đã xóa (giữ nguyên thứ tự)"""
+        if not self._deleted:
+            return
+        keep = [row for row, code in enumerate(self.kinds) if code != self.DELETED]
+        self.kinds = array('b', (self.kinds[row] for row in keep))
+        self.num_a = array('d', (self.num_a[row] for row in keep))
+        self.num_b = array('d', (self.num_b[row] for row in keep))
+        for name in ('ids', 'names', 'phones', 'emails'):
+            column = getattr(self, name)
+            setattr(self, name, [column[row] for row in keep])
+        self._rows = {employee_id: row for row, employee_id in enumerate(self.ids)}
+        self._deleted = 0
+    
+    def view(self, row, with_team=True):
+        """Tạo đối tượng nhân viên từ một hàng (không kiểm tra lại dữ liệu đã hợp lệ)"""
+        code = self.kinds[row]
+        emp = build_employee(code, self.ids[row], self.names[row], self.phones[row],
+                             self.emails[row], self.num_a[row], self.num_b[row])
+        if code == 2 and with_team:
+            # Thành viên được tạo không kèm đội của họ để tránh dựng cả cây
+            rows = self._rows
+            emp.members = {m: self.view(rows[m], False) for m in self.teams[emp.employee_id] if m in rows}
+        return emp
+    
+    def rows_of(self, ids):
+        """Các nhân viên có ID trong ids, theo thứ tự thêm vào (thứ tự hàng)"""
+        rows = self._rows
+        return [self.view(row) for row in sorted(rows[employee_id] for employee_id in ids)]
+    
+    def select(self, code):
+        """Các nhân viên có mã loại code, lọc trên cột kinds (không gọi isinstance)"""
+        kinds = self.kinds
+        return TableRows(self, list(compress(range(len(kinds)), map(code.__eq__, kinds))))
+    
+    def add_team_member(self, manager_id, employee_id):
+        """Thêm ID nhân viên vào đội của quản lý; False nếu không hợp lệ hoặc đã có"""
+        team = self.teams.get(manager_id)
+        row = self._rows.get(employee_id)
+        if team is None or row is None or employee_id in team:
+            return False
+        # Dùng chuỗi ID trong cột để không giữ thêm bản sao (ví dụ chuỗi tách từ file)
+        team[self.ids[row]] = None
+        return True
+    
+    def remove_team_member(self, manager_id, employee_id):
+        """Xóa ID nhân viên khỏi đội của quản lý"""
+        team = self.teams.get(manager_id)
+        if team is None or employee_id not in team:
+            return False
+        del team[employee_id]
+        return True
+    
+    def payroll_engine(self, use_numpy=True):
+        """PayrollEngine trên bản sao các cột hiện tại (không phải gom từ đối tượng)"""
+        self.compact()
+        return PayrollEngine(list(self.ids), array('b', self.kinds), array('d', self.num_a),
+                             array('d', self.num_b), use_numpy)
+
+
+class TableRows(Sequence):
+    """Danh sách các hàng của EmployeeTable; đối tượng nhân viên chỉ được tạo khi truy cập"""
+    
+    def __init__(self, table, rows):
+        self.table = table
+        self.rows = rows
+    
+    def __len__(self):
+        return len(self.rows)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return TableRows(self.table, self.rows[index])
+        return self.table.view(self.rows[index])
+    
+    def __iter__(self):
+        view = self.table.view
+        return (view(row) for row in self.rows)
+
+
+# Snapshot text có header "#EMS|<phiên bản>|<số bản ghi>|<CRC32 phần dữ liệu>"; file không có header
+# (trước phiên bản 1) vẫn đọc được nhưng không kiểm tra được
+SNAPSHOT_MAGIC = b"#EMS|"
+SNAPSHOT_VERSION = 1
+# Thế hệ snapshot trước được giữ lại bên cạnh file chính để đọc khi file chính bị hỏng
+PREVIOUS_SUFFIX = ".prev"
+CORRUPT_SUFFIX = ".corrupt"
+
+
+class SnapshotError(ValueError):
+    """File snapshot hỏng hoặc bị cắt cụt: số bản ghi, độ dài hoặc checksum không khớp với header"""
+
+
+class SnapshotVersionError(Exception):
+    """File snapshot có phiên bản định dạng mới hơn chương trình: file không hỏng, không được thay thế"""
+
+
+# Lỗi khi đọc cho thấy nội dung snapshot hỏng (header, checksum, độ dài, dữ liệu không phân tích được).
+# Các lỗi khác (quyền truy cập, I/O, định dạng mới hơn) không phải do file hỏng: không đổi tên hay ghi đè file
+CORRUPTION_ERRORS = (ValueError, struct.error)
+
+
+def snapshot_header(count, checksum):
+    """Dòng header của snapshot text (độ rộng cố định để ghi giữ chỗ trước rồi ghi đè khi đã biết giá trị)"""
+    return SNAPSHOT_MAGIC + f"{SNAPSHOT_VERSION}|{count:012d}|{checksum:08x}\n".encode('ascii')
+
+
+def read_snapshot_header(f):
+    """
+    Đọc header ở đầu file text mở dạng nhị phân: trả về (số bản ghi, checksum) và để con trỏ ở dòng dữ liệu đầu tiên,
+    hoặc None (file cũ không có header, con trỏ trở về đầu file)
+    """
+    first = f.readline()
+    if not first.startswith(SNAPSHOT_MAGIC):
+        f.seek(0)
+        return None
+    try:
+        version, count, checksum = first[len(SNAPSHOT_MAGIC):].decode('ascii').split('|')
+        version, count, checksum = int(version), int(count), int(checksum, 16)
+    except ValueError:
+        raise SnapshotError(f"Header không hợp lệ: {first[:60]!r}") from None
+    if version > SNAPSHOT_VERSION:
+        raise SnapshotVersionError(
+            f"Phiên bản định dạng {version} mới hơn chương trình (hỗ trợ đến {SNAPSHOT_VERSION}).")
+    return count, checksum
+
+
+def _fsync_directory(path):
+    """Đảm bảo việc đổi tên trong thư mục chứa path đã xuống đĩa (Windows không hỗ trợ fsync thư mục)"""
+    if os.name == 'nt':
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_write(path, keep_previous=True):
+    """
+    Mở file tạm (nhị phân) cùng thư mục với path để ghi; khi khối `with` kết thúc bình thường,
+    fsync rồi đổi tên đè lên path (os.replace là nguyên tử), nên path luôn là một bản đầy đủ:
+    crash giữa chừng chỉ để lại file tạm. Có ngoại lệ thì xóa file tạm, path giữ nguyên.
+    keep_previous: bản cũ của path được giữ lại thành path + ".prev" trước khi bị thay thế.
+    """
+    tmp = path + ".tmp"
+    f = open(tmp, 'wb')
+    try:
+        yield f
+        f.flush()
+        os.fsync(f.fileno())
+    except BaseException:
+        f.close()
+        os.remove(tmp)
+        raise
+    f.close()
+    if keep_previous and os.path.exists(path):
+        _keep_previous(path)
+    os.replace(tmp, path)
+    _fsync_directory(path)
+
+
+def _keep_previous(path):
+    """
+    Giữ bản hiện tại của path thành path + ".prev" mà path vẫn tồn tại: tạo hard link
+    (không chép dữ liệu), hệ thống file không hỗ trợ thì chép ra file tạm rồi đổi tên
+    """
+    previous = path + PREVIOUS_SUFFIX
+    if os.path.exists(previous):
+        os.remove(previous)
+    try:
+        os.link(path, previous)
+    except OSError:
+        shutil.copyfile(path, previous + ".tmp")
+        os.replace(previous + ".tmp", previous)
+
+
+class TextFileStorage:
+    """
+    Lưu snapshot nhân viên dạng text, mỗi dòng một bản ghi phân cách bằng '|', sau một dòng header
+    (phiên bản định dạng, số bản ghi, CRC32 của phần dữ liệu). Khi đọc, checksum được tính ngay trong
+    lượt đọc duy nhất; không khớp thì phát SnapshotError sau khi đọc hết.
+    Với workers > 1, file lớn được chia thành các đoạn byte theo ranh giới dòng và
+    phân tích song song trong các tiến trình con; kết quả giống hệt đọc tuần tự.
+    """
+    
+    # File nhỏ hơn ngưỡng này luôn đọc tuần tự (khởi động tiến trình con không đáng)
+    PARALLEL_MIN_BYTES = 1 << 20
+    # Số đoạn cho mỗi tiến trình, để các tiến trình xong việc gần như cùng lúc
+    CHUNKS_PER_WORKER = 4
+    # Số dòng được mã hóa và ghi trong một lần khi lưu
+    WRITE_CHUNK = 10000
+    # Kích thước khối khi tính checksum cả file
+    CHECKSUM_BLOCK = 1 << 20
+    
+    def __init__(self, path, workers=None):
+        self.path = path
+        self.workers = workers   # số tiến trình đọc song song (None hoặc 1: đọc tuần tự)
+        self.skipped = []        # số dòng (trong file) của các bản ghi không hợp lệ ở lần đọc gần nhất
+    
+    def previous(self):
+        """Kho lưu trữ của thế hệ snapshot trước (path + ".prev"), None nếu không có"""
+        path = self.path + PREVIOUS_SUFFIX
+        return TextFileStorage(path, self.workers) if os.path.exists(path) else None
+    
+    def load(self):
+        """Generator đọc lần lượt các nhân viên từ file (quản lý mang pending_team_ids)"""
+        self.skipped = []
+        if (self.workers or 1) > 1 and os.path.getsize(self.path) >= self.PARALLEL_MIN_BYTES:
+            yield from self._load_parallel()
+            return
+        with open(self.path, 'rb') as f:
+            header = read_snapshot_header(f)
+            if header is None:
+                yield from iter_employees(io.TextIOWrapper(f, encoding='utf-8'), self.skipped)
+                return
+            checksum = lines = 0
+            for raw in f:
+                checksum = zlib.crc32(raw, checksum)
+                lines += 1
+                emp = parse_record(raw.decode('utf-8'))
+                if emp is not None:
+                    yield emp
+                elif raw.strip():
+                    self.skipped.append(lines + 1)
+        self._verify(header, lines, checksum)
+    
+    def _verify(self, header, lines, checksum):
+        count, expected = header
+        if lines != count:
+            raise SnapshotError(f"File {self.path} có {lines} bản ghi, header ghi {count} (file bị cắt cụt?).")
+        if checksum != expected:
+            raise SnapshotError(f"Checksum của {self.path} không khớp ({checksum:08x} != {expected:08x}).")
+    
+    def split_ranges(self, parts, start=0):
+        """Chia file từ byte start thành tối đa `parts` đoạn byte [start, end), mỗi đoạn kết thúc ở cuối một dòng"""
+        size = os.path.getsize(self.path)
+        bounds = [start]
+        with open(self.path, 'rb') as f:
+            for i in range(1, parts):
+                f.seek(max(start + (size - start) * i // parts, bounds[-1]))
+                f.readline()   # bỏ phần còn lại của dòng đang dở
+                pos = f.tell()
+                if pos >= size:
+                    break
+                bounds.append(pos)
+        bounds.append(size)
+        return list(zip(bounds, bounds[1:]))
+    
+    def _checksum(self, start):
+        """CRC32 và số dòng của file từ byte start (đọc theo khối lớn, nhanh hơn nhiều so với phân tích)"""
+        checksum = lines = 0
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            for block in iter(functools.partial(f.read, self.CHECKSUM_BLOCK), b""):
+                checksum = zlib.crc32(block, checksum)
+                lines += block.count(b"\n")
+                last = block
+        if lines and not last.endswith(b"\n"):
+            lines += 1
+        return lines, checksum
+    
+    def _load_parallel(self):
+        """Phân tích các đoạn trong tiến trình con, ghép kết quả theo đúng thứ tự trong file"""
+        with open(self.path, 'rb') as f:
+            header = read_snapshot_header(f)
+            body = f.tell()
+        starts, ends = zip(*self.split_ranges(self.workers * self.CHUNKS_PER_WORKER, body))
+        first_line = 2 if header is not None else 1
+        with ProcessPoolExecutor(self.workers) as pool:
+            results = pool.map(parse_range, repeat(self.path), starts, ends)
+            # Tiến trình cha tính checksum trong lúc các tiến trình con phân tích
+            totals = self._checksum(body) if header is not None else None
+            for lines, skipped, kinds, num_a, num_b, *strings in results:
+                self.skipped.extend(first_line + number - 1 for number in skipped)
+                first_line += lines
+                if not kinds:
+                    continue
+                ids, names, phones, emails, teams = (column.split('\n') for column in strings)
+                for i, code in enumerate(kinds):
+                    emp = build_employee(code, ids[i], names[i], phones[i], emails[i], num_a[i], num_b[i])
+                    if teams[i]:
+                        emp.pending_team_ids = teams[i].split(';')
+                    yield emp
+        if totals is not None:
+            self._verify(header, *totals)
+    
+    def save(self, employees):
+        """Ghi toàn bộ nhân viên ra file text một cách nguyên tử (file tạm, fsync, đổi tên)"""
+        self.write([self.record(emp) for emp in employees])
+    
+    @staticmethod
+    def record(emp):
+        """Bản ghi bất biến của một nhân viên để ghi sau (không còn phụ thuộc đối tượng): dòng text"""
+        return emp.to_txt_format()
+    
+    def write(self, records):
+        """Ghi các bản ghi của một snapshot ra file (nguyên tử), theo từng nhóm WRITE_CHUNK dòng"""
+        # Lưu các nhân viên không phải quản lý trước, sau đó mới đến các quản lý
+        lines = [line for line in records if not line.startswith("Manager|")]
+        lines += [line for line in records if line.startswith("Manager|")]
+        checksum = 0
+        with atomic_write(self.path) as f:
+            f.write(snapshot_header(0, 0))   # giữ chỗ, ghi lại khi đã biết checksum
+            for start in range(0, len(lines), self.WRITE_CHUNK):
+                data = ("\n".join(lines[start:start + self.WRITE_CHUNK]) + "\n").encode('utf-8')
+                checksum = zlib.crc32(data, checksum)
+                f.write(data)
+            f.seek(0)
+            f.write(snapshot_header(len(lines), checksum))
+
+
+class BinaryFileStorage:
+    """
+    Lưu snapshot nhân viên dạng nhị phân theo cột:
+    - header: magic, phiên bản, thứ tự byte, số dòng, số liên kết đội, độ dài 4 khối chuỗi
+    - cột mã loại (array 'b')
+    - hai cột số thực (array 'd'): lương cơ bản/lương theo giờ và năm kinh nghiệm/số giờ làm
+    - đội nhóm dạng CSR: offset theo từng dòng và danh sách số thứ tự dòng của thành viên
+    - bốn khối chuỗi UTF-8 (ID, tên, SĐT, email), các giá trị phân cách bằng ký tự NUL
+    Khi đọc, mỗi cột được nạp bằng một lần frombytes/split thay vì phân tích từng dòng.
+    Từ phiên bản 2, header có thêm CRC32 của toàn bộ phần sau header; file phiên bản 1 vẫn đọc được.
+    """
+    
+    MAGIC = b"EMSB"
+    VERSION = 2
+    HEADER = struct.Struct("<4sHBQQQQQQI")
+    HEADER_V1 = struct.Struct("<4sHBQQQQQQ")
+    
+    def __init__(self, path):
+        self.path = path
+    
+    def previous(self):
+        """Kho lưu trữ của thế hệ snapshot trước (path + ".prev"), None nếu không có"""
+        path = self.path + PREVIOUS_SUFFIX
+        return BinaryFileStorage(path) if os.path.exists(path) else None
+    
+    def save(self, employees):
+        """Ghi toàn bộ nhân viên ra file nhị phân"""
+        self.write([self.record(emp) for emp in employees])
+    
+    @staticmethod
+    def record(emp):
+        """Bản ghi bất biến của một nhân viên để ghi sau: (mã loại, ID, tên, SĐT, email, số a, số b, ID đội)"""
+        code = TYPE_CODES[type(emp)]
+        if code == 1:
+            num_a, num_b = emp.hourly_rate, emp.working_hours
+        else:
+            num_a, num_b = emp.base_salary, emp.experience_years
+        return (code, emp.employee_id, emp.name, emp.phone, emp.email, num_a, num_b,
+                tuple(emp.members) if code == 2 else ())
+    
+    def write(self, records):
+        """Dựng các cột từ các bản ghi của một snapshot rồi ghi ra file (nguyên tử)"""
+        codes, ids, names, phones, emails, values_a, values_b, teams = zip(*records) if records else [()] * 8
+        rows = {employee_id: i for i, employee_id in enumerate(ids)}
+        types = array('b', codes)
+        num_a = array('d', values_a)
+        num_b = array('d', values_b)
+        team_offsets = array('I', [0])
+        team_rows = array('I')
+        for team in teams:
+            team_rows.extend(rows[member_id] for member_id in team if member_id in rows)
+            team_offsets.append(len(team_rows))
+        
+        blobs = ['\0'.join(values).encode('utf-8') for values in (ids, names, phones, emails)]
+        checksum = 0
+        for block in (types, num_a, num_b, team_offsets, team_rows, *blobs):
+            checksum = zlib.crc32(block, checksum)
+        with atomic_write(self.path) as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.VERSION, sys.byteorder == 'little',
+                                     len(types), len(team_rows), *map(len, blobs), checksum))
+            for column in (types, num_a, num_b, team_offsets, team_rows):
+                column.tofile(f)
+            f.writelines(blobs)
+    
+    STRING_COLUMNS = ('ids', 'names', 'phones', 'emails')
+    
+    def read_columns(self, strings=STRING_COLUMNS):
+        """
+        Đọc file nhị phân thành các cột, không tạo đối tượng nhân viên:
+        trả về dict gồm types, num_a, num_b, team_offsets, team_rows (array)
+        và các cột chuỗi được yêu cầu trong strings (ids, names, phones, emails)
+        """
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        
+        magic, version = struct.unpack("<4sH", data[:6].ljust(6, b"\0"))
+        if magic == self.MAGIC and version > self.VERSION:
+            raise SnapshotVersionError(
+                f"Phiên bản định dạng {version} mới hơn chương trình (hỗ trợ đến {self.VERSION}).")
+        if magic != self.MAGIC or version not in (1, self.VERSION):
+            raise SnapshotError(f"File {self.path} không đúng định dạng dữ liệu nhị phân.")
+        header = self.HEADER if version == self.VERSION else self.HEADER_V1
+        if len(data) < header.size:
+            raise SnapshotError(f"File {self.path} bị cắt cụt (thiếu header).")
+        _, _, little, n, n_links, *blob_lens = header.unpack_from(data)
+        pos = header.size
+        if version == self.VERSION:
+            checksum = blob_lens.pop()
+            if zlib.crc32(memoryview(data)[pos:]) != checksum:
+                raise SnapshotError(f"Checksum của {self.path} không khớp (file hỏng hoặc bị cắt cụt).")
+        layout = (('types', 'b', n), ('num_a', 'd', n), ('num_b', 'd', n),
+                  ('team_offsets', 'I', n + 1), ('team_rows', 'I', n_links))
+        expected = pos + sum(array(typecode).itemsize * count for _, typecode, count in layout) + sum(blob_lens)
+        if len(data) != expected:
+            raise SnapshotError(f"File {self.path} dài {len(data)} byte, header cho biết {expected} byte.")
+        
+        columns = {}
+        for name, typecode, count in layout:
+            column = array(typecode)
+            end = pos + column.itemsize * count
+            column.frombytes(data[pos:end])
+            if little != (sys.byteorder == 'little'):
+                column.byteswap()
+            columns[name] = column
+            pos = end
+        
+        for name, length in zip(self.STRING_COLUMNS, blob_lens):
+            if name in strings:
+                columns[name] = data[pos:pos + length].decode('utf-8').split('\0') if n else []
+            pos += length
+        return columns
+    
+    def load(self):
+        """Đọc toàn bộ file nhị phân, trả về danh sách nhân viên (quản lý mang pending_team_ids)"""
+        columns = self.read_columns()
+        types, num_a, num_b = columns['types'], columns['num_a'], columns['num_b']
+        team_offsets, team_rows, ids = columns['team_offsets'], columns['team_rows'], columns['ids']
+        
+        employees = []
+        for i, common in enumerate(zip(ids, columns['names'], columns['phones'], columns['emails'])):
+            code = types[i]
+            if code == 1:
+                emp = PartTimeEmployee(*common, num_a[i], num_b[i])
+            elif code == 2:
+                emp = ManagerEmployee(*common, num_a[i], int(num_b[i]))
+                emp.pending_team_ids = [ids[r] for r in team_rows[team_offsets[i]:team_offsets[i + 1]]]
+            else:
+                emp = FullTimeEmployee(*common, num_a[i], int(num_b[i]))
+            employees.append(emp)
+        return employees
+
+class SQLiteStorage:
+    """
+    Lưu nhân viên trong cơ sở dữ liệu SQLite cục bộ.
+    - Bảng employees: mỗi nhân viên một dòng (FullTime, PartTime, Manager), cột salary được
+      tính sẵn khi ghi, cột name_folded là tên đã bỏ dấu (fold_text);
+      chỉ mục trên ID (UNIQUE), số điện thoại, lương và (loại, lương).
+      Tìm theo tên là tìm chuỗi con nên dùng bảng FTS5 employee_names (tokenizer trigram) trên
+      name_folded, được trigger giữ đồng bộ; chuỗi tìm ngắn hơn 3 ký tự (hoặc SQLite không có FTS5)
+      thì quét bảng bằng instr
+    - Bảng team_members: liên kết quản lý - nhân viên, giữ thứ tự thêm vào
+    Ngoài đọc/ghi snapshot, lớp này hỗ trợ ghi từng dòng (apply_changes) và các truy vấn
+    có chỉ mục để hệ thống không cần nạp toàn bộ dữ liệu vào bộ nhớ.
+    """
+    
+    COLUMNS = "employee_id, kind, name, phone, email, num_a, num_b"
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS employees (
+            row INTEGER PRIMARY KEY,
+            employee_id TEXT NOT NULL UNIQUE,
+            kind TEXT NOT NULL,
+            name TEXT NOT NULL,
+            name_folded TEXT NOT NULL,
+            phone TEXT NOT NULL,
+            email TEXT NOT NULL,
+            num_a REAL NOT NULL,
+            num_b REAL NOT NULL,
+            salary REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_employees_phone ON employees(phone);
+        DROP INDEX IF EXISTS idx_employees_name;
+        CREATE INDEX IF NOT EXISTS idx_employees_salary ON employees(salary DESC);
+        CREATE INDEX IF NOT EXISTS idx_employees_kind_salary ON employees(kind, salary DESC);
+        CREATE TABLE IF NOT EXISTS team_members (
+            manager_id TEXT NOT NULL,
+            employee_id TEXT NOT NULL,
+            UNIQUE (manager_id, employee_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_team_employee ON team_members(employee_id);
+    """
+    # Chỉ mục chuỗi con cho tên: bảng FTS5 trigram lấy nội dung từ employees (không chép dữ liệu),
+    # các trigger giữ bảng đồng bộ khi ghi từng dòng
+    NAME_INDEX = (
+        "CREATE VIRTUAL TABLE employee_names USING fts5("
+        "name_folded, content='employees', content_rowid='row', tokenize='trigram')",
+        "CREATE TRIGGER employee_names_insert AFTER INSERT ON employees BEGIN "
+        "INSERT INTO employee_names (rowid, name_folded) VALUES (new.row, new.name_folded); END",
+        "CREATE TRIGGER employee_names_delete AFTER DELETE ON employees BEGIN "
+        "INSERT INTO employee_names (employee_names, rowid, name_folded) "
+        "VALUES ('delete', old.row, old.name_folded); END",
+        "CREATE TRIGGER employee_names_update AFTER UPDATE OF name_folded ON employees BEGIN "
+        "INSERT INTO employee_names (employee_names, rowid, name_folded) "
+        "VALUES ('delete', old.row, old.name_folded); "
+        "INSERT INTO employee_names (rowid, name_folded) VALUES (new.row, new.name_folded); END",
+        "INSERT INTO employee_names (employee_names) VALUES ('rebuild')",
+    )
+    
+    def __init__(self, path):
+        self.path = path
+        # Tự quản lý giao dịch (BEGIN/COMMIT) để có thể gom nhiều thay đổi vào một giao dịch
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.executescript(self.SCHEMA)
+        self._tx_depth = 0
+        self.name_indexed = self._create_name_index()
+    
+    def _create_name_index(self):
+        """Tạo bảng FTS5 cho tên nếu chưa có (dựng từ dữ liệu hiện có); False nếu SQLite không hỗ trợ FTS5 trigram"""
+        if self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'employee_names'").fetchone():
+            return True
+        try:
+            with self.transaction():
+                for statement in self.NAME_INDEX:
+                    self.conn.execute(statement)
+        except sqlite3.OperationalError:
+            return False
+        return True
+    
+    @contextmanager
+    def transaction(self):
+        """Giao dịch lồng được: chỉ giao dịch ngoài cùng mới COMMIT, có ngoại lệ thì ROLLBACK"""
+        if not self._tx_depth:
+            self.conn.execute("BEGIN")
+        self._tx_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._tx_depth -= 1
+            if not self._tx_depth:
+                self.conn.execute("ROLLBACK")
+            raise
+        self._tx_depth -= 1
+        if not self._tx_depth:
+            self.conn.execute("COMMIT")
+    
+    def _row(self, emp):
+        """Chuyển nhân viên thành bộ giá trị để ghi vào bảng employees"""
+        if isinstance(emp, PartTimeEmployee):
+            num_a, num_b = emp.hourly_rate, emp.working_hours
+        else:
+            num_a, num_b = emp.base_salary, emp.experience_years
+        return (emp.employee_id, employee_type(emp), emp.name, fold_text(emp.name),
+                emp.phone, emp.email, num_a, num_b, emp.calculate_salary())
+    
+    @staticmethod
+    def _to_employee(row):
+        """Tạo đối tượng nhân viên từ một dòng kết quả truy vấn (không kèm đội nhóm)"""
+        employee_id, kind, name, phone, email, num_a, num_b = row
+        if kind == "PartTime":
+            return PartTimeEmployee(employee_id, name, phone, email, num_a, num_b)
+        cls = ManagerEmployee if kind == "Manager" else FullTimeEmployee
+        return cls(employee_id, name, phone, email, num_a, int(num_b))
+    
+    def record(self, emp):
+        """Bản ghi bất biến của một nhân viên để ghi sau: (dòng của bảng employees, ID các thành viên đội)"""
+        team_ids = getattr(emp, 'pending_team_ids', None) or [m.employee_id for m in getattr(emp, 'team', [])]
+        return self._row(emp), team_ids
+    
+    def _insert(self, row, team_ids):
+        """Chèn một nhân viên (và các ID đội nhóm của họ nếu có)"""
+        self.conn.execute(
+            "INSERT OR IGNORE INTO employees (employee_id, kind, name, name_folded, phone, email, "
+            "num_a, num_b, salary) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+        employee_id = row[0]
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO team_members (manager_id, employee_id) VALUES (?, ?)",
+            ((employee_id, emp_id) for emp_id in team_ids))
+    
+    def load(self):
+        """Đọc toàn bộ nhân viên (quản lý mang pending_team_ids)"""
+        teams = {}
+        for manager_id, employee_id in self.conn.execute(
+                "SELECT manager_id, employee_id FROM team_members ORDER BY rowid"):
+            teams.setdefault(manager_id, []).append(employee_id)
+        employees = []
+        for row in self.conn.execute(f"SELECT {self.COLUMNS} FROM employees ORDER BY row"):
+            emp = self._to_employee(row)
+            if isinstance(emp, ManagerEmployee):
+                emp.pending_team_ids = teams.get(emp.employee_id)
+            employees.append(emp)
+        return employees
+    
+    def save(self, employees):
+        """Ghi đè toàn bộ dữ liệu trong một giao dịch"""
+        self.write([self.record(emp) for emp in employees])
+    
+    def write(self, records):
+        """Thay toàn bộ dữ liệu bằng các dòng của một snapshot trong một giao dịch"""
+        with self.transaction():
+            if self.name_indexed:
+                # Ghi lại cả bảng: bỏ chỉ mục tên rồi dựng lại một lần, thay vì trigger cập nhật từng dòng
+                for name in ("insert", "delete", "update"):
+                    self.conn.execute(f"DROP TRIGGER employee_names_{name}")
+                self.conn.execute("DROP TABLE employee_names")
+            self.conn.execute("DELETE FROM team_members")
+            self.conn.execute("DELETE FROM employees")
+            for row, team_ids in records:
+                self._insert(row, team_ids)
+            if self.name_indexed:
+                for statement in self.NAME_INDEX:
+                    self.conn.execute(statement)
+    
+    def apply_changes(self, records):
+        """Áp dụng các bản ghi thay đổi (cùng định dạng với nhật ký) bằng lệnh ghi từng dòng"""
+        with self.transaction():
+            for op, *fields in records:
+                if op == "ADD":
+                    emp = parse_record(fields[0])
+                    if emp is not None:
+                        self._insert(*self.record(emp))
+                elif op == "UPD":
+                    emp = parse_record(fields[0])
+                    if emp is not None:
+                        employee_id, kind, *values = self._row(emp)
+                        self.conn.execute(
+                            "UPDATE employees SET name = ?, name_folded = ?, phone = ?, email = ?, "
+                            "num_a = ?, num_b = ?, salary = ? WHERE employee_id = ?",
+                            (*values, employee_id))
+                elif op == "DEL":
+                    self.conn.execute("DELETE FROM employees WHERE employee_id = ?", fields)
+                    self.conn.execute("DELETE FROM team_members WHERE employee_id = ? OR manager_id = ?",
+                                      fields * 2)
+                elif op == "TEAM_ADD":
+                    self.conn.execute(
+                        "INSERT OR IGNORE INTO team_members (manager_id, employee_id) VALUES (?, ?)", fields)
+                elif op == "TEAM_DEL":
+                    self.conn.execute(
+                        "DELETE FROM team_members WHERE manager_id = ? AND employee_id = ?", fields)
+    
+    def get(self, employee_id):
+        """Tìm nhân viên theo ID (quản lý được nạp kèm đội nhóm)"""
+        row = self.conn.execute(
+            f"SELECT {self.COLUMNS} FROM employees WHERE employee_id = ?", (employee_id,)).fetchone()
+        if row is None:
+            return None
+        emp = self._to_employee(row)
+        if isinstance(emp, ManagerEmployee):
+            for member in self.conn.execute(
+                    f"SELECT {', '.join('e.' + c.strip() for c in self.COLUMNS.split(','))} "
+                    "FROM team_members t JOIN employees e ON e.employee_id = t.employee_id "
+                    "WHERE t.manager_id = ? ORDER BY t.rowid", (employee_id,)):
+                emp.add_employee(self._to_employee(member))
+        return emp
+    
+    def contains(self, employee_id):
+        """Kiểm tra ID đã tồn tại hay chưa"""
+        return self.conn.execute(
+            "SELECT 1 FROM employees WHERE employee_id = ?", (employee_id,)).fetchone() is not None
+    
+    def managers_of(self, employee_id):
+        """Các quản lý có nhân viên này trong đội (chỉ mục idx_team_employee)"""
+        cursor = self.conn.execute(
+            f"SELECT {', '.join('e.' + c.strip() for c in self.COLUMNS.split(','))} "
+            "FROM team_members t JOIN employees e ON e.employee_id = t.manager_id "
+            "WHERE t.employee_id = ? ORDER BY t.rowid", (employee_id,))
+        return [self._to_employee(row) for row in cursor]
+    
+    def reporting_chain(self, manager_id):
+        """ID các quản lý cấp trên của manager_id, từ trực tiếp đến cao nhất"""
+        return [row[0] for row in self.conn.execute(
+            "WITH RECURSIVE chain(employee_id) AS ("
+            "  SELECT manager_id FROM team_members WHERE employee_id = ?"
+            "  UNION SELECT t.manager_id FROM team_members t JOIN chain c ON t.employee_id = c.employee_id"
+            ") SELECT employee_id FROM chain", (manager_id,))]
+    
+    def has_manager(self, employee_id):
+        """Nhân viên đã thuộc đội của ít nhất một quản lý hay chưa"""
+        return self.conn.execute(
+            "SELECT 1 FROM team_members WHERE employee_id = ? LIMIT 1", (employee_id,)).fetchone() is not None
+    
+    def org_stats(self, manager_id):
+        """(số người, quỹ lương) của tổ chức dưới quản lý, tính bằng truy vấn đệ quy"""
+        count, total = self.conn.execute(
+            "WITH RECURSIVE org(employee_id) AS ("
+            "  SELECT ? UNION"
+            "  SELECT t.employee_id FROM team_members t JOIN org o ON t.manager_id = o.employee_id"
+            ") SELECT COUNT(*), COALESCE(SUM(e.salary), 0) FROM org "
+            "JOIN employees e ON e.employee_id = org.employee_id", (manager_id,)).fetchone()
+        return count, total
+    
+    def in_team(self, manager_id, employee_id):
+        """Kiểm tra nhân viên có trong đội của quản lý hay không"""
+        return self.conn.execute(
+            "SELECT 1 FROM team_members WHERE manager_id = ? AND employee_id = ?",
+            (manager_id, employee_id)).fetchone() is not None
+    
+    def kind_of(self, employee_id):
+        """Trả về loại nhân viên ("FullTime", "PartTime", "Manager") hoặc None"""
+        row = self.conn.execute(
+            "SELECT kind FROM employees WHERE employee_id = ?", (employee_id,)).fetchone()
+        return row[0] if row else None
+    
+    def iter_employees(self, kind=None):
+        """Duyệt nhân viên theo thứ tự thêm vào, có thể lọc theo loại (không kèm đội nhóm)"""
+        if kind is None:
+            cursor = self.conn.execute(f"SELECT {self.COLUMNS} FROM employees ORDER BY row")
+        else:
+            cursor = self.conn.execute(
+                f"SELECT {self.COLUMNS} FROM employees WHERE kind = ? ORDER BY row", (kind,))
+        for row in cursor:
+            yield self._to_employee(row)
+    
+    def count(self):
+        """Số nhân viên trong cơ sở dữ liệu"""
+        return self.conn.execute("SELECT COUNT(*) FROM employees").fetchone()[0]
+    
+    def find_by_name(self, name):
+        """Tìm nhân viên có tên chứa chuỗi name (không phân biệt hoa thường và dấu) qua chỉ mục trigram"""
+        query = fold_text(name)
+        if self.name_indexed and len(query) >= 3:
+            # Cụm trong ngoặc kép: tokenizer trigram khớp đúng chuỗi con, kể cả khoảng trắng
+            cursor = self.conn.execute(
+                f"SELECT {self.COLUMNS} FROM employees WHERE row IN "
+                "(SELECT rowid FROM employee_names WHERE employee_names MATCH ?) ORDER BY row",
+                ('"' + query.replace('"', '""') + '"',))
+        else:
+            cursor = self.conn.execute(
+                f"SELECT {self.COLUMNS} FROM employees WHERE instr(name_folded, ?) > 0 ORDER BY row",
+                (query,))
+        return [self._to_employee(row) for row in cursor]
+    
+    def find_by_phone(self, phone, match="auto"):
+        """Tìm tất cả nhân viên theo số điện thoại (cùng các kiểu khớp như find_employee_by_phone)"""
+        queries = {
+            # Khớp chính xác và tiền tố dùng chỉ mục idx_employees_phone
+            "exact": ("phone = ?", (phone,)),
+            "prefix": ("phone >= ? AND phone < ?", (phone, phone + "\uffff")),
+            "substring": ("instr(phone, ?) > 0", (phone,)),
+        }
+        if match != "auto" and match not in queries:
+            raise ValueError(f"Kiểu khớp không hợp lệ: {match}")
+        for kind in (("exact", "prefix", "substring") if match == "auto" else (match,)):
+            where, params = queries[kind]
+            cursor = self.conn.execute(
+                f"SELECT {self.COLUMNS} FROM employees WHERE {where} ORDER BY row", params)
+            result = [self._to_employee(row) for row in cursor]
+            if result:
+                break
+        return result
+    
+    def total_salary(self, kind=None):
+        """Tổng lương (tất cả hoặc theo loại)"""
+        if kind is None:
+            row = self.conn.execute("SELECT TOTAL(salary) FROM employees").fetchone()
+        else:
+            row = self.conn.execute("SELECT TOTAL(salary) FROM employees WHERE kind = ?", (kind,)).fetchone()
+        return row[0]
+    
+    def top_salary(self, n, kind=None, ascending=False):
+        """n nhân viên lương cao nhất (hoặc thấp nhất) dạng (nhân viên, lương), đọc theo chỉ mục lương"""
+        order = "salary, row DESC" if ascending else "salary DESC, row"
+        if kind is None:
+            cursor = self.conn.execute(
+                f"SELECT {self.COLUMNS}, salary FROM employees ORDER BY {order} LIMIT ?", (n,))
+        else:
+            cursor = self.conn.execute(
+                f"SELECT {self.COLUMNS}, salary FROM employees WHERE kind = ? ORDER BY {order} LIMIT ?",
+                (kind, n))
+        return [(self._to_employee(row[:-1]), row[-1]) for row in cursor]
+    
+    def salary_rank(self, employee_id, by_kind=False):
+        """Hạng lương (1 là cao nhất) của nhân viên: đếm theo chỉ mục số người đứng trước"""
+        row = self.conn.execute(
+            "SELECT kind, salary, row FROM employees WHERE employee_id = ?", (employee_id,)).fetchone()
+        if row is None:
+            return None
+        kind, salary, position = row
+        where = "(salary > ? OR (salary = ? AND row < ?))"
+        params = [salary, salary, position]
+        if by_kind:
+            where = "kind = ? AND " + where
+            params.insert(0, kind)
+        return self.conn.execute(f"SELECT COUNT(*) FROM employees WHERE {where}", params).fetchone()[0] + 1
+    
+    def close(self):
+        self.conn.close()
+
+
+SQLITE_SUFFIXES = (".db", ".sqlite")
+
+
+def open_storage(path, workers=None):
+    """
+    Chọn kiểu lưu trữ theo phần mở rộng: .bin là nhị phân, .db/.sqlite là SQLite, còn lại là text
+    (workers: số tiến trình đọc file text song song)
+    """
+    if path.endswith(".bin"):
+        return BinaryFileStorage(path)
+    if path.endswith(SQLITE_SUFFIXES):
+        return SQLiteStorage(path)
+    return TextFileStorage(path, workers)
+
+
+def convert_data_file(source, target):
+    """Chuyển đổi file dữ liệu giữa định dạng text và nhị phân (theo phần mở rộng), trả về số bản ghi"""
+    employees = {}
+    managers = []
+    for emp in open_storage(source).load():
+        if emp.employee_id not in employees:
+            employees[emp.employee_id] = emp
+            if isinstance(emp, ManagerEmployee):
+                managers.append(emp)
+    for manager in managers:
+        for emp_id in manager.pending_team_ids or ():
+            if emp_id in employees:
+                manager.add_employee(employees[emp_id])
+        manager.pending_team_ids = None
+    open_storage(target).save(employees.values())
+    return len(employees)
+
+
+# Các cột của file nhập hàng loạt (CSV có dòng tiêu đề, JSONL mỗi dòng một object)
+IMPORT_FIELDS = ("type", "employee_id", "name", "phone", "email", "base_salary",
+                 "experience_years", "hourly_rate", "working_hours", "team")
+
+
+def _import_number(row, field, kind):
+    """Đọc một trường số của dòng nhập (kind là int hoặc float)"""
+    value = row.get(field)
+    if value is None or value == "":
+        raise ValueError(f"Thiếu trường {field}.")
+    if isinstance(value, bool):
+        raise ValueError(f"Trường {field} phải là số: {value!r}")
+    if kind is int and isinstance(value, float) and not value.is_integer():
+        # int(1.9) cắt thành 1: từ chối như khi nhập tay hoặc qua hàm khởi tạo
+        raise ValueError(f"Trường {field} phải là số nguyên: {value!r}")
+    try:
+        return kind(value.strip() if isinstance(value, str) else value)
+    except (TypeError, ValueError):
+        kind_name = "số nguyên" if kind is int else "số"
+        raise ValueError(f"Trường {field} phải là {kind_name}: {value!r}") from None
+
+
+def employee_from_row(row):
+    """
+    Tạo nhân viên từ một dòng nhập (dict đọc từ CSV/JSONL), kiểm tra bằng chính hàm khởi tạo.
+    Trả về (nhân viên, danh sách ID thành viên đội); dữ liệu sai ném ValueError.
+    """
+    kind = str(row.get("type") or "").strip()
+    if kind not in TYPE_NAMES:
+        raise ValueError(f"Loại nhân viên không hợp lệ: {kind!r}")
+    employee_id = str(row.get("employee_id") or "").strip()
+    if not employee_id:
+        raise ValueError("Mã nhân viên không được để trống.")
+    name, phone, email = (str(row.get(field) or "").strip() for field in ("name", "phone", "email"))
+    
+    if kind == "PartTime":
+        numbers = (_import_number(row, "hourly_rate", float), _import_number(row, "working_hours", float))
+    else:
+        numbers = (_import_number(row, "base_salary", float), _import_number(row, "experience_years", int))
+    emp = TYPE_CLASSES[TYPE_NAMES.index(kind)](employee_id, name, phone, email, *numbers)
+    
+    team = row.get("team") if kind == "Manager" else None
+    if team is None or team == "":
+        return emp, []
+    if isinstance(team, str):
+        return emp, [emp_id.strip() for emp_id in team.split(';') if emp_id.strip()]
+    if not isinstance(team, list) or not all(isinstance(emp_id, str) for emp_id in team):
+        raise ValueError(f"Trường team phải là chuỗi ID phân cách bằng ';' hoặc danh sách ID: {team!r}")
+    return emp, list(team)
+
+
+def employee_to_row(emp):
+    """Chuyển nhân viên thành dict theo các cột IMPORT_FIELDS (ngược với employee_from_row)"""
+    row = {"type": employee_type(emp), "employee_id": emp.employee_id, "name": emp.name,
+           "phone": emp.phone, "email": emp.email}
+    if isinstance(emp, PartTimeEmployee):
+        row.update(hourly_rate=emp.hourly_rate, working_hours=emp.working_hours)
+    else:
+        row.update(base_salary=emp.base_salary, experience_years=emp.experience_years)
+    if isinstance(emp, ManagerEmployee):
+        row["team"] = list(emp.members)
+    return row
+
+
+def _csv_rows(f):
+    with f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield reader.line_num, row, None
+
+
+def _jsonl_rows(f):
+    with f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_no, None, f"JSON không hợp lệ: {e}"
+                continue
+            if isinstance(row, dict):
+                yield line_no, row, None
+            else:
+                yield line_no, None, "Mỗi dòng JSONL phải là một object."
+
+
+def iter_import_rows(path):
+    """
+    Mở file nhập và trả về generator (số dòng, dict, lỗi) cho từng bản ghi, đọc theo luồng.
+    Định dạng theo phần mở rộng: .csv hoặc .jsonl/.ndjson; file được mở ngay để báo lỗi sớm.
+    """
+    if path.endswith(".csv"):
+        return _csv_rows(open(path, newline='', encoding='utf-8-sig'))
+    if path.endswith((".jsonl", ".ndjson")):
+        return _jsonl_rows(open(path, encoding='utf-8-sig'))
+    raise ValueError(f"Không hỗ trợ định dạng file nhập: {path} (dùng .csv hoặc .jsonl)")
+
+
+class ImportReport:
+    """Kết quả nhập hàng loạt: số dòng đọc được, số nhân viên đã thêm, lỗi từng dòng và thời gian"""
+    
+    def __init__(self, path):
+        self.path = path
+        self.total = 0
+        self.imported = 0
+        self.errors = []     # danh sách (số dòng, thông báo lỗi)
+        self.seconds = 0.0
+    
+    @property
+    def rows_per_second(self):
+        return self.total / self.seconds if self.seconds else 0.0
+    
+    def summary(self, max_errors=20):
+        """Chuỗi tóm tắt kết quả, kèm tối đa max_errors lỗi đầu tiên"""
+        lines = [f"Đã nhập {self.imported}/{self.total} dòng từ {self.path} trong {self.seconds:.2f}s "
+                 f"({self.rows_per_second:,.0f} dòng/giây), {len(self.errors)} lỗi."]
+        lines += [f"- Dòng {line_no}: {message}" for line_no, message in self.errors[:max_errors]]
+        if len(self.errors) > max_errors:
+            lines.append(f"- ... và {len(self.errors) - max_errors} lỗi khác")
+        return "\n".join(lines)
+
+
+class ChangeJournal:
+    """
+    Nhật ký thay đổi chỉ ghi nối (append-only) đi kèm file dữ liệu.
+    Mỗi thay đổi là một dòng nhỏ dạng "<thao tác>|<dữ liệu>":
+    - ADD|<bản ghi to_txt_format>
+    - UPD|<bản ghi to_txt_format sau khi cập nhật>
+    - DEL|<mã nhân viên>
+    - TEAM_ADD|<mã quản lý>|<mã nhân viên>
+    - TEAM_DEL|<mã quản lý>|<mã nhân viên>
+    Phát lại nhật ký lên snapshot mới hơn vẫn cho kết quả đúng (các thao tác lũy đẳng theo thứ tự).
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.entries = 0
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = sum(1 for line in f if line.strip())
+    
+    def append(self, *fields):
+        """Ghi nối một bản ghi thay đổi vào cuối nhật ký"""
+        self.extend([fields])
+    
+    def extend(self, records):
+        """Ghi nối nhiều bản ghi thay đổi trong một lần mở file"""
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.writelines('|'.join(fields) + "\n" for fields in records)
+        self.entries += len(records)
+    
+    def replay(self):
+        """Đọc lần lượt các bản ghi, trả về (thao tác, phần dữ liệu còn lại)"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    op, _, payload = line.partition('|')
+                    yield op, payload
+    
+    def clear(self):
+        """Xóa toàn bộ nhật ký (sau khi đã gộp vào snapshot)"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.entries = 0
+
+
+class BackgroundWriter:
+    """
+    Luồng nền ghi snapshot thay cho luồng gọi: mỗi thay đổi chỉ đánh dấu "cần ghi" (mark_dirty),
+    luồng nền chờ đến khi không có thay đổi mới trong `delay` giây (nhưng không quá `max_delay`
+    giây kể từ thay đổi đầu tiên) rồi gọi write() một lần cho cả loạt thay đổi.
+    flush() yêu cầu ghi ngay và chờ đến khi mọi thay đổi trước đó đã được ghi.
+    """
+    
+    def __init__(self, write, delay=0.5, max_delay=5.0):
+        self._write = write
+        self.delay = delay
+        self.max_delay = max_delay
+        self._cond = threading.Condition()
+        self._requested = 0        # số lần mark_dirty đến nay
+        self._written = 0          # giá trị _requested đã được ghi xong
+        self._first_change = None  # thời điểm thay đổi đầu tiên chưa ghi (None: không có gì chờ ghi)
+        self._last_change = None
+        self._urgent = False
+        self._closed = False
+        self.ok = True             # kết quả lần ghi gần nhất
+        self.writes = 0
+        self._thread = threading.Thread(target=self._run, name="employee-writer", daemon=True)
+        self._thread.start()
+    
+    @property
+    def pending(self):
+        """Còn thay đổi chưa được ghi xuống đĩa hay không"""
+        return self._written < self._requested
+    
+    def mark_dirty(self):
+        """Ghi nhận có thay đổi mới; không chờ ghi"""
+        with self._cond:
+            now = time.monotonic()
+            if self._first_change is None:
+                self._first_change = now
+            self._last_change = now
+            self._requested += 1
+            self._cond.notify_all()
+    
+    def _wait_for_quiet(self):
+        """Chờ (đang giữ _cond) đến khi hết thời gian gom, có yêu cầu ghi ngay hoặc bị đóng"""
+        while not self._urgent and not self._closed:
+            deadline = min(self._last_change + self.delay, self._first_change + self.max_delay)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            self._cond.wait(remaining)
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._first_change is None and not self._closed:
+                    self._cond.wait()
+                if self._first_change is None:
+                    return
+                self._wait_for_quiet()
+                target = self._requested
+                self._first_change = self._last_change = None
+                self._urgent = False
+            # Ghi ngoài _cond để các thay đổi mới vẫn đánh dấu được trong lúc đang ghi
+            try:
+                ok = self._write() is not False
+            except Exception as e:
+                print(f"❌ Lỗi khi ghi dữ liệu ở luồng nền: {e}")
+                ok = False
+            with self._cond:
+                self.ok = ok
+                self.writes += 1
+                self._written = target
+                self._cond.notify_all()
+    
+    def flush(self, timeout=None):
+        """Ghi ngay các thay đổi đang chờ và đợi ghi xong; trả về False nếu ghi lỗi hoặc hết thời gian chờ"""
+        with self._cond:
+            target = self._requested
+            if self._written >= target:
+                return self.ok
+            self._urgent = True
+            self._cond.notify_all()
+            done = self._cond.wait_for(lambda: self._written >= target or not self._thread.is_alive(), timeout)
+            return done and self._written >= target and self.ok
+    
+    def close(self, timeout=None):
+        """Ghi nốt các thay đổi rồi dừng luồng nền"""
+        ok = self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        return ok
+
+
+class _LockSide:
+    """Một phía (đọc hoặc ghi) của RWLock, dùng được với câu lệnh `with`"""
+    __slots__ = ('acquire', 'release')
+    
+    def __init__(self, acquire, release):
+        self.acquire = acquire
+        self.release = release
+    
+    def __enter__(self):
+        self.acquire()
+        return self
+    
+    def __exit__(self, *exc):
+        self.release()
+
+
+class RWLock:
+    """
+    Khóa đọc/ghi: nhiều luồng cùng giữ khóa đọc, khóa ghi là độc quyền.
+    - Ưu tiên ghi: khi có luồng chờ ghi, luồng đọc mới phải chờ (luồng ghi không bị đói)
+    - Lấy lại được: luồng đang đọc đọc tiếp, luồng đang ghi ghi tiếp hoặc đọc mà không tự chặn mình
+    - Không nâng khóa đọc lên khóa ghi (hai luồng cùng nâng sẽ chờ nhau mãi): báo RuntimeError
+    Dùng qua hai phía `reader` và `writer`: `with lock.reader: ...`
+    """
+    
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0           # số luồng đang giữ khóa đọc
+        self._writer = None         # ident của luồng đang giữ khóa ghi
+        self._write_depth = 0
+        self._waiting_writers = 0
+        self._local = threading.local()   # số lần lấy khóa đọc lồng nhau của từng luồng
+        self.reader = _LockSide(self.acquire_read, self.release_read)
+        self.writer = _LockSide(self.acquire_write, self.release_write)
+    
+    def acquire_read(self):
+        local = self._local
+        depth = getattr(local, 'depth', 0)
+        if depth:
+            local.depth = depth + 1
+            return
+        if self._writer == threading.get_ident():
+            # Đang giữ khóa ghi: đọc luôn, không tính vào số luồng đọc
+            local.depth, local.counted = 1, False
+            return
+        with self._cond:
+            while self._writer is not None or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        local.depth, local.counted = 1, True
+    
+    def release_read(self):
+        local = self._local
+        local.depth -= 1
+        if not local.depth and local.counted:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+    
+    def acquire_write(self):
+        me = threading.get_ident()
+        if self._writer == me:
+            self._write_depth += 1
+            return
+        if getattr(self._local, 'depth', 0):
+            raise RuntimeError("Không thể lấy khóa ghi khi đang giữ khóa đọc")
+        with self._cond:
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._write_depth = 1
+    
+    def release_write(self):
+        self._write_depth -= 1
+        if not self._write_depth:
+            with self._cond:
+                self._writer = None
+                self._cond.notify_all()
+
+
+# Các thao tác chỉ đọc được giữ khóa đọc trong chế độ đồng thời (thay đổi và chụp snapshot giữ khóa ghi)
+CONCURRENT_READS = (
+    "find_employee_by_id", "find_employee_by_name", "find_employee_by_phone", "list_employees",
+    "display_all_employees", "display_employees_by_type",
+    "get_managers_of", "get_org_stats", "get_reporting_chain",
+    "calculate_total_salary", "calculate_total_salary_by_type", "run_payroll",
+    "get_top_salary_employees", "get_bottom_salary_employees", "get_salary_rank",
+)
+
+
+def _read_locked(lock, func, materialize=False):
+    """Bọc func để chạy trong khóa đọc; materialize: chép kết quả (view/dãy lười) thành list trước khi nhả khóa"""
+    @functools.wraps(func)
+    def locked(*args, **kwargs):
+        with lock:
+            result = func(*args, **kwargs)
+            return list(result) if materialize else result
+    return locked
+
+
+# Các thao tác của EmployeeManagementSystem được đo khi bật Instrumentation
+INSTRUMENTED_OPERATIONS = (
+    "load_data", "save_data", "compact", "import_employees",
+    "add_employee", "update_employee", "delete_employee", "add_team_member", "remove_team_member",
+    "find_employee_by_id", "find_employee_by_name", "find_employee_by_phone", "list_employees",
+    "get_managers_of", "get_org_stats", "get_reporting_chain",
+    "calculate_total_salary", "calculate_total_salary_by_type", "run_payroll",
+    "get_top_salary_employees", "get_bottom_salary_employees", "get_salary_rank",
+)
+# Các thao tác báo lỗi bằng cách trả về False (lỗi I/O đã được in ra rồi nuốt mất)
+FALLIBLE_OPERATIONS = frozenset({"load_data", "save_data", "compact"})
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+class OperationStats:
+    """
+    Số liệu của một thao tác: số lần gọi, số lần lỗi, tổng/lớn nhất thời gian và
+    histogram độ trễ theo lũy thừa 2: ô b đếm các lần gọi có độ trễ trong [2^(b-1), 2^b) µs (ô 0: < 1 µs).
+    Ở chế độ đồng thời nhiều luồng đọc cùng ghi nhận, nên mỗi lần cập nhật được giữ bởi một khóa nhỏ.
+    """
+    __slots__ = ('calls', 'errors', 'total_ns', 'max_ns', 'buckets', '_lock')
+    
+    BUCKETS = 40
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+    
+    def clear(self):
+        with self._lock:
+            self.calls = 0
+            self.errors = 0
+            self.total_ns = 0
+            self.max_ns = 0
+            self.buckets = [0] * self.BUCKETS
+    
+    def record(self, ns, failed=False):
+        bucket = min((ns // 1000).bit_length(), self.BUCKETS - 1)
+        with self._lock:
+            self.calls += 1
+            self.errors += failed
+            self.total_ns += ns
+            if ns > self.max_ns:
+                self.max_ns = ns
+            self.buckets[bucket] += 1
+    
+    def percentile(self, q):
+        """Cận trên (µs) của ô histogram chứa phân vị q"""
+        target = q * self.calls
+        seen = 0
+        for b, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= target:
+                return 2 ** b
+        return 0
+    
+    def to_dict(self):
+        with self._lock:
+            return self._to_dict()
+    
+    def _to_dict(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_ms": self.total_ns / 1e6,
+            "mean_us": self.total_ns / self.calls / 1e3 if self.calls else 0.0,
+            "max_us": self.max_ns / 1e3,
+            "p50_us_le": self.percentile(0.50),
+            "p99_us_le": self.percentile(0.99),
+            "histogram_us": {f"<{2 ** b}": count for b, count in enumerate(self.buckets) if count},
+        }
+
+
+class Instrumentation:
+    """
+    Đo hiệu năng tùy chọn cho một EmployeeManagementSystem: số lần gọi, histogram độ trễ
+    của từng thao tác và số byte đọc/ghi file (snapshot, nhật ký).
+    Khi bật, các phương thức được bọc ngay trên đối tượng hệ thống (thuộc tính của instance che
+    phương thức của lớp); khi tắt, các lớp bọc bị gỡ bỏ nên không còn chi phí nào.
+    Với SQLite, dữ liệu được ghi từng dòng bên trong thư viện nên không đếm số byte.
+    """
+    
+    def __init__(self):
+        self.operations = {}
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self._io_lock = threading.Lock()   # bộ đếm byte được cập nhật từ luồng ghi nền lẫn luồng gọi
+        self.started = time.time()
+        self._patched = []
+    
+    def stats(self, name):
+        stats = self.operations.get(name)
+        if stats is None:
+            stats = self.operations[name] = OperationStats()
+        return stats
+    
+    def wrap(self, name, func):
+        """Bọc func để ghi nhận thời gian mỗi lần gọi vào số liệu của thao tác name"""
+        stats = self.stats(name)
+        fallible = name in FALLIBLE_OPERATIONS
+        clock = time.perf_counter_ns
+        
+        @functools.wraps(func)
+        def measured(*args, **kwargs):
+            start = clock()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                stats.record(clock() - start, True)
+                raise
+            stats.record(clock() - start, fallible and result is False)
+            return result
+        return measured
+    
+    def _patch(self, target, name, replacement):
+        # Nhớ thuộc tính cũ của instance (ví dụ lớp bọc khóa đọc của chế độ đồng thời) để trả lại khi gỡ
+        self._patched.append((target, name, target.__dict__.get(name)))
+        setattr(target, name, replacement)
+    
+    def _count_io(self, target, read, write, append):
+        """Đếm byte khi target đọc (cả file) hoặc ghi (cả file, hoặc phần ghi nối nếu append)"""
+        path = getattr(target, 'path', None)
+        if path is None or hasattr(target, 'apply_changes'):
+            return
+        reader, writer = getattr(target, read), getattr(target, write)
+        
+        def counted_read(*args, **kwargs):
+            size = _file_size(path)
+            with self._io_lock:
+                self.bytes_read += size
+            return reader(*args, **kwargs)
+        
+        def counted_write(*args, **kwargs):
+            before = _file_size(path) if append else 0
+            try:
+                return writer(*args, **kwargs)
+            finally:
+                size = _file_size(path) - before
+                with self._io_lock:
+                    self.bytes_written += size
+        
+        self._patch(target, read, counted_read)
+        self._patch(target, write, counted_write)
+    
+    def attach(self, system):
+        """Bọc các thao tác của hệ thống, kho lưu trữ và nhật ký thay đổi"""
+        for name in INSTRUMENTED_OPERATIONS:
+            self._patch(system, name, self.wrap(name, getattr(system, name)))
+        self._count_io(system.storage, 'load', 'write', append=False)
+        if system.journal is not None:
+            self._count_io(system.journal, 'replay', 'extend', append=True)
+    
+    def detach(self):
+        """Gỡ mọi lớp bọc, các đối tượng trở lại như trước khi bật đo"""
+        for target, name, previous in reversed(self._patched):
+            if previous is None:
+                target.__dict__.pop(name, None)
+            else:
+                setattr(target, name, previous)
+        self._patched = []
+    
+    def reset(self):
+        """Xóa số liệu đã ghi nhận (vẫn tiếp tục đo)"""
+        for stats in self.operations.values():
+            stats.clear()
+        with self._io_lock:
+            self.bytes_read = self.bytes_written = 0
+        self.started = time.time()
+    
+    def snapshot(self):
+        """Số liệu hiện tại dạng dict (ghi được ra JSON)"""
+        return {
+            "seconds": time.time() - self.started,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "operations": {name: stats.to_dict() for name, stats in self.operations.items() if stats.calls},
+        }
+    
+    def dump(self, path):
+        """Ghi số liệu hiện tại ra file JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+    
+    def report(self):
+        """Bảng số liệu để hiển thị, thao tác tốn nhiều thời gian nhất lên đầu"""
+        lines = [f"Đọc {self.bytes_read:,} byte, ghi {self.bytes_written:,} byte "
+                 f"trong {time.time() - self.started:.1f}s"]
+        ranked = sorted((item for item in self.operations.items() if item[1].calls),
+                        key=lambda item: item[1].total_ns, reverse=True)
+        for name, stats in ranked:
+            lines.append(f"  {name:<32} | {stats.calls:>8,} lần | lỗi {stats.errors:>4} | "
+                         f"tổng {stats.total_ns / 1e6:10.1f} ms | tb {stats.total_ns / stats.calls / 1e3:10.1f} µs | "
+                         f"p99 ≤ {stats.percentile(0.99):,} µs")
+        return "\n".join(lines)
+
+
 class EmployeeManagementSystem:
     """Hệ thống quản lý nhân viên"""
     
-    def __init__(self):
-        self.employees = []
-        self.data_file = "employees_data.txt"
-        self.load_data()
+    # Số nhân viên được tạo bản ghi trong một lần giữ khóa khi chụp snapshot
+    SNAPSHOT_CHUNK = 1000
+    
+    def __init__(self, data_file="employees_data.txt", journal=False, compact_threshold=1000,
+                 storage=None, instrument=False, write_delay=None, concurrent=False):
+        # Chỉ mục khóa chính: employee_id -> nhân viên (dict giữ thứ tự thêm vào)
+        # và các chỉ mục phụ, được cập nhật dần khi thêm/sửa/xóa
+        self._reset_indexes()
+        self.data_file = data_file
+        # Kho lưu trữ: truyền vào trực tiếp, hoặc chọn theo đuôi file (.bin, .db/.sqlite, còn lại là text)
+        self.storage = storage if storage is not None else open_storage(data_file)
+        # Chế độ nhật ký: mỗi thay đổi chỉ ghi nối một dòng, định kỳ gộp lại thành snapshot
+        self.journal = ChangeJournal(data_file + ".journal") if journal else None
+        self.compact_threshold = compact_threshold
+        # Batch: các thay đổi chờ lưu khi đang ở trong `with system.batch()`
+        self._batch_depth = 0
+        self._pending = []
+        # Khóa thay đổi: các thao tác thêm/sửa/xóa giữ khóa, việc lưu chỉ giữ khóa khi chụp snapshot
+        self._lock = threading.RLock()
+        # Khóa ghi file; số thứ tự của snapshot được chụp gần nhất và của snapshot đã ghi xuống đĩa
+        # (một snapshot cũ hơn bản đã ghi thì bỏ qua, không ghi đè bản mới hơn)
+        self._save_lock = threading.Lock()
+        self._snapshots_taken = 0
+        self._snapshot_written = 0
+        # Các snapshot đang chụp, mỗi cái một dict: id(đối tượng) -> bản ghi của nó trước khi bị sửa
+        self._preserved = []
+        self._rwlock = None
+        if concurrent:
+            self._enable_concurrency()
+        self.writer = None
+        # Đường dẫn file dữ liệu không đọc được (hỏng hoặc lỗi truy cập): chặn ghi cho đến khi allow_writes()
+        self.writes_blocked = None
+        # Đo hiệu năng (tùy chọn): None khi tắt, các phương thức chạy thẳng không qua lớp bọc nào
+        self.metrics = None
+        if instrument:
+            self.enable_instrumentation()
+        self.load_data()
+        # Ghi nền (tùy chọn): thay đổi được gom lại và ghi snapshot sau write_delay giây không có thay đổi mới
+        if write_delay is not None and not hasattr(self.storage, 'apply_changes'):
+            self.writer = BackgroundWriter(self._background_save, write_delay)
+    
+    @property
+    def employees(self):
+        """Danh sách nhân viên theo thứ tự thêm vào (view chỉ đọc của chỉ mục ID)"""
+        return self._employees.values()
+    
+    def _enable_concurrency(self):
+        """
+        Chế độ đồng thời (dùng chung hệ thống giữa nhiều luồng): khóa thay đổi trở thành phía ghi
+        của một RWLock, các thao tác chỉ đọc được bọc (trên instance) để giữ phía đọc.
+        Kết quả dạng view/dãy lười của list_employees được chép thành list trước khi nhả khóa.
+        """
+        self._rwlock = RWLock()
+        self._lock = self._rwlock.writer
+        for name in CONCURRENT_READS:
+            setattr(self, name, _read_locked(self._rwlock.reader, getattr(self, name),
+                                             materialize=name == "list_employees"))
+    
+    def read_lock(self):
+        """Khóa đọc để duyệt trực tiếp `employees` hoặc gộp nhiều truy vấn thành một lần đọc nhất quán"""
+        return self._rwlock.reader if self._rwlock is not None else nullcontext()
+    
+    def write_lock(self):
+        """Khóa thay đổi (lấy lại được) để gộp đọc-rồi-ghi thành một bước, không xen thay đổi hay lần chụp snapshot nào"""
+        return self._lock
+    
+    def enable_instrumentation(self):
+        """Bật đo hiệu năng cho các thao tác của hệ thống; trả về đối tượng Instrumentation"""
+        if self.metrics is None:
+            self.metrics = Instrumentation()
+            self.metrics.attach(self)
+        return self.metrics
+    
+    def disable_instrumentation(self):
+        """Tắt đo hiệu năng; trả về số liệu đã thu được (None nếu chưa bật)"""
+        metrics, self.metrics = self.metrics, None
+        if metrics is not None:
+            metrics.detach()
+        return metrics
+    
+    def _persist(self, *record):
+        """Lưu một thay đổi: ghi nối vào nhật ký nếu bật, nếu không thì ghi lại toàn bộ file"""
+        if self._batch_depth:
+            # Đang trong batch: hoãn việc lưu đến khi commit
+            self._pending.append(record)
+            return True
+        return self._write_records([record])
     
-    def add_employee(self, employee):
-        """Thêm nhân viên mới vào hệ thống"""
-        # Kiểm tra xem ID đã tồn tại chưa
-        for emp in self.employees:
-            if emp.employee_id == employee.employee_id:
+    def _write_records(self, records):
+        """Ghi một nhóm thay đổi xuống đĩa theo chế độ lưu trữ hiện tại"""
+        if hasattr(self.storage, 'apply_changes'):
+            # Kho lưu trữ hỗ trợ ghi từng dòng (SQLite): không cần ghi lại toàn bộ
+            try:
+                self.storage.apply_changes(records)
+                return True
+            except sqlite3.Error as e:
+                print(f"❌ Lỗi khi ghi cơ sở dữ liệu: {e}")
+                return False
+        if self._writes_refused():
+            return False
+        if self.journal is None:
+            if self.writer is not None:
+                # Ghi nền: chỉ đánh dấu, luồng nền gom các thay đổi liên tiếp thành một lần ghi
+                self.writer.mark_dirty()
+                return True
+            return self.save_data()
+        try:
+            self.journal.extend(records)
+        except OSError as e:
+            print(f"❌ Lỗi khi ghi nhật ký thay đổi: {e}")
+            return False
+        if self.journal.entries >= self.compact_threshold:
+            return self.compact()
+        return True
+    
+    @contextmanager
+    def batch(self):
+        """
+        Gom nhiều thay đổi và lưu một lần duy nhất khi khối `with` kết thúc.
+        Nếu có ngoại lệ trong khối, không có gì được lưu và dữ liệu trong bộ nhớ
+        được đọc lại từ đĩa. Batch lồng nhau được gộp vào batch ngoài cùng.
+        """
+        if not self._batch_depth and self.writer is not None:
+            # File trên đĩa phải khớp trạng thái trước batch thì mới hủy batch bằng cách đọc lại được
+            self.writer.flush()
+        # Giữ khóa suốt batch: luồng ghi nền không ghi được trạng thái dở dang của batch
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._batch_depth -= 1
+                if not self._batch_depth:
+                    self._pending = []
+                    self.load_data()
+                raise
+            self._batch_depth -= 1
+            if not self._batch_depth and self._pending:
+                records, self._pending = self._pending, []
+                self._write_records(records)
+    
+    def _background_save(self):
+        """Hàm ghi của luồng nền (gọi save_data qua thuộc tính để vẫn được đo khi bật Instrumentation)"""
+        return self.save_data()
+    
+    def flush(self, timeout=None):
+        """Chờ ghi xong mọi thay đổi đang chờ của luồng ghi nền (không có luồng nền: đã ghi ngay)"""
+        if self.writer is None:
+            return True
+        return self.writer.flush(timeout)
+    
+    def close(self):
+        """Ghi nốt các thay đổi và dừng luồng ghi nền"""
+        writer, self.writer = self.writer, None
+        return writer.close() if writer is not None else True
+    
+    def compact(self):
+        """Gộp nhật ký thay đổi vào một snapshot mới của file dữ liệu"""
+        with self._lock:
+            if not self.save_data():
                 return False
+            if self.journal is not None:
+                self.journal.clear()
+            return True
+    
+    def _reset_indexes(self):
+        """Xóa dữ liệu trong bộ nhớ và tạo lại các chỉ mục rỗng"""
+        self._employees = {}
+        self._order = {}      # employee_id -> số thứ tự thêm vào (sắp xếp kết quả tìm kiếm)
+        self._seq = 0
+        self.name_index = NameIndex()
+        self.phone_index = PhoneIndex()
+        self.payroll = PayrollTotals()
+        self.ranking = SalaryRanking()
+        # Chỉ mục ngược: employee_id -> các ID quản lý có nhân viên này trong đội (dict giữ thứ tự)
+        self._memberships = {}
+        self.org = OrgTree()
+    
+    def _ordered(self, ids):
+        """Sắp xếp các employee_id theo thứ tự thêm vào và trả về danh sách nhân viên"""
+        employees = self._employees
+        if len(ids) * 8 > len(employees):
+            # Kết quả lớn: duyệt theo thứ tự của dict rẻ hơn sắp xếp
+            matched = set(ids)
+            return [emp for employee_id, emp in employees.items() if employee_id in matched]
+        return [employees[employee_id] for employee_id in sorted(ids, key=self._order.__getitem__)]
+    
+    def _apply_add(self, employee):
+        """Thêm nhân viên vào bộ nhớ và các chỉ mục (không lưu file)"""
+        employee_id = employee.employee_id
+        if employee_id in self._employees:
+            return False
+        members = ()
+        if isinstance(employee, ManagerEmployee) and employee.members:
+            # Đội có sẵn được gắn lại qua _apply_team_add để kiểm tra vòng lặp và cập nhật chỉ mục;
+            # đối tượng được lưu nhận dict đội mới, dict của người gọi giữ nguyên
+            members = list(employee.members)
+            employee.members = {}
+        self._employees[employee_id] = employee
+        self._order[employee_id] = self._seq
+        self._seq += 1
+        self.name_index.add(employee)
+        self.phone_index.add(employee_id, employee.phone)
+        self.payroll.add(employee)
+        self.ranking.add(employee, self._order[employee_id], employee.calculate_salary())
+        if isinstance(employee, ManagerEmployee):
+            self.org.add_manager(employee_id, employee.calculate_salary())
+            for member_id in members:
+                self._apply_team_add(employee_id, member_id)
+        return True
+    
+    def _is_current(self, emp):
+        """emp có phải là đối tượng đang được quản lý (không phải bản sao tạm) hay không"""
+        return self._employees.get(emp.employee_id) is emp
+    
+    def _apply_update(self, emp, updated_info):
+        """Chép các trường hợp lệ từ updated_info sang emp và cập nhật chỉ mục (không lưu file)"""
+        # Chỉ cập nhật chỉ mục khi emp là đối tượng đang được quản lý trong bộ nhớ
+        indexed = self._is_current(emp)
+        if indexed:
+            self._preserve(emp)
+        old_salary = emp.calculate_salary()
+        
+        # Cập nhật thông tin riêng cho từng loại nhân viên (property kiểm tra lại từng giá trị được ghi),
+        # làm trước khi đổi tên/SĐT trong các chỉ mục
+        if isinstance(emp, FullTimeEmployee) and isinstance(updated_info, FullTimeEmployee):
+            if updated_info.base_salary > 0:
+                emp.base_salary = updated_info.base_salary
+            if updated_info.experience_years >= 0:
+                emp.experience_years = updated_info.experience_years
+        
+        elif isinstance(emp, PartTimeEmployee) and isinstance(updated_info, PartTimeEmployee):
+            if updated_info.hourly_rate > 0:
+                emp.hourly_rate = updated_info.hourly_rate
+            if updated_info.working_hours >= 0:
+                emp.working_hours = updated_info.working_hours
+        
+        if hasattr(updated_info, 'name') and updated_info.name:
+            if indexed:
+                self.name_index.rename(emp.employee_id, emp.name, updated_info.name)
+            emp.name = updated_info.name
+        if hasattr(updated_info, 'phone') and updated_info.phone:
+            if indexed and updated_info.phone != emp.phone:
+                self.phone_index.remove(emp.employee_id, emp.phone)
+                self.phone_index.add(emp.employee_id, updated_info.phone)
+            emp.phone = updated_info.phone
+        if hasattr(updated_info, 'email') and updated_info.email:
+            emp.email = updated_info.email
+        
+        new_salary = emp.calculate_salary()
+        if indexed and new_salary != old_salary:
+            self.payroll.adjust(emp, new_salary - old_salary)
+            self.org.salary_changed(emp.employee_id, new_salary - old_salary,
+                                    self._memberships.get(emp.employee_id, ()))
+            seq = self._order[emp.employee_id]
+            self.ranking.remove(emp, seq, old_salary)
+            self.ranking.add(emp, seq, new_salary)
+    
+    def _apply_delete(self, employee_id):
+        """Xóa nhân viên khỏi bộ nhớ và các chỉ mục (không lưu file)"""
+        emp = self._employees.get(employee_id)
+        if emp is None:
+            return False
+        
+        # Gỡ nhân viên khỏi mọi đội chứa họ; nếu là quản lý thì giải tán đội của họ
+        # (các quản lý cấp dưới trở thành gốc của nhánh riêng)
+        for manager_id in list(self._memberships.get(employee_id, ())):
+            self._apply_team_remove(manager_id, employee_id)
+        if isinstance(emp, ManagerEmployee):
+            for member_id in list(emp.members):
+                self._apply_team_remove(employee_id, member_id)
+            self.org.remove_manager(employee_id)
         
-        self.employees.append(employee)
-        self.save_data()
+        del self._employees[employee_id]
+        seq = self._order.pop(employee_id)
+        self.name_index.remove(emp)
+        self.phone_index.remove(employee_id, emp.phone)
+        self.payroll.remove(emp)
+        self.ranking.remove(emp, seq, emp.calculate_salary())
+        return True
+    
+    def _link_member(self, manager_id, employee_id):
+        self._memberships.setdefault(employee_id, {})[manager_id] = None
+    
+    def _unlink_member(self, manager_id, employee_id):
+        managers = self._memberships.get(employee_id)
+        if managers is not None:
+            managers.pop(manager_id, None)
+            if not managers:
+                del self._memberships[employee_id]
+    
+    def _get_team_pair(self, manager_id, employee_id):
+        """Trả về (quản lý, nhân viên) nếu cả hai tồn tại và manager_id là quản lý"""
+        manager = self._employees.get(manager_id)
+        employee = self._employees.get(employee_id)
+        if not isinstance(manager, ManagerEmployee) or employee is None:
+            return None, None
+        return manager, employee
+    
+    def _add_to_team(self, manager_id, employee_id):
+        manager, employee = self._get_team_pair(manager_id, employee_id)
+        if manager is None or manager.has_member(employee_id):
+            return False
+        self._preserve(manager)
+        return manager.add_employee(employee)
+    
+    def _remove_from_team(self, manager_id, employee_id):
+        manager = self._employees.get(manager_id)
+        if not isinstance(manager, ManagerEmployee) or not manager.has_member(employee_id):
+            return False
+        self._preserve(manager)
+        return manager.remove_employee(employee_id)
+    
+    def _apply_team_add(self, manager_id, employee_id):
+        """Thêm nhân viên vào đội của quản lý trong bộ nhớ (kèm chỉ mục ngược và cây tổ chức)"""
+        if not self.org.can_link(manager_id, employee_id) or not self._add_to_team(manager_id, employee_id):
+            return False
+        others = list(self._memberships.get(employee_id, ()))
+        self._link_member(manager_id, employee_id)
+        self.org.link(manager_id, employee_id, self._employees[employee_id].calculate_salary(), others)
         return True
     
+    def _apply_team_remove(self, manager_id, employee_id):
+        """Xóa nhân viên khỏi đội của quản lý trong bộ nhớ (kèm chỉ mục ngược và cây tổ chức)"""
+        if not self._remove_from_team(manager_id, employee_id):
+            return False
+        self._unlink_member(manager_id, employee_id)
+        self.org.unlink(manager_id, employee_id, self._employees[employee_id].calculate_salary(),
+                        list(self._memberships.get(employee_id, ())))
+        return True
+    
+    def add_employee(self, employee):
+        """Thêm nhân viên mới vào hệ thống; False nếu ID đã tồn tại hoặc thay đổi không lưu được"""
+        with self._lock:
+            # Không đọc được file dữ liệu: từ chối trước khi đổi dữ liệu trong bộ nhớ
+            if self._writes_refused():
+                return False
+            # Kiểm tra xem ID đã tồn tại chưa - O(1) nhờ chỉ mục
+            if not self._apply_add(employee):
+                return False
+            return self._persist("ADD", employee.to_txt_format())
+    
     def update_employee(self, employee_id, updated_info):
-        """Cập nhật thông tin nhân viên"""
-        for i, emp in enumerate(self.employees):
-            if emp.employee_id == employee_id:
-                # Cập nhật thông tin
-                if hasattr(updated_info, 'name') and updated_info.name:
-                    emp.name = updated_info.name
-                if hasattr(updated_info, 'phone') and updated_info.phone:
-                    emp.phone = updated_info.phone
-                if hasattr(updated_info, 'email') and updated_info.email:
-                    emp.email = updated_info.email
-                
-                # Cập nhật thông tin riêng cho từng loại nhân viên
-                if isinstance(emp, FullTimeEmployee) and isinstance(updated_info, FullTimeEmployee):
-                    if updated_info.base_salary > 0:
-                        emp.base_salary = updated_info.base_salary
-                    if updated_info.experience_years >= 0:
-                        emp.experience_years = updated_info.experience_years
-                
-                elif isinstance(emp, PartTimeEmployee) and isinstance(updated_info, PartTimeEmployee):
-                    if updated_info.hourly_rate > 0:
-                        emp.hourly_rate = updated_info.hourly_rate
-                    if updated_info.working_hours >= 0:
-                        emp.working_hours = updated_info.working_hours
-                
-                self.save_data()
-                return True
-        return False
+        """Cập nhật thông tin nhân viên; False nếu không tìm thấy hoặc thay đổi không lưu được"""
+        with self._lock:
+            if self._writes_refused():
+                return False
+            emp = self._employees.get(employee_id)
+            if emp is None:
+                return False
+            
+            self._apply_update(emp, updated_info)
+            return self._persist("UPD", emp.to_txt_format())
     
     def delete_employee(self, employee_id):
-        """Xóa nhân viên khỏi hệ thống"""
-        for i, emp in enumerate(self.employees):
-            if emp.employee_id == employee_id:
-                self.employees.pop(i)
-                self.save_data()
-                return True
-        return False
+        """Xóa nhân viên khỏi hệ thống; False nếu không tìm thấy hoặc thay đổi không lưu được"""
+        with self._lock:
+            if self._writes_refused() or not self._apply_delete(employee_id):
+                return False
+            return self._persist("DEL", employee_id)
+    
+    def add_team_member(self, manager_id, employee_id):
+        """Thêm nhân viên vào đội của quản lý và lưu thay đổi; False nếu không thêm hoặc không lưu được"""
+        with self._lock:
+            if self._writes_refused() or not self._apply_team_add(manager_id, employee_id):
+                return False
+            return self._persist("TEAM_ADD", manager_id, employee_id)
+    
+    def remove_team_member(self, manager_id, employee_id):
+        """Xóa nhân viên khỏi đội của quản lý và lưu thay đổi; False nếu không xóa hoặc không lưu được"""
+        with self._lock:
+            if self._writes_refused() or not self._apply_team_remove(manager_id, employee_id):
+                return False
+            return self._persist("TEAM_DEL", manager_id, employee_id)
+    
+    def import_employees(self, path, chunk_size=1000):
+        """
+        Nhập hàng loạt nhân viên từ file CSV/JSONL (không hỏi từng trường):
+        - Đọc theo luồng, kiểm tra từng nhóm chunk_size dòng bằng các hàm khởi tạo
+        - Dòng lỗi (dữ liệu sai, trùng ID) được ghi lại trong báo cáo, không dừng việc nhập
+        - Toàn bộ thay đổi nằm trong một batch: chỉ lưu xuống đĩa một lần
+        Đội của quản lý (cột team) được gắn sau khi đã thêm mọi dòng. Trả về ImportReport.
+        """
+        report = ImportReport(path)
+        if self._writes_refused():
+            return report
+        rows = iter_import_rows(path)
+        start = time.perf_counter()
+        teams = []   # (số dòng, ID quản lý, danh sách ID thành viên)
+        with self.batch():
+            for chunk in iter(lambda: list(islice(rows, chunk_size)), []):
+                report.total += len(chunk)
+                for line_no, row, error in chunk:
+                    if error is None:
+                        try:
+                            emp, team = employee_from_row(row)
+                        except ValueError as e:
+                            error = str(e)
+                        else:
+                            if self.add_employee(emp):
+                                report.imported += 1
+                                if team:
+                                    teams.append((line_no, emp.employee_id, team))
+                                continue
+                            error = f"Mã nhân viên {emp.employee_id} đã tồn tại."
+                    report.errors.append((line_no, error))
+            
+            for line_no, manager_id, team in teams:
+                for emp_id in team:
+                    if not self.add_team_member(manager_id, emp_id):
+                        report.errors.append(
+                            (line_no, f"Không thể thêm {emp_id} vào đội của {manager_id} "
+                                      f"(không tồn tại hoặc đã có trong đội)."))
+        report.seconds = time.perf_counter() - start
+        return report
     
     def find_employee_by_id(self, employee_id):
         """Tìm kiếm nhân viên theo ID"""
-        for emp in self.employees:
-            if emp.employee_id == employee_id:
-                return emp
-        return None
+        return self._employees.get(employee_id)
+    
+    def get_managers_of(self, employee_id):
+        """Danh sách các quản lý có nhân viên này trong đội (theo thứ tự được thêm vào đội)"""
+        employees = self._employees
+        return [employees[manager_id] for manager_id in self._memberships.get(employee_id, ())]
+    
+    def get_org_stats(self, manager_id):
+        """(số người, quỹ lương) của cả tổ chức dưới quản lý, gồm chính họ - O(1); None nếu không phải quản lý"""
+        return self.org.stats(manager_id)
+    
+    def get_reporting_chain(self, manager_id):
+        """Các quản lý cấp trên của manager_id, từ trực tiếp đến cao nhất"""
+        chain = []
+        node = self.org.parent(manager_id)
+        while node is not None:
+            chain.append(self._employees[node])
+            node = self.org.parent(node)
+        return chain
     
     def find_employee_by_name(self, name):
-        """Tìm kiếm nhân viên theo tên"""
-        result = []
-        for emp in self.employees:
-            if name.lower() in emp.name.lower():
-                result.append(emp)
-        return result
+        """Tìm kiếm nhân viên theo tên (chuỗi con, không phân biệt hoa thường và dấu)"""
+        return self._ordered(self.name_index.search(name))
+    
+    def find_employee_by_phone(self, phone, match="auto"):
+        """
+        Tìm tất cả nhân viên theo số điện thoại, kiểu khớp:
+        - "exact": đúng số; "prefix": bắt đầu bằng; "substring": chứa chuỗi
+        - "auto" (mặc định): thử lần lượt exact, prefix, substring đến khi có kết quả
+        """
+        index = self.phone_index
+        if match == "auto":
+            ids = index.exact(phone) or index.prefix(phone) or index.substring(phone)
+        elif match == "exact":
+            ids = index.exact(phone)
+        elif match == "prefix":
+            ids = index.prefix(phone)
+        elif match == "substring":
+            ids = index.substring(phone)
+        else:
+            raise ValueError(f"Kiểu khớp không hợp lệ: {match}")
+        return self._ordered(ids)
+    
+    def list_employees(self, employee_type=None):
+        """Danh sách nhân viên để hiển thị: tất cả (employee_type=None) hoặc theo loại"""
+        if employee_type is None:
+            return self.employees
+        if employee_type == "FullTime":
+            return [emp for emp in self.employees if isinstance(emp, FullTimeEmployee) and not isinstance(emp, ManagerEmployee)]
+        elif employee_type == "PartTime":
+            return [emp for emp in self.employees if isinstance(emp, PartTimeEmployee)]
+        elif employee_type == "Manager":
+            return [emp for emp in self.employees if isinstance(emp, ManagerEmployee)]
+        return []
+    
+    def iter_employees(self, employee_type=None):
+        """
+        Duyệt lười các nhân viên (tất cả hoặc theo loại), không dựng danh sách trung gian.
+        Khi dùng chung hệ thống giữa nhiều luồng, hãy duyệt trong `with system.read_lock():`.
+        """
+        if employee_type is None:
+            return iter(self.employees)
+        if employee_type not in TYPE_NAMES:
+            return iter(())
+        cls = TYPE_CLASSES[TYPE_NAMES.index(employee_type)]
+        return (emp for emp in self.employees if type(emp) is cls)
+    
+    def render_employees(self, employee_type=None, offset=0, limit=None):
+        """
+        Generator các dòng của danh sách nhân viên: tiêu đề rồi mỗi nhân viên một dòng, bắt đầu từ
+        vị trí offset (tính từ 0), tối đa limit nhân viên. Không trả về dòng nào nếu không có nhân viên.
+        Bộ nhớ không phụ thuộc số nhân viên: mỗi dòng được tạo khi bên gọi cần đến.
+        """
+        stop = None if limit is None else offset + limit
+        employees = islice(self.iter_employees(employee_type), offset, stop)
+        first = next(employees, None)
+        if first is None:
+            return
+        yield "DANH SÁCH NHÂN VIÊN:" if employee_type is None else f"DANH SÁCH NHÂN VIÊN {employee_type.upper()}:"
+        yield first.display_info()
+        for emp in employees:
+            yield emp.display_info()
     
-    def find_employee_by_phone(self, phone):
-        """Tìm kiếm nhân viên theo số điện thoại"""
-        for emp in self.employees:
-            if phone in emp.phone:
-                return emp
-        return None
-            
     def display_all_employees(self):
         """Hiển thị danh sách tất cả nhân viên"""
-        if not self.employees:
-            return "Không có nhân viên nào trong hệ thống."
-        
-        result = "DANH SÁCH NHÂN VIÊN:\n"
-        for emp in self.employees:
-            result += f"{emp.display_info()}\n"
-        return result
+        output = "".join(f"{line}\n" for line in self.render_employees())
+        return output or "Không có nhân viên nào trong hệ thống."
     
     def display_employees_by_type(self, employee_type):
         """Hiển thị danh sách nhân viên theo loại"""
-        result = []
-        
-        if employee_type == "FullTime":
-            result = [emp for emp in self.employees if isinstance(emp, FullTimeEmployee) and not isinstance(emp, ManagerEmployee)]
-        elif employee_type == "PartTime":
-            result = [emp for emp in self.employees if isinstance(emp, PartTimeEmployee)]
-        elif employee_type == "Manager":
-            result = [emp for emp in self.employees if isinstance(emp, ManagerEmployee)]
-        
-        if not result:
-            return f"Không có nhân viên {employee_type} nào trong hệ thống."
-        
-        output = f"DANH SÁCH NHÂN VIÊN {employee_type.upper()}:\n"
-        for emp in result:
-            output += f"{emp.display_info()}\n"
-        return output
+        output = "".join(f"{line}\n" for line in self.render_employees(employee_type))
+        return output or f"Không có nhân viên {employee_type} nào trong hệ thống."
     
     def calculate_total_salary(self):
-        """Tính tổng lương của tất cả nhân viên"""
-        total_salary = 0
-        for emp in self.employees:
-            total_salary += emp.calculate_salary()
-        return total_salary
+        """Tính tổng lương của tất cả nhân viên (đọc tổng được duy trì sẵn, O(1))"""
+        return self.payroll.total()
     
     def calculate_total_salary_by_type(self, employee_type):
-        """Tính tổng lương theo loại nhân viên"""
-        total_salary = 0
-        
-        if employee_type == "FullTime":
-            for emp in self.employees:
-                if isinstance(emp, FullTimeEmployee) and not isinstance(emp, ManagerEmployee):
-                    total_salary += emp.calculate_salary()
-        elif employee_type == "PartTime":
-            for emp in self.employees:
-                if isinstance(emp, PartTimeEmployee):
-                    total_salary += emp.calculate_salary()
-        elif employee_type == "Manager":
-            for emp in self.employees:
-                if isinstance(emp, ManagerEmployee):
-                    total_salary += emp.calculate_salary()
-        
-        return total_salary
+        """Tính tổng lương theo loại nhân viên (đọc tổng được duy trì sẵn, O(1))"""
+        return self.payroll.total(employee_type)
+    
+    def _salary_ranking(self):
+        """Bảng xếp hạng lương, dựng ở lần truy vấn đầu tiên rồi cập nhật dần"""
+        if not self.ranking.built:
+            self.ranking.build(self.run_payroll(), self._order)
+        return self.ranking
+    
+    def run_payroll(self, use_numpy=True):
+        """Tính lương của toàn bộ nhân viên một lượt bằng PayrollEngine (theo cột, vector hóa)"""
+        return PayrollEngine.from_employees(self.employees, use_numpy)
     
-    def get_top_salary_employees(self, n=3):
-        """Lấy danh sách n nhân viên có lương cao nhất"""
-        # Tạo list các tuple (employee, salary)
-        emp_salary_list = [(emp, emp.calculate_salary()) for emp in self.employees]
-        # Sắp xếp theo lương giảm dần
-        emp_salary_list.sort(key=lambda x: x[1], reverse=True)
-        # Trả về n nhân viên đầu tiên
-        return emp_salary_list[:n]
+    def get_top_salary_employees(self, n=3, employee_type=None):
+        """Lấy danh sách n nhân viên có lương cao nhất (tất cả hoặc theo loại), dạng (nhân viên, lương)"""
+        employees = self._employees
+        return [(employees[employee_id], salary)
+                for employee_id, salary in self._salary_ranking().top(n, employee_type)]
+    
+    def get_bottom_salary_employees(self, n=3, employee_type=None):
+        """Lấy danh sách n nhân viên có lương thấp nhất (tất cả hoặc theo loại), dạng (nhân viên, lương)"""
+        employees = self._employees
+        return [(employees[employee_id], salary)
+                for employee_id, salary in self._salary_ranking().bottom(n, employee_type)]
+    
+    def get_salary_rank(self, employee_id, by_type=False):
+        """Hạng lương của nhân viên (1 là cao nhất) trong toàn hệ thống hoặc trong loại của họ"""
+        emp = self._employees.get(employee_id)
+        if emp is None:
+            return None
+        group = employee_type(emp) if by_type else None
+        return self._salary_ranking().rank(emp, self._order[employee_id], group)
     
     def save_data(self):
-        """Lưu dữ liệu nhân viên vào file text"""
+        """
+        Lưu dữ liệu nhân viên vào file (text hoặc nhị phân). Khóa thay đổi chỉ được giữ từng đoạn ngắn
+        khi chụp snapshot (xem _snapshot_records); mã hóa, ghi và fsync chạy ngoài khóa.
+        """
+        with self._lock:
+            if self._writes_refused():
+                return False
         try:
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                # Đầu tiên lưu các nhân viên không phải quản lý
-                for emp in self.employees:
-                    if not isinstance(emp, ManagerEmployee):
-                        f.write(emp.to_txt_format() + "\n")
-                
-                # Sau đó lưu các quản lý
-                for emp in self.employees:
-                    if isinstance(emp, ManagerEmployee):
-                        f.write(emp.to_txt_format() + "\n")
+            number, records = self._snapshot_records()
+            with self._save_lock:
+                if number > self._snapshot_written:
+                    self.storage.write(records)
+                    self._snapshot_written = number
             return True
         except Exception as e:
             print(f"❌ Lỗi khi lưu file dữ liệu: {e}")
             return False
     
+    def _snapshot_records(self):
+        """
+        Bản ghi của mọi nhân viên tại một thời điểm, không giữ khóa thay đổi suốt O(N):
+        - Trong khóa chỉ chép danh sách đối tượng (mức C, vài ms với hàng trăm nghìn người)
+        - Bản ghi được tạo theo từng nhóm SNAPSHOT_CHUNK người, mỗi nhóm giữ khóa một lần ngắn
+        - Giữa các nhóm, thao tác nào sửa tại chỗ một đối tượng đã chụp sẽ lưu lại bản ghi cũ của nó
+          trước (_preserve), nên snapshot vẫn đúng như lúc chụp
+        Trả về (số thứ tự của snapshot, danh sách bản ghi).
+        """
+        record = self.storage.record
+        preserved = {}
+        with self._lock:
+            employees = self._capture_employees()
+            self._snapshots_taken += 1
+            number = self._snapshots_taken
+            self._preserved.append(preserved)
+        records = []
+        try:
+            for start in range(0, len(employees), self.SNAPSHOT_CHUNK):
+                with self._lock:
+                    for emp in employees[start:start + self.SNAPSHOT_CHUNK]:
+                        old = preserved.get(id(emp))
+                        records.append(record(emp) if old is None else old)
+                # Nhường luồng đang chờ khóa chạy trước khi lấy lại khóa cho nhóm tiếp theo
+                time.sleep(0)
+        finally:
+            with self._lock:
+                self._preserved = [other for other in self._preserved if other is not preserved]
+        return number, records
+    
+    def _capture_employees(self):
+        """Danh sách các đối tượng nhân viên hiện tại (gọi trong khóa thay đổi)"""
+        return list(self._employees.values())
+    
+    def _preserve(self, emp):
+        """Gọi trước khi sửa tại chỗ emp: với mỗi snapshot đang chụp, giữ lại bản ghi hiện tại của nó"""
+        for preserved in self._preserved:
+            if id(emp) not in preserved:
+                preserved[id(emp)] = self.storage.record(emp)
+    
     def load_data(self):
-        """Đọc dữ liệu nhân viên từ file text"""
-        self.employees = []
+        """Đọc dữ liệu nhân viên từ file (snapshot), sau đó phát lại nhật ký thay đổi nếu có"""
+        with self._lock:
+            self._reset_indexes()
+            
+            if not os.path.exists(self.data_file) and not os.path.exists(self.data_file + PREVIOUS_SUFFIX):
+                print(f"File {self.data_file} không tồn tại. Tạo hệ thống mới.")
+                loaded = None
+            else:
+                loaded = self._load_snapshot()
+            
+            if self.journal is not None and loaded is not False:
+                return self._replay_journal()
+            return loaded
+    
+    def _resolve_teams(self, managers):
+        """Gắn các nhân viên vào đội của quản lý theo danh sách pending_team_ids"""
+        for manager in managers:
+            for emp_id in manager.pending_team_ids or ():
+                self._apply_team_add(manager.employee_id, emp_id)
+            
+            # Đã gắn xong, bỏ danh sách chờ
+            manager.pending_team_ids = None
+    
+    def _load_from(self, storage):
+        """Nạp các nhân viên của một kho lưu trữ vào bộ nhớ (dữ liệu cũ đã được xóa)"""
+        managers = []
+        for emp in storage.load():
+            # Giữ bản ghi đầu tiên nếu trùng ID (giống tìm kiếm tuyến tính trước đây)
+            if self._apply_add(emp) and isinstance(emp, ManagerEmployee):
+                managers.append(emp)
         
-        if not os.path.exists(self.data_file):
-            print(f"File {self.data_file} không tồn tại. Tạo hệ thống mới.")
-            return
+        # Sau khi quét xong, thiết lập các đội nhóm cho quản lý trong một lượt
+        self._resolve_teams(managers)
         
+        skipped = getattr(storage, 'skipped', None)
+        if skipped:
+            lines = ", ".join(map(str, skipped[:10])) + (", ..." if len(skipped) > 10 else "")
+            print(f"⚠️  Bỏ qua {len(skipped)} dòng không hợp lệ trong {storage.path} (dòng {lines}).")
+    
+    def _load_snapshot(self):
+        """
+        Đọc snapshot nhân viên theo luồng (text) hoặc đọc khối theo cột (nhị phân).
+        Nếu file chính hỏng (checksum sai, bị cắt cụt) hoặc không còn, đọc thế hệ trước (FILE.prev);
+        file hỏng được đổi tên thành FILE.corrupt để lần ghi sau không đẩy mất thế hệ trước còn tốt.
+        Lỗi không do file hỏng (quyền truy cập, I/O, định dạng mới hơn) dừng việc đọc, không đổi tên gì.
+        """
+        path = getattr(self.storage, 'path', self.data_file)
+        if os.path.exists(path):
+            try:
+                self._load_from(self.storage)
+                print(f"Đã đọc dữ liệu từ file {self.data_file} thành công.")
+                return True
+            except CORRUPTION_ERRORS as e:
+                print(f"❌ File dữ liệu bị hỏng: {e}")
+            except Exception as e:
+                return self._abort_load(path, e)
+        
+        previous = self.storage.previous() if hasattr(self.storage, 'previous') else None
+        if previous is None:
+            return self._quarantine(path)
+        self._reset_indexes()
         try:
-            # Đọc tất cả các dòng từ file
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            
-            # Đầu tiên, tạo tất cả các đối tượng nhân viên
-            managers = []
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                
-                parts = line.split('|')
-                if len(parts) < 2:
-                    continue
-                
-                employee_type = parts[0]
-                
-                if employee_type == "FullTime":
-                    emp = FullTimeEmployee.from_txt_format(line)
-                    if emp:
-                        self.employees.append(emp)
-                
-                elif employee_type == "PartTime":
-                    emp = PartTimeEmployee.from_txt_format(line)
-                    if emp:
-                        self.employees.append(emp)
-                
-                elif employee_type == "Manager":
-                    manager = ManagerEmployee.from_txt_format(line)
-                    if manager:
-                        self.employees.append(manager)
-                        managers.append(manager)
-            
-            # Sau đó, thiết lập các đội nhóm cho quản lý
-            for manager in managers:
-                if hasattr(manager, 'team_ids') and manager.team_ids:
-                    for emp_id in manager.team_ids:
-                        emp = self.find_employee_by_id(emp_id)
-                        if emp:
-                            manager.add_employee(emp)
-                    
-                    # Xóa thuộc tính tạm thời
-                    delattr(manager, 'team_ids')
+            self._load_from(previous)
+        except CORRUPTION_ERRORS as e:
+            print(f"❌ Bản trước {previous.path} cũng bị hỏng: {e}")
+            return self._quarantine(path)
+        except Exception as e:
+            return self._abort_load(previous.path, e)
+        if os.path.exists(path):
+            os.replace(path, path + CORRUPT_SUFFIX)
+            print(f"⚠️  File hỏng được giữ lại tại {path + CORRUPT_SUFFIX}.")
+        print(f"⚠️  Đã khôi phục dữ liệu từ bản trước {previous.path}; các thay đổi sau bản này có thể đã mất.")
+        return True
+    
+    def _quarantine(self, path):
+        """
+        Không đọc được bản nào: bỏ các bản ghi đã nạp dở, cất file hỏng sang FILE.corrupt và chặn
+        mọi thao tác ghi file cho đến khi người dùng xác nhận (allow_writes); nếu không, lần ghi sau
+        sẽ lưu dữ liệu dở dang kèm checksum mới và lỗi bị chấp nhận trong im lặng.
+        """
+        self._reset_indexes()
+        self.writes_blocked = path
+        if os.path.exists(path):
+            try:
+                os.replace(path, path + CORRUPT_SUFFIX)
+                print(f"⚠️  File hỏng được giữ lại tại {path + CORRUPT_SUFFIX}.")
+            except OSError as e:
+                print(f"❌ Không đổi tên được file hỏng: {e}")
+        print("❌ Không khôi phục được dữ liệu. Hệ thống sẽ không ghi file cho đến khi bạn xác nhận.")
+        return False
+    
+    def _abort_load(self, path, error):
+        """
+        Không đọc được path vì lỗi không do file hỏng: bỏ các bản ghi đã nạp dở và chặn ghi file
+        (nếu không, lần ghi sau sẽ thay file còn tốt bằng dữ liệu rỗng); không đổi tên file nào
+        """
+        self._reset_indexes()
+        self.writes_blocked = path
+        print(f"❌ Không đọc được file dữ liệu {path}: {error}")
+        print("❌ File được giữ nguyên. Hệ thống sẽ không ghi file cho đến khi bạn xác nhận.")
+        return False
+    
+    def allow_writes(self):
+        """Xác nhận tiếp tục với dữ liệu hiện có trong bộ nhớ sau khi không đọc được file dữ liệu: cho phép ghi file trở lại"""
+        self.writes_blocked = None
+    
+    def _writes_refused(self):
+        if self.writes_blocked is None:
+            return False
+        print(f"❌ Chưa ghi: file dữ liệu {self.writes_blocked} chưa đọc được, cần xác nhận trước khi ghi đè.")
+        return True
+    
+    def _replay_journal(self):
+        """Áp dụng lần lượt các thay đổi trong nhật ký lên dữ liệu trong bộ nhớ"""
+        try:
+            count = 0
+            for op, payload in self.journal.replay():
+                if op in ("ADD", "UPD"):
+                    emp = parse_record(payload)
+                    if emp is None:
+                        continue
+                    if op == "ADD":
+                        if self._apply_add(emp) and isinstance(emp, ManagerEmployee):
+                            self._resolve_teams([emp])
+                    else:
+                        current = self._employees.get(emp.employee_id)
+                        if current is not None:
+                            self._apply_update(current, emp)
+                elif op == "DEL":
+                    self._apply_delete(payload)
+                elif op == "TEAM_ADD":
+                    manager_id, _, employee_id = payload.partition('|')
+                    self._apply_team_add(manager_id, employee_id)
+                elif op == "TEAM_DEL":
+                    manager_id, _, employee_id = payload.partition('|')
+                    self._apply_team_remove(manager_id, employee_id)
+                count += 1
             
-            print(f"Đã đọc dữ liệu từ file {self.data_file} thành công.")
+            if count:
+                print(f"Đã phát lại {count} thay đổi từ nhật ký {self.journal.path}.")
             return True
         
         except Exception as e:
-            print(f"❌ Lỗi khi đọc file dữ liệu: {e}")
+            print(f"❌ Lỗi khi đọc nhật ký thay đổi: {e}")
+            return False
+
+class SQLiteEmployeeManagementSystem(EmployeeManagementSystem):
+    """
+    Hệ thống quản lý nhân viên dùng trực tiếp cơ sở dữ liệu SQLite:
+    không nạp toàn bộ dữ liệu vào bộ nhớ, tra cứu theo ID/số điện thoại và thống kê chạy bằng
+    SQL có chỉ mục (tìm theo tên dùng chỉ mục trigram FTS5), mỗi thay đổi chỉ ghi các dòng liên quan.
+    """
+    
+    def __init__(self, data_file="employees_data.db", storage=None, instrument=False):
+        super().__init__(data_file, storage=storage or SQLiteStorage(data_file), instrument=instrument)
+    
+    @property
+    def employees(self):
+        """Duyệt toàn bộ nhân viên từ cơ sở dữ liệu (generator)"""
+        return self.storage.iter_employees()
+    
+    def load_data(self):
+        """Không nạp dữ liệu vào bộ nhớ; chỉ kiểm tra kết nối cơ sở dữ liệu"""
+        try:
+            count = self.storage.count()
+            print(f"Đã mở cơ sở dữ liệu {self.data_file} ({count} nhân viên).")
+            return True
+        except sqlite3.Error as e:
+            print(f"❌ Lỗi khi đọc cơ sở dữ liệu: {e}")
+            return False
+    
+    def save_data(self):
+        """Dữ liệu đã được ghi theo từng thay đổi nên không cần ghi lại toàn bộ"""
+        return True
+    
+    @contextmanager
+    def batch(self):
+        """Gom các thay đổi vào một giao dịch SQLite; có ngoại lệ thì ROLLBACK toàn bộ"""
+        with self.storage.transaction():
+            yield self
+    
+    def _exists(self, employee_id):
+        return self.storage.contains(employee_id)
+    
+    def add_employee(self, employee):
+        """
+        Thêm nhân viên mới: một lệnh INSERT. Đội có sẵn của quản lý được gắn từng người qua
+        add_team_member (cùng các kiểm tra tồn tại, một cấp trên, không vòng lặp) trong cùng giao dịch
+        """
+        if self._exists(employee.employee_id):
+            return False
+        if not isinstance(employee, ManagerEmployee) or not employee.members:
+            return self._persist("ADD", employee.to_txt_format())
+        with self.batch():
+            if not self._persist("ADD", employee.to_txt_format(include_team=False)):
+                return False
+            for member_id in list(employee.members):
+                self.add_team_member(employee.employee_id, member_id)
+        return True
+    
+    def update_employee(self, employee_id, updated_info):
+        """Cập nhật thông tin nhân viên: một lệnh UPDATE"""
+        emp = self.find_employee_by_id(employee_id)
+        if emp is None:
+            return False
+        self._apply_update(emp, updated_info)
+        return self._persist("UPD", emp.to_txt_format())
+    
+    def delete_employee(self, employee_id):
+        """Xóa nhân viên và các liên kết đội nhóm của họ"""
+        if not self._exists(employee_id):
+            return False
+        return self._persist("DEL", employee_id)
+    
+    def add_team_member(self, manager_id, employee_id):
+        """Thêm nhân viên vào đội của quản lý (quản lý chỉ có một cấp trên, không tạo vòng lặp)"""
+        if self.storage.kind_of(manager_id) != "Manager" or not self._exists(employee_id):
             return False
+        if self.storage.in_team(manager_id, employee_id):
+            return False
+        if self.storage.kind_of(employee_id) == "Manager" and (
+                employee_id == manager_id or self.storage.has_manager(employee_id)
+                or employee_id in self.storage.reporting_chain(manager_id)):
+            return False
+        return self._persist("TEAM_ADD", manager_id, employee_id)
+    
+    def remove_team_member(self, manager_id, employee_id):
+        """Xóa nhân viên khỏi đội của quản lý"""
+        if not self.storage.in_team(manager_id, employee_id):
+            return False
+        return self._persist("TEAM_DEL", manager_id, employee_id)
+    
+    def find_employee_by_id(self, employee_id):
+        """Tìm kiếm nhân viên theo ID (chỉ mục UNIQUE)"""
+        return self.storage.get(employee_id)
+    
+    def find_employee_by_name(self, name):
+        """Tìm kiếm nhân viên theo tên (chỉ mục trigram FTS5)"""
+        return self.storage.find_by_name(name)
+    
+    def get_managers_of(self, employee_id):
+        """Danh sách các quản lý có nhân viên này trong đội"""
+        return self.storage.managers_of(employee_id)
+    
+    def get_org_stats(self, manager_id):
+        """(số người, quỹ lương) của cả tổ chức dưới quản lý (truy vấn đệ quy, không lưu sẵn)"""
+        if self.storage.kind_of(manager_id) != "Manager":
+            return None
+        return self.storage.org_stats(manager_id)
+    
+    def get_reporting_chain(self, manager_id):
+        """Các quản lý cấp trên của manager_id, từ trực tiếp đến cao nhất"""
+        return [self.storage.get(node) for node in self.storage.reporting_chain(manager_id)]
+    
+    def find_employee_by_phone(self, phone, match="auto"):
+        """Tìm tất cả nhân viên theo số điện thoại (khớp chính xác/tiền tố dùng chỉ mục)"""
+        return self.storage.find_by_phone(phone, match)
+    
+    def list_employees(self, employee_type=None):
+        """Danh sách nhân viên để hiển thị, lọc theo loại bằng SQL"""
+        return list(self.storage.iter_employees(employee_type))
+    
+    def iter_employees(self, employee_type=None):
+        """Duyệt nhân viên (tất cả hoặc theo loại) theo con trỏ SQL, không nạp cả danh sách"""
+        return self.storage.iter_employees(employee_type)
+    
+    def calculate_total_salary(self):
+        """Tính tổng lương của tất cả nhân viên"""
+        return self.storage.total_salary()
+    
+    def calculate_total_salary_by_type(self, employee_type):
+        """Tính tổng lương theo loại nhân viên (chỉ mục (loại, lương))"""
+        return self.storage.total_salary(employee_type)
+    
+    def get_top_salary_employees(self, n=3, employee_type=None):
+        """Lấy danh sách n nhân viên có lương cao nhất (đọc theo chỉ mục lương)"""
+        return self.storage.top_salary(n, employee_type)
+    
+    def get_bottom_salary_employees(self, n=3, employee_type=None):
+        """Lấy danh sách n nhân viên có lương thấp nhất (đọc theo chỉ mục lương)"""
+        return self.storage.top_salary(n, employee_type, ascending=True)
+    
+    def get_salary_rank(self, employee_id, by_type=False):
+        """Hạng lương của nhân viên (1 là cao nhất)"""
+        return self.storage.salary_rank(employee_id, by_type)
+
+
+class TableEmployeeManagementSystem(EmployeeManagementSystem):
+    """
+    Hệ thống quản lý nhân viên lưu dữ liệu trong bộ nhớ theo cột (EmployeeTable).
+    Đọc/ghi file, nhật ký, batch và các chỉ mục phụ giống hệt hệ thống gốc; các phép quét
+    (lọc theo loại, tính lương hàng loạt) chạy trên cột thay vì duyệt từng đối tượng.
+    """
+    
+    def _reset_indexes(self):
+        super()._reset_indexes()
+        self._employees = EmployeeTable()
+    
+    def _ordered(self, ids):
+        return self._employees.rows_of(ids)
+    
+    def _capture_employees(self):
+        """Các hàng của một bản sao bảng (chép cột ở mức C); đối tượng chỉ được tạo khi chụp từng nhóm"""
+        table = self._employees.copy()
+        return TableRows(table, list(table._rows.values()))
+    
+    def _preserve(self, emp):
+        """
+        Không cần giữ bản ghi cũ: snapshot đọc từ bản sao của bảng nên không thấy thay đổi sau đó.
+        (Đối tượng ở đây chỉ là view tạm, id() của nó có thể trùng với view được tạo khi chụp.)
+        """
+    
+    def _apply_update(self, emp, updated_info):
+        """Cập nhật trên đối tượng đọc từ bảng rồi ghi lại vào các cột của hàng"""
+        super()._apply_update(emp, updated_info)
+        if emp.employee_id in self._employees:
+            self._employees[emp.employee_id] = emp
+    
+    def _is_current(self, emp):
+        return emp.employee_id in self._employees
+    
+    def _add_to_team(self, manager_id, employee_id):
+        return self._employees.add_team_member(manager_id, employee_id)
+    
+    def _remove_from_team(self, manager_id, employee_id):
+        return self._employees.remove_team_member(manager_id, employee_id)
+    
+    def list_employees(self, employee_type=None):
+        """Danh sách nhân viên để hiển thị, lọc theo loại trên cột mã loại"""
+        if employee_type is None:
+            return self.employees
+        if employee_type not in TYPE_NAMES:
+            return []
+        return self._employees.select(TYPE_NAMES.index(employee_type))
+    
+    def iter_employees(self, employee_type=None):
+        """Duyệt nhân viên theo loại trên cột mã loại; đối tượng chỉ được tạo cho hàng khớp"""
+        if employee_type is None:
+            return iter(self.employees)
+        if employee_type not in TYPE_NAMES:
+            return iter(())
+        table = self._employees
+        code = TYPE_NAMES.index(employee_type)
+        return map(table.view, compress(range(len(table.kinds)), map(code.__eq__, table.kinds)))
+    
+    def run_payroll(self, use_numpy=True):
+        """Tính lương toàn bộ trực tiếp trên các cột số của bảng"""
+        return self._employees.payroll_engine(use_numpy)
 
 
 def input_fulltime():
@@ -650,21 +3625,21 @@ def add_employee_menu(system):
             if nv:
                 if system.add_employee(nv):
                     print("✅ Đã thêm nhân viên toàn thời gian thành công.")
-                else:
+                elif system.writes_blocked is None:
                     print("❌ Lỗi: Mã nhân viên đã tồn tại.")
         elif choice == "2":
             nv = input_parttime()
             if nv:
                 if system.add_employee(nv):
                     print("✅ Đã thêm nhân viên bán thời gian thành công.")
-                else:
+                elif system.writes_blocked is None:
                     print("❌ Lỗi: Mã nhân viên đã tồn tại.")
         elif choice == "3":
             nv = input_manager()
             if nv:
                 if system.add_employee(nv):
                     print("✅ Đã thêm nhân viên quản lý thành công.")
-                else:
+                elif system.writes_blocked is None:
                     print("❌ Lỗi: Mã nhân viên đã tồn tại.")
         else:
             print("❌ Lỗi: Lựa chọn không hợp lệ. Vui lòng chọn 1, 2, 3 hoặc 0.")
@@ -823,12 +3798,13 @@ def search_employee_menu(system):
                 print("❌ Không tìm thấy nhân viên nào có tên này.")
                 
         elif choice == "3":
-            phone = input("Nhập số điện thoại cần tìm: ").strip()
-            employee = system.find_employee_by_phone(phone)
+            phone = input("Nhập số điện thoại (hoặc phần đầu/một phần số) cần tìm: ").strip()
+            employees = system.find_employee_by_phone(phone)
             
-            if employee:
+            if employees:
                 print("\nKẾT QUẢ TÌM KIẾM:")
-                print(employee.display_info())
+                for emp in employees:
+                    print(emp.display_info())
             else:
                 print("❌ Không tìm thấy nhân viên với số điện thoại này.")
                 
@@ -866,6 +3842,7 @@ def manage_team_menu(system):
             print("1. Xem danh sách nhân viên trong đội")
             print("2. Thêm nhân viên vào đội")
             print("3. Xóa nhân viên khỏi đội")
+            print("4. Xem tổng nhân sự và quỹ lương của cả tổ chức")
             print("0. Quay lại")
             
             choice = input("Chọn thao tác: ").strip()
@@ -873,7 +3850,8 @@ def manage_team_menu(system):
             if choice == "0":
                 break
             elif choice == "1":
-                print(manager.display_team())
+                # Đọc lại quản lý để thấy đội hiện tại (chế độ SQLite/bảng cột trả về bản sao)
+                print_paged(system.find_employee_by_id(manager.employee_id).render_team())
             elif choice == "2":
                 employee_id = input("Nhập mã nhân viên cần thêm vào đội: ").strip()
                 employee = system.find_employee_by_id(employee_id)
@@ -882,24 +3860,31 @@ def manage_team_menu(system):
                     print("❌ Không tìm thấy nhân viên với mã này.")
                     continue
                     
-                if isinstance(employee, ManagerEmployee):
-                    print("❌ Không thể thêm quản lý vào đội.")
-                    continue
-                    
-                if manager.add_employee(employee):
-                    system.save_data()  # Lưu thay đổi
+                if system.add_team_member(manager.employee_id, employee.employee_id):
                     print(f"✅ Đã thêm nhân viên {employee.name} vào đội của {manager.name}.")
+                elif system.writes_blocked is not None:
+                    continue    # lý do đã được in khi từ chối ghi
+                elif isinstance(employee, ManagerEmployee):
+                    print("❌ Không thể thêm: quản lý này đã thuộc một đội khác "
+                          "hoặc sẽ tạo vòng lặp trong sơ đồ báo cáo.")
                 else:
                     print("❌ Nhân viên đã trong đội hoặc có lỗi xảy ra.")
                     
             elif choice == "3":
                 employee_id = input("Nhập mã nhân viên cần xóa khỏi đội: ").strip()
                 
-                if manager.remove_employee(employee_id):
-                    system.save_data()  # Lưu thay đổi
+                if system.remove_team_member(manager.employee_id, employee_id):
                     print("✅ Đã xóa nhân viên khỏi đội.")
-                else:
+                elif system.writes_blocked is None:
                     print("❌ Không tìm thấy nhân viên trong đội.")
+            
+            elif choice == "4":
+                headcount, payroll = system.get_org_stats(manager.employee_id)
+                chain = system.get_reporting_chain(manager.employee_id)
+                print(f"Tổ chức của {manager.name}: {headcount} người (gồm cả quản lý), "
+                      f"tổng quỹ lương {payroll:,.2f}")
+                if chain:
+                    print("Cấp trên: " + " → ".join(f"{m.name} ({m.employee_id})" for m in chain))
             else:
                 print("❌ Lựa chọn không hợp lệ.")
     
@@ -929,44 +3914,110 @@ def salary_statistics_menu(system):
 
 def init_sample_data(system):
     """Khởi tạo dữ liệu mẫu cho hệ thống"""
+    if system.writes_blocked is not None:
+        print(f"❌ Không khởi tạo dữ liệu mẫu: file dữ liệu {system.writes_blocked} chưa đọc được.")
+        return
     try:
-        # Tạo nhân viên chính thức
-        ft1 = FullTimeEmployee("FT001", "Nguyễn Văn An", "0912345678", "an@example.com", 10000000, 3)
-        ft2 = FullTimeEmployee("FT002", "Trần Thị Bình", "0923456789", "binh@example.com", 12000000, 5)
-        
-        # Tạo nhân viên thời vụ
-        pt1 = PartTimeEmployee("PT001", "Lê Văn Cường", "0934567890", "cuong@example.com", 100000, 80)
-        pt2 = PartTimeEmployee("PT002", "Phạm Thị Dung", "0945678901", "dung@example.com", 120000, 60)
-        
-        # Tạo quản lý
-        m1 = ManagerEmployee("M001", "Hoàng Văn Em", "0956789012", "em@example.com", 20000000, 7)
-        m2 = ManagerEmployee("M002", "Trương Thị Phương", "0967890123", "phuong@example.com", 22000000, 8)
-        
-        # Thêm vào hệ thống
-        system.add_employee(ft1)
-        system.add_employee(ft2)
-        system.add_employee(pt1)
-        system.add_employee(pt2)
-        system.add_employee(m1)
-        system.add_employee(m2)
-        
-        # Thêm nhân viên vào đội
-        m1.add_employee(ft1)
-        m1.add_employee(pt1)
-        m2.add_employee(ft2)
-        m2.add_employee(pt2)
+        # Gom toàn bộ thao tác vào một batch: chỉ lưu file một lần
+        with system.batch():
+            # Tạo nhân viên chính thức
+            ft1 = FullTimeEmployee("FT001", "Nguyễn Văn An", "0912345678", "an@example.com", 10000000, 3)
+            ft2 = FullTimeEmployee("FT002", "Trần Thị Bình", "0923456789", "binh@example.com", 12000000, 5)
+            
+            # Tạo nhân viên thời vụ
+            pt1 = PartTimeEmployee("PT001", "Lê Văn Cường", "0934567890", "cuong@example.com", 100000, 80)
+            pt2 = PartTimeEmployee("PT002", "Phạm Thị Dung", "0945678901", "dung@example.com", 120000, 60)
+            
+            # Tạo quản lý
+            m1 = ManagerEmployee("M001", "Hoàng Văn Em", "0956789012", "em@example.com", 20000000, 7)
+            m2 = ManagerEmployee("M002", "Trương Thị Phương", "0967890123", "phuong@example.com", 22000000, 8)
+            
+            # Thêm vào hệ thống
+            for emp in (ft1, ft2, pt1, pt2, m1, m2):
+                system.add_employee(emp)
+            
+            # Thêm nhân viên vào đội
+            system.add_team_member("M001", "FT001")
+            system.add_team_member("M001", "PT001")
+            system.add_team_member("M002", "FT002")
+            system.add_team_member("M002", "PT002")
         
-        # Lưu dữ liệu
-        system.save_data()
         print("✅ Đã khởi tạo dữ liệu mẫu thành công.")
         
     except Exception as e:
         print(f"❌ Lỗi khi khởi tạo dữ liệu mẫu: {e}")
 
+def metrics_menu(system):
+    """Xem số liệu đo hiệu năng, hoặc bật đo nếu chưa bật"""
+    if system.metrics is None:
+        print("⚠️  Chưa bật đo hiệu năng (chạy với --metrics FILE để bật từ lúc khởi động).")
+        if input("Bật đo ngay bây giờ? (y/n): ").strip().lower() == 'y':
+            system.enable_instrumentation()
+            print("✅ Đã bật đo hiệu năng.")
+        return
+    
+    print("\n----- SỐ LIỆU HIỆU NĂNG -----")
+    print(system.metrics.report())
+    if input("\nĐặt lại số liệu? (y/n): ").strip().lower() == 'y':
+        system.metrics.reset()
+        print("✅ Đã đặt lại số liệu.")
+
+
+# Số dòng mỗi trang mặc định khi xem danh sách (0: in liền một mạch)
+DEFAULT_PAGE_SIZE = 20
+
+
+def print_paged(lines, page_size=DEFAULT_PAGE_SIZE):
+    """
+    In các dòng (dòng đầu là tiêu đề) theo từng nhóm ngay khi được tạo, không gom thành một chuỗi lớn.
+    Sau mỗi page_size dòng dữ liệu, hỏi người dùng có xem tiếp không (page_size 0: không dừng).
+    Trả về số dòng dữ liệu đã in.
+    """
+    lines = iter(lines)
+    title = next(lines, None)
+    if title is None:
+        return 0
+    print(title)
+    # Không phân trang: vẫn in theo nhóm để mỗi lần gọi print ghi nhiều dòng
+    batch = page_size or 1000
+    shown = 0
+    page = list(islice(lines, batch))
+    while page:
+        print("\n".join(page))
+        shown += len(page)
+        page = list(islice(lines, batch))
+        if page and page_size:
+            answer = input(f"-- Đã hiển thị {shown} dòng. Enter: xem tiếp, q: dừng -- ").strip().lower()
+            if answer == "q":
+                break
+    return shown
+
+
+def input_page_options(page_size=DEFAULT_PAGE_SIZE):
+    """Hỏi số dòng mỗi trang và vị trí bắt đầu; trả về (page_size, offset tính từ 0)"""
+    while True:
+        try:
+            size = input(f"Số dòng mỗi trang (Enter: {page_size}, 0: hiển thị liền): ").strip()
+            size = int(size) if size else page_size
+            start = input("Bắt đầu từ nhân viên thứ (Enter: 1): ").strip()
+            start = int(start) if start else 1
+            if size < 0 or start < 1:
+                raise ValueError
+            return size, start - 1
+        except ValueError:
+            print("❌ Vui lòng nhập số nguyên hợp lệ.")
+
 
-def main_menu():
-    """Menu chính của chương trình"""
-    system = EmployeeManagementSystem()
+def main_menu(system=None, page_size=DEFAULT_PAGE_SIZE):
+    """Menu chính của chương trình (page_size: số dòng mỗi trang mặc định khi xem danh sách)"""
+    if system is None:
+        system = EmployeeManagementSystem()
+    if system.writes_blocked is not None:
+        print(f"⚠️  Không đọc được file dữ liệu {system.writes_blocked}; dữ liệu hiện tại đang rỗng.")
+        if input("Tiếp tục với dữ liệu rỗng và cho phép ghi đè file dữ liệu? (y/n): ").strip().lower() == 'y':
+            system.allow_writes()
+        else:
+            print("Các thay đổi sẽ bị từ chối cho đến khi bạn xác nhận (chỉ xem dữ liệu).")
     
     while True:
         try:
@@ -979,6 +4030,7 @@ def main_menu():
             print("6. Quản lý đội nhóm")
             print("7. Thống kê lương")
             print("8. Khởi tạo dữ liệu mẫu")
+            print("9. Số liệu hiệu năng")
             print("0. Thoát chương trình")
             
             choice = input("\nChọn chức năng: ").strip()
@@ -998,14 +4050,14 @@ def main_menu():
                 
                 if sub_choice == "0":
                     continue
-                elif sub_choice == "1":
-                    print(system.display_all_employees())
-                elif sub_choice == "2":
-                    print(system.display_employees_by_type("FullTime"))
-                elif sub_choice == "3":
-                    print(system.display_employees_by_type("PartTime"))
-                elif sub_choice == "4":
-                    print(system.display_employees_by_type("Manager"))
+                elif sub_choice in ("1", "2", "3", "4"):
+                    # In dần từng trang thay vì dựng cả danh sách thành một chuỗi
+                    employee_type = (None, "FullTime", "PartTime", "Manager")[int(sub_choice) - 1]
+                    size, offset = input_page_options(page_size)
+                    if not print_paged(system.render_employees(employee_type, offset), size):
+                        label = "" if employee_type is None else f" {employee_type}"
+                        print(f"Không có nhân viên{label} nào" +
+                              (f" từ vị trí {offset + 1}." if offset else " trong hệ thống."))
                 else:
                     print("❌ Lựa chọn không hợp lệ.")
                     
@@ -1023,6 +4075,8 @@ def main_menu():
                 salary_statistics_menu(system)
             elif choice == "8":
                 init_sample_data(system)
+            elif choice == "9":
+                metrics_menu(system)
             else:
                 print("❌ Lựa chọn không hợp lệ. Vui lòng chọn lại.")
                 
@@ -1031,12 +4085,72 @@ def main_menu():
             break
         except Exception as e:
             print(f"❌ Lỗi không mong muốn: {e}")
+    
+    # Ghi nền: đảm bảo mọi thay đổi đã xuống đĩa trước khi thoát
+    if not system.flush():
+        print("❌ Chưa ghi được một số thay đổi xuống đĩa.")
+
+
+def parse_args(argv=None):
+    """Đọc các tùy chọn dòng lệnh"""
+    parser = argparse.ArgumentParser(description="Hệ thống quản lý nhân viên")
+    parser.add_argument("--data-file", default="employees_data.txt",
+                        help="File dữ liệu nhân viên (mặc định: employees_data.txt)")
+    parser.add_argument("--table", action="store_true",
+                        help="Lưu nhân viên trong bộ nhớ theo cột (EmployeeTable) thay vì từng đối tượng")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Số tiến trình đọc file text song song khi khởi động (mặc định: đọc tuần tự)")
+    parser.add_argument("--journal", action="store_true",
+                        help="Ghi nối thay đổi vào nhật ký thay vì ghi lại toàn bộ file mỗi lần")
+    parser.add_argument("--compact-threshold", type=int, default=1000,
+                        help="Số bản ghi nhật ký trước khi tự động gộp thành snapshot")
+    parser.add_argument("--convert", nargs=2, metavar=("NGUON", "DICH"),
+                        help="Chuyển đổi file dữ liệu giữa text và nhị phân (.bin) rồi thoát")
+    parser.add_argument("--import", dest="import_file", metavar="FILE",
+                        help="Nhập hàng loạt nhân viên từ file .csv hoặc .jsonl rồi thoát")
+    parser.add_argument("--chunk-size", type=int, default=1000,
+                        help="Số dòng kiểm tra trong mỗi nhóm khi nhập hàng loạt")
+    parser.add_argument("--write-delay", type=float, metavar="GIAY",
+                        help="Ghi file ở luồng nền, gom các thay đổi cách nhau dưới GIAY giây thành một lần ghi")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="Bật đo hiệu năng và ghi số liệu (JSON) ra FILE khi thoát")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE,
+                        help=f"Số dòng mỗi trang khi xem danh sách, 0 để in liền (mặc định: {DEFAULT_PAGE_SIZE})")
+    return parser.parse_args(argv)
+
+
+def build_system(args):
+    """Tạo hệ thống quản lý nhân viên theo tùy chọn dòng lệnh"""
+    if args.data_file.endswith(SQLITE_SUFFIXES):
+        # File .db/.sqlite: truy vấn trực tiếp trên SQLite, không nạp toàn bộ vào bộ nhớ
+        return SQLiteEmployeeManagementSystem(args.data_file, instrument=bool(args.metrics))
+    cls = TableEmployeeManagementSystem if args.table else EmployeeManagementSystem
+    return cls(args.data_file, journal=args.journal, compact_threshold=args.compact_threshold,
+               storage=open_storage(args.data_file, args.workers), instrument=bool(args.metrics),
+               write_delay=args.write_delay)
 
 
 if __name__ == "__main__":
     # Chạy chương trình
     try:
-        main_menu()
+        args = parse_args()
+        if args.convert:
+            count = convert_data_file(*args.convert)
+            print(f"✅ Đã chuyển {count} nhân viên từ {args.convert[0]} sang {args.convert[1]}.")
+        else:
+            system = build_system(args)
+            if args.import_file and system.writes_blocked is not None:
+                print(f"❌ Không đọc được file dữ liệu {system.writes_blocked}: hãy kiểm tra trước khi nhập thêm.")
+                sys.exit(1)
+            elif args.import_file:
+                report = system.import_employees(args.import_file, args.chunk_size)
+                print(("✅ " if not report.errors else "⚠️  ") + report.summary())
+            else:
+                main_menu(system, args.page_size)
+            system.close()
+            if args.metrics and system.metrics is not None:
+                system.metrics.dump(args.metrics)
+                print(f"✅ Đã ghi số liệu hiệu năng vào {args.metrics}.")
     except KeyboardInterrupt:
         print("\n⚠️  Chương trình đã bị dừng bởi người dùng.")
     except Exception as e: